@@ -5,18 +5,45 @@ from app.database import init_db, test_connection
 from app.routers import user
 from app.routers import file
 from app.routers import folder
-from app.services.cleanup import cleanup_old_trash_files
+from app.routers import upload
+from app.routers import bulk
+from app.routers import search
+from app.routers import download
+from app.routers import metrics
+from app.services.cleanup import cleanup_expired_upload_sessions, cleanup_orphan_blobs
+from app.services.folder_stats import verify_folder_stats
+from app.services.jobs import schedule_job, start_job_workers, stop_job_workers
+from app.services.thumbnail import shutdown_thumbnail_pool
+from app.utilities.metrics import MetricsMiddleware, start_metrics_flusher, stop_metrics_flusher
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 app = FastAPI()
 
 scheduler = AsyncIOScheduler()
+# 휴지통 정리는 작업 큐를 통해 실행 (여러 워커 프로세스가 떠 있어도 한 번만 등록/실행됨)
 scheduler.add_job(
-    cleanup_old_trash_files,
+    schedule_job,
     'cron',
+    args=["reap_trash"],
     hour=2,
     minute=0,
 )
+scheduler.add_job(
+    cleanup_expired_upload_sessions,
+    'interval',
+    hours=1,
+)
+scheduler.add_job(
+    cleanup_orphan_blobs,
+    'interval',
+    hours=1,
+)
+scheduler.add_job(
+    verify_folder_stats,
+    'cron',
+    hour=3,
+    minute=0,
+)
 scheduler.start()
 
 # CORS 미들웨어 추가
@@ -26,17 +53,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # 모든 HTTP 메서드 허용
     allow_headers=["*"],  # 모든 헤더 허용
-    expose_headers=["Content-Disposition", "X-Filename"]  # 추가!
+    expose_headers=["Content-Disposition", "X-Filename", "Accept-Ranges", "Content-Range", "Content-Length", "ETag", "X-Next-Cursor", "Server-Timing"]  # 추가!
 )
 
+# 요청 지표 (가장 바깥에서 CORS 처리까지 포함해 측정)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(user.router)
 app.include_router(file.router)
 app.include_router(folder.router)
+app.include_router(upload.router)
+app.include_router(bulk.router)
+app.include_router(search.router)
+app.include_router(download.router)
+app.include_router(metrics.router)
 
 @app.on_event("startup")
 async def startup_event():
     await init_db()
     await test_connection()
+    start_job_workers()
+    start_metrics_flusher()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_job_workers()
+    await stop_metrics_flusher()
+    shutdown_thumbnail_pool()
 
 @app.get("/")
 async def root():
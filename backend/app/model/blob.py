@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+class Blob(Base):
+    __tablename__ = "blobs"
+    hash = Column(String, primary_key=True)
+    path_on_disk = Column(String)
+    size = Column(BigInteger)
+    storage_codec = Column(String, nullable=True)
+    stored_size = Column(BigInteger, nullable=True)
+    ref_count = Column(Integer, default=0)
+    created_at = Column(DateTime)
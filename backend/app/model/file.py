@@ -8,9 +8,12 @@ class File(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String)
     path_on_disk = Column(String)
+    content_hash = Column(String, nullable=True)
+    storage_codec = Column(String, nullable=True)
     file_size = Column(Integer)
     parent_folder_id = Column(Integer)
     owner_id = Column(Integer)
     created_at = Column(DateTime)
     is_deleted = Column(Boolean, default=False)
-    deleted_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    deleted_at = Column(DateTime, nullable=True)
+    trash_root_id = Column(Integer, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -9,4 +9,11 @@ class Folder(Base):
     name = Column(String)
     parent_folder_id = Column(Integer)
     owner_id = Column(Integer)
-    created_at = Column(DateTime)   
\ No newline at end of file
+    path = Column(String)
+    file_count = Column(Integer, default=0)
+    folder_count = Column(Integer, default=0)
+    total_size = Column(BigInteger, default=0)
+    created_at = Column(DateTime)
+    is_deleted = Column(Boolean, default=False)
+    deleted_at = Column(DateTime, nullable=True)
+    trash_root_id = Column(Integer, nullable=True)
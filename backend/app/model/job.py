@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(BigInteger, primary_key=True)
+    kind = Column(String)
+    payload = Column(JSONB)
+    status = Column(String, default="pending")  # pending / running / dead (완료되면 삭제)
+    dedupe_key = Column(String, nullable=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer)
+    run_at = Column(DateTime)
+    locked_at = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    id = Column(String, primary_key=True)
+    name = Column(String)
+    total_size = Column(BigInteger)
+    chunk_size = Column(Integer)
+    parent_folder_id = Column(Integer)
+    owner_id = Column(Integer)
+    created_at = Column(DateTime)
+    expires_at = Column(DateTime)
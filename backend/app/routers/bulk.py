@@ -0,0 +1,359 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from sqlalchemy import text
+from app.schemas.bulk import BulkItems, BulkMove
+from typing import Optional
+from fastapi import Header
+from app.utilities.auth import get_user_id
+from app.services.blob import release_blobs, schedule_purge
+from app.services.folder_stats import add_delta, apply_deltas
+from app.services.folder_tree import get_ancestor_ids, lock_for_move, move_subtrees
+from app.services.trash import trash_folders, restore_folders, get_subtree_files
+from app.services.archive import stream_zip
+from app.utilities.file_response import make_content_disposition
+import os
+
+router = APIRouter()
+
+# 요청 하나에 담을 수 있는 최대 항목 수
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+
+# 여러 파일/폴더를 요청 하나, 트랜잭션 하나로 처리
+# - 소유권 확인: 집합 쿼리 한 번
+# - 변경: 집합 UPDATE/DELETE
+# - 결과: 항목별 status (ok / not_found / invalid / skipped)
+
+def _unique(ids: list) -> list:
+    return list(dict.fromkeys(ids))
+
+def _check_size(*id_lists):
+    if sum(len(ids) for ids in id_lists) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many items. Maximum is {BULK_MAX_ITEMS}")
+
+def _result(kind: str, item_id: int, status: str, detail: str = None) -> dict:
+    result = {"type": kind, "id": item_id, "status": status}
+    if detail:
+        result["detail"] = detail
+    return result
+
+def _summary(results: list) -> dict:
+    succeeded = sum(1 for r in results if r["status"] == "ok")
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+async def _load_items(db: AsyncSession, owner_id: int, file_ids: list, folder_ids: list):
+    """소유한 파일/폴더를 한 번에 조회 -> (파일 dict, 폴더 dict)
+
+    파일은 부모 폴더 경로, 폴더는 자기 경로를 함께 가져와 중첩 선택 여부를 판단한다.
+    """
+    result = await db.execute(
+        text("""
+            SELECT 'file' AS kind, fi.id, fi.parent_folder_id, fi.file_size AS size,
+                   fi.is_deleted, fi.trash_root_id, p.path, coalesce(p.is_deleted, false) AS parent_deleted
+            FROM files fi
+            LEFT JOIN folders p ON p.id = fi.parent_folder_id
+            WHERE fi.id = ANY(:file_ids) AND fi.owner_id = :owner_id
+            UNION ALL
+            SELECT 'folder', f.id, f.parent_folder_id, f.total_size,
+                   f.is_deleted, f.trash_root_id, f.path, coalesce(p.is_deleted, false)
+            FROM folders f
+            LEFT JOIN folders p ON p.id = f.parent_folder_id
+            WHERE f.id = ANY(:folder_ids) AND f.owner_id = :owner_id
+        """),
+        {"file_ids": file_ids, "folder_ids": folder_ids, "owner_id": owner_id}
+    )
+    files, folders = {}, {}
+    for kind, item_id, parent_id, size, is_deleted, trash_root_id, path, parent_deleted in result.fetchall():
+        item = {
+            "parent_folder_id": parent_id,
+            "size": size or 0,
+            "is_deleted": is_deleted,
+            # 따로 휴지통에 넣은 항목인지, 상위 폴더와 함께 휴지통에 들어간 항목인지
+            "trash_root": is_deleted and trash_root_id == (None if kind == "file" else item_id),
+            "path": path,
+            "parent_deleted": parent_deleted,
+        }
+        (files if kind == "file" else folders)[item_id] = item
+    return files, folders
+
+def _is_nested(path: Optional[str], selected_folder_ids: set, self_id: int = None) -> bool:
+    """경로상의 조상 폴더가 함께 선택되었는지 (선택된 폴더와 함께 처리되므로 따로 처리하지 않음)"""
+    if not path:
+        return False
+    return any(ancestor_id in selected_folder_ids for ancestor_id in get_ancestor_ids(path) if ancestor_id != self_id)
+
+@router.post("/bulk/move")
+async def bulk_move(
+    items: BulkMove,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
+
+    file_ids, folder_ids = _unique(items.file_ids), _unique(items.folder_ids)
+    _check_size(file_ids, folder_ids)
+
+    target_id = None if items.target_folder_id == 0 else items.target_folder_id
+    # 옮길 폴더와 대상 폴더를 잠근 뒤 읽어야 동시에 서로를 옮기는 요청이 순환을 만들지 않음
+    target_path = await lock_for_move(db, user_id, folder_ids, target_id)
+    files, folders = await _load_items(db, user_id, file_ids, folder_ids)
+    selected = set(folders)
+
+    results = []
+    deltas = {}
+    moved_file_ids = []
+    moved_folders = []  # (id, 기존 경로)
+
+    for folder_id in folder_ids:
+        folder = folders.get(folder_id)
+        if folder is None or folder["is_deleted"]:
+            results.append(_result("folder", folder_id, "not_found"))
+        elif target_path is not None and target_path.startswith(folder["path"]):
+            results.append(_result("folder", folder_id, "invalid", "Cannot move a folder into itself or its descendant"))
+        elif _is_nested(folder["path"], selected, folder_id):
+            results.append(_result("folder", folder_id, "skipped", "Parent folder is also selected"))
+        else:
+            if folder["parent_folder_id"] != target_id:
+                add_delta(deltas, folder["parent_folder_id"], folder_count=-1, size=-folder["size"])
+                add_delta(deltas, target_id, folder_count=1, size=folder["size"])
+                moved_folders.append((folder_id, folder["path"]))
+            results.append(_result("folder", folder_id, "ok"))
+
+    for file_id in file_ids:
+        file = files.get(file_id)
+        # 폴더와 함께 휴지통에 들어간 파일은 따로 옮길 수 없음
+        if file is None or (file["is_deleted"] and not file["trash_root"]):
+            results.append(_result("file", file_id, "not_found"))
+        elif _is_nested(file["path"], selected):
+            results.append(_result("file", file_id, "skipped", "Parent folder is also selected"))
+        else:
+            if file["parent_folder_id"] != target_id:
+                # 휴지통 파일은 집계에 포함되지 않으므로 위치만 바꿈
+                if not file["is_deleted"]:
+                    add_delta(deltas, file["parent_folder_id"], file_count=-1, size=-file["size"])
+                    add_delta(deltas, target_id, file_count=1, size=file["size"])
+                moved_file_ids.append(file_id)
+            results.append(_result("file", file_id, "ok"))
+
+    # 예전 부모와 대상 폴더는 이동하는 하위 트리 밖에 있으므로 경로 갱신 전후 어느 쪽에서 반영해도 같음
+    await apply_deltas(db, user_id, deltas)
+
+    if moved_file_ids:
+        await db.execute(
+            text("UPDATE files SET parent_folder_id = :target_id WHERE id = ANY(:file_ids) AND owner_id = :owner_id"),
+            {"target_id": target_id, "file_ids": moved_file_ids, "owner_id": user_id}
+        )
+
+    # 이동하는 폴더들의 하위 트리 경로를 한 문장으로 갱신
+    await move_subtrees(db, user_id, moved_folders, target_id, target_path)
+
+    await db.commit()
+    return _summary(results)
+
+@router.post("/bulk/trash")
+async def bulk_trash(
+    items: BulkItems,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """파일과 폴더(하위 트리째)를 휴지통으로"""
+    user_id = await get_user_id(authorization, db)
+
+    file_ids, folder_ids = _unique(items.file_ids), _unique(items.folder_ids)
+    _check_size(file_ids, folder_ids)
+
+    files, folders = await _load_items(db, user_id, file_ids, folder_ids)
+    selected = set(folders)
+
+    results = []
+    deltas = {}
+    trashed_file_ids = []
+    trashed_folders = []  # (id, 경로)
+
+    for folder_id in folder_ids:
+        folder = folders.get(folder_id)
+        if folder is None:
+            results.append(_result("folder", folder_id, "not_found"))
+            continue
+        # 조상 폴더가 함께 선택되었으면 그 폴더의 하위 트리로 같이 표시됨
+        if not folder["is_deleted"] and not _is_nested(folder["path"], selected, folder_id):
+            add_delta(deltas, folder["parent_folder_id"], folder_count=-1, size=-folder["size"])
+            trashed_folders.append((folder_id, folder["path"]))
+        results.append(_result("folder", folder_id, "ok"))
+
+    for file_id in file_ids:
+        file = files.get(file_id)
+        if file is None:
+            results.append(_result("file", file_id, "not_found"))
+            continue
+        if not file["is_deleted"] and not _is_nested(file["path"], selected):
+            add_delta(deltas, file["parent_folder_id"], file_count=-1, size=-file["size"])
+            trashed_file_ids.append(file_id)
+        results.append(_result("file", file_id, "ok"))
+
+    await apply_deltas(db, user_id, deltas)
+
+    if trashed_file_ids:
+        await db.execute(
+            text("""
+                UPDATE files SET is_deleted = true, deleted_at = now()
+                WHERE id = ANY(:file_ids) AND owner_id = :owner_id AND is_deleted = false
+            """),
+            {"file_ids": trashed_file_ids, "owner_id": user_id}
+        )
+    await trash_folders(db, user_id, trashed_folders)
+
+    await db.commit()
+    return _summary(results)
+
+@router.post("/bulk/restore")
+async def bulk_restore(
+    items: BulkItems,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
+
+    file_ids, folder_ids = _unique(items.file_ids), _unique(items.folder_ids)
+    _check_size(file_ids, folder_ids)
+
+    files, folders = await _load_items(db, user_id, file_ids, folder_ids)
+
+    # 휴지통 목록에 보이는 항목(따로 휴지통에 넣은 파일, 휴지통으로 보낸 폴더)만 복원 가능
+    restored_folder_ids = [folder_id for folder_id in folder_ids if folder_id in folders and folders[folder_id]["trash_root"]]
+    restored_file_ids = [file_id for file_id in file_ids if file_id in files and files[file_id]["trash_root"]]
+
+    deltas = {}
+    await restore_folders(db, user_id, restored_folder_ids)
+    if restored_folder_ids:
+        # 함께 복원되지 않아 부모가 여전히 휴지통에 있는 폴더는 루트로
+        result = await db.execute(
+            text("""
+                SELECT f.id, f.path FROM folders f
+                JOIN folders p ON p.id = f.parent_folder_id
+                WHERE f.id = ANY(:folder_ids) AND p.is_deleted = true
+            """),
+            {"folder_ids": restored_folder_ids}
+        )
+        orphaned_folders = [(row[0], row[1]) for row in result.fetchall()]
+        await move_subtrees(db, user_id, orphaned_folders, None, None)
+
+        orphaned_ids = {folder_id for folder_id, _ in orphaned_folders}
+        for folder_id in restored_folder_ids:
+            parent_id = None if folder_id in orphaned_ids else folders[folder_id]["parent_folder_id"]
+            add_delta(deltas, parent_id, folder_count=1, size=folders[folder_id]["size"])
+
+    if restored_file_ids:
+        # 원래 폴더가 여전히 휴지통에 있으면 루트로 복원
+        result = await db.execute(
+            text("""
+                UPDATE files SET is_deleted = false, deleted_at = NULL,
+                    parent_folder_id = CASE
+                        WHEN EXISTS (SELECT 1 FROM folders p WHERE p.id = files.parent_folder_id AND p.is_deleted)
+                        THEN NULL ELSE parent_folder_id END
+                WHERE id = ANY(:file_ids) AND owner_id = :owner_id AND is_deleted = true AND trash_root_id IS NULL
+                RETURNING parent_folder_id, file_size
+            """),
+            {"file_ids": restored_file_ids, "owner_id": user_id}
+        )
+        for parent_id, file_size in result.fetchall():
+            add_delta(deltas, parent_id, file_count=1, size=file_size)
+
+    await apply_deltas(db, user_id, deltas)
+    await db.commit()
+
+    restored = set(restored_folder_ids), set(restored_file_ids)
+    return _summary(
+        [_result("folder", folder_id, "ok" if folder_id in restored[0] else "not_found") for folder_id in folder_ids]
+        + [_result("file", file_id, "ok" if file_id in restored[1] else "not_found") for file_id in file_ids]
+    )
+
+@router.post("/bulk/delete-permanent")
+async def bulk_delete_permanent(
+    items: BulkItems,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
+
+    file_ids, folder_ids = _unique(items.file_ids), _unique(items.folder_ids)
+    _check_size(file_ids, folder_ids)
+
+    # 휴지통 목록에 보이는 내 파일만 삭제 (휴지통 항목은 집계에 포함되지 않으므로 집계 변경 없음)
+    result = await db.execute(
+        text("""
+            DELETE FROM files
+            WHERE id = ANY(:file_ids) AND owner_id = :owner_id AND is_deleted = true AND trash_root_id IS NULL
+            RETURNING id, content_hash, path_on_disk
+        """),
+        {"file_ids": file_ids, "owner_id": user_id}
+    )
+    rows = result.fetchall()
+    deleted_files = {row[0] for row in rows}
+    files_to_release = [(row[1], row[2]) for row in rows]
+
+    # 휴지통으로 보낸 폴더는 하위 트리 파일의 blob 참조까지 해제한 뒤 삭제 (하위 항목은 CASCADE)
+    deleted_folders = set()
+    if folder_ids:
+        result = await db.execute(
+            text("""
+                SELECT id, path FROM folders
+                WHERE id = ANY(:folder_ids) AND owner_id = :owner_id AND is_deleted = true AND trash_root_id = id
+                FOR UPDATE
+            """),
+            {"folder_ids": folder_ids, "owner_id": user_id}
+        )
+        folder_rows = result.fetchall()
+        deleted_folders = {row[0] for row in folder_rows}
+        files_to_release += await get_subtree_files(db, user_id, [row[1] for row in folder_rows])
+        if deleted_folders:
+            await db.execute(
+                text("DELETE FROM folders WHERE id = ANY(:folder_ids)"),
+                {"folder_ids": list(deleted_folders)}
+            )
+
+    # 참조가 0이 된 blob 정리는 같은 트랜잭션에서 작업 큐에 등록 (응답 후 워커가 처리)
+    orphan_digests, legacy_paths = await release_blobs(db, files_to_release)
+    await schedule_purge(db, orphan_digests, legacy_paths)
+    await db.commit()
+
+    return _summary(
+        [_result("folder", folder_id, "ok" if folder_id in deleted_folders else "not_found") for folder_id in folder_ids]
+        + [_result("file", file_id, "ok" if file_id in deleted_files else "not_found") for file_id in file_ids]
+    )
+
+@router.post("/bulk/download")
+async def bulk_download(
+    items: BulkItems,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """선택한 파일/폴더를 ZIP 하나로 스트리밍 (폴더는 하위 트리째, 휴지통 항목과 없는 항목은 제외)"""
+    user_id = await get_user_id(authorization, db)
+
+    file_ids, folder_ids = _unique(items.file_ids), _unique(items.folder_ids)
+    _check_size(file_ids, folder_ids)
+
+    files, folders = await _load_items(db, user_id, file_ids, folder_ids)
+    selected = {folder_id for folder_id, folder in folders.items() if not folder["is_deleted"]}
+
+    # 상위 폴더가 함께 선택된 항목은 그 폴더 안에 들어가므로 따로 담지 않음
+    root_folder_ids = [
+        folder_id for folder_id in folder_ids
+        if folder_id in selected and not _is_nested(folders[folder_id]["path"], selected, folder_id)
+    ]
+    top_file_ids = [
+        file_id for file_id in file_ids
+        if file_id in files and not files[file_id]["is_deleted"] and not _is_nested(files[file_id]["path"], selected)
+    ]
+    if not root_folder_ids and not top_file_ids:
+        raise HTTPException(status_code=404, detail="Nothing to download")
+
+    # 전송이 오래 걸릴 수 있으므로 요청 세션의 연결은 바로 반환 (목록은 배치마다 새 세션으로 조회)
+    await db.close()
+    return StreamingResponse(
+        stream_zip(user_id, root_folder_ids, top_file_ids),
+        media_type="application/zip",
+        headers={"Content-Disposition": make_content_disposition("download.zip")},
+    )
@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import RedirectResponse
+from urllib.parse import quote
+import mimetypes
+import os
+import time
+from app.services.storage import LOCAL_STORAGE_ROOT, resolve_storage
+from app.services.compression import build_stored_file_response
+from app.utilities.file_response import make_content_disposition
+from app.utilities.signed_url import verify_download
+
+router = APIRouter()
+
+# 서명된 다운로드 URL 처리 (로그인/DB 조회 없이 서명만 확인)
+# 앞단 프록시가 파일을 직접 보내게 하려면 DOWNLOAD_OFFLOAD 설정
+# - x-accel-redirect (nginx): LOCAL_STORAGE_ROOT를 DOWNLOAD_ACCEL_PREFIX로 internal location 매핑 필요
+# - x-sendfile (Apache mod_xsendfile, lighttpd): 절대 경로 전달
+DOWNLOAD_OFFLOAD = os.getenv("DOWNLOAD_OFFLOAD", "").lower()
+DOWNLOAD_ACCEL_PREFIX = os.getenv("DOWNLOAD_ACCEL_PREFIX", "/_storage/")
+
+def _offload_header(local_path: str):
+    """프록시에 넘길 (헤더 이름, 값) - 설정이 없거나 로컬 저장소 밖의 경로면 None"""
+    absolute_path = os.path.abspath(local_path)
+    if DOWNLOAD_OFFLOAD == "x-sendfile":
+        return "X-Sendfile", absolute_path
+    if DOWNLOAD_OFFLOAD == "x-accel-redirect":
+        relative_path = os.path.relpath(absolute_path, os.path.abspath(LOCAL_STORAGE_ROOT))
+        if relative_path.startswith(".."):
+            return None
+        return "X-Accel-Redirect", DOWNLOAD_ACCEL_PREFIX.rstrip("/") + "/" + quote(relative_path)
+    return None
+
+@router.api_route("/downloads/{token}", methods=["GET", "HEAD"])
+async def download_signed(token: str, request: Request):
+    payload = verify_download(token)
+    filename = payload["n"]
+    storage, key = resolve_storage(payload["k"])
+
+    mime_type, _ = mimetypes.guess_type(filename)
+    if mime_type is None:
+        mime_type = "application/octet-stream"
+
+    # 내용은 바뀌지 않으므로 링크가 만료될 때까지 공유 캐시에 둬도 됨
+    remaining = max(0, int(payload["e"] - time.time()))
+    cache_control = f"public, max-age={remaining}, immutable"
+
+    # 압축 저장된 파일은 저장소/프록시가 풀 수 없으므로 항상 이 서버에서 처리
+    codec = payload.get("c")
+    if codec is None:
+        # 원격 저장소는 저장소의 서명 URL로 보내서 파일이 이 서버를 거치지 않게 함
+        presigned_url = storage.presign_url(key, remaining, filename, mime_type)
+        if presigned_url:
+            return RedirectResponse(presigned_url, status_code=307, headers={"Cache-Control": cache_control})
+
+        local_path = storage.local_path(key)
+        offload = _offload_header(local_path) if local_path and DOWNLOAD_OFFLOAD else None
+        if offload:
+            # 존재 확인, Range, 전송은 모두 프록시가 처리
+            header_name, header_value = offload
+            return Response(
+                media_type=mime_type,
+                headers={
+                    header_name: header_value,
+                    "Content-Disposition": make_content_disposition(filename),
+                    "Cache-Control": cache_control,
+                },
+            )
+
+    return await build_stored_file_response(
+        request,
+        stored_key=payload["k"],
+        codec=codec,
+        file_size=payload.get("s"),
+        filename=filename,
+        media_type=mime_type,
+        content_hash=payload.get("h"),
+        cache_control=cache_control,
+    )
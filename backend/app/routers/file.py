@@ -1,41 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_async_db
-from sqlalchemy import select
+from sqlalchemy import select, text
 from app.model.file import File
-from app.schemas.file import FileUpdate
+from app.model.folder import Folder
+from app.schemas.file import FileUpdate, FileInstantUpload
 from datetime import datetime
-import uuid
 from pathlib import Path
 from fastapi import UploadFile, Form
 from fastapi import File as FastAPIFile
 from typing import Optional
-from app.utilities.jwt import verify_token
 from fastapi import Header
-from app.model.user import User
-from fastapi.responses import FileResponse
+from app.utilities.file_response import build_file_response
 import mimetypes
+import os
 from app.utilities.auth import get_user_id
+from app.utilities.signed_url import DOWNLOAD_URL_TTL_SECONDS, DOWNLOAD_URL_MAX_TTL_SECONDS, sign_download
+from app.utilities.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, split_page, encode_cursor, decode_cursor
+from app.services.disk import AsyncFileWriter, UPLOAD_READ_CHUNK_SIZE, run_io, unlink
+from app.services.blob import new_temp_path, new_hasher, find_blob, acquire_blob, release_blobs, schedule_purge
+from app.services.folder_stats import apply_file_delta
+from app.services.folder_tree import get_parent_path
+from app.services.compression import choose_codec, build_stored_file_response
+from app.services.thumbnail import THUMBNAIL_SIZES, thumbnails_supported, get_thumbnail, schedule_thumbnails
 
 router = APIRouter()
 
+# 정렬 가능한 컬럼: sort 파라미터 -> (컬럼, 속성명, datetime 여부)
+FILE_SORTS = {
+    "name": (File.name, "name", False),
+    "created_at": (File.created_at, "created_at", True),
+    "size": (File.file_size, "file_size", False),
+}
+
 @router.get("/files/")
 async def get_files(
+    response: Response,
     parent_folder_id: Optional[int] = None,
+    sort: str = "name",
+    order: str = "asc",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     authorization: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_async_db)
 ):
     user_id = await get_user_id(authorization, db)
 
+    if sort not in FILE_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(FILE_SORTS)}")
+    sort_column, sort_attr, is_datetime = FILE_SORTS[sort]
+
     file_query = select(File).where(File.owner_id == user_id, File.is_deleted == False)
     
     if parent_folder_id == 0 or parent_folder_id is None:  # 0을 루트 폴더로 사용
         file_query = file_query.where(File.parent_folder_id.is_(None))
     else:
         file_query = file_query.where(File.parent_folder_id == parent_folder_id)
+
+    file_query = paginate(file_query, sort_column, File.id, sort, order, cursor, limit, is_datetime)
     
     result = await db.execute(file_query)
-    files = result.scalars().all()
+    files, next_cursor = split_page(result.scalars().all(), limit, sort, order, sort_attr)
+
+    # 다음 페이지 커서는 헤더로 전달 (응답 본문은 기존처럼 파일 목록)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return files
 
 @router.post("/files/")
@@ -45,9 +74,9 @@ async def upload_file(
     authorization: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_async_db)
 ):
+    file_path = None
     try:
         MAX_FILE_SIZE = 1024 * 1024 * 10 # 10MB
-        CHUNK_SIZE = 8192 # 8KB
         
         user_id = await get_user_id(authorization, db)
 
@@ -66,44 +95,40 @@ async def upload_file(
                 detail=f"File too large. Maximum size is {MAX_FILE_SIZE / (1024 * 1024)}MB"
             )
 
-        # 파일 확장자 추출
-        file_extension = Path(file.filename).suffix if file.filename else ""
-        
-        # 고유한 파일명 생성 (UUID + 확장자)
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        
-        # 저장 경로 생성 (data/files/owner_id/년/월/)
-        now = datetime.now()
-        relative_path = Path("data/files") / str(owner_id) / str(now.year) / f"{now.month:02d}"
-        file_path = relative_path / unique_filename
-        
-        # 디렉토리 생성
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        # parent_folder_id 처리 수정 (0은 루트, 아니면 내 폴더이고 휴지통에 없는지 본문을 받기 전에 확인)
+        actual_parent_folder_id = None if parent_folder_id == 0 else parent_folder_id
+        await get_parent_path(db, actual_parent_folder_id, owner_id)
+
+        # 임시 파일에 저장하면서 SHA-256 계산 (완료 후 blob 저장소로 이동)
+        file_path = new_temp_path()
+        hasher = new_hasher()
         
         file_size = 0
-        # 파일 저장
-        with open(file_path, "wb") as buffer:
-            while chunk := await file.read(CHUNK_SIZE):
-                buffer.write(chunk)
+        # 파일 저장 (쓰기/해시 계산은 디스크 전용 스레드풀에서 처리)
+        async with AsyncFileWriter(file_path, hasher) as writer:
+            while chunk := await file.read(UPLOAD_READ_CHUNK_SIZE):
                 file_size += len(chunk)
 
-                # 실제 파일 크기 체크
+                # 실제 파일 크기 체크 (예외 발생 시 writer가 임시 파일 삭제)
                 if file_size > MAX_FILE_SIZE:
-                    buffer.close()
-                    if file_path.exists():
-                        file_path.unlink()
                     raise HTTPException(
                         status_code=413,
                         detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024):.0f}MB"
                     )
 
-        # parent_folder_id 처리 수정
-        actual_parent_folder_id = None if parent_folder_id == 0 else parent_folder_id
-        
+                await writer.write(chunk)
+
+        # 같은 내용의 blob이 있으면 재사용 (참조 카운트 증가), 없으면 잘 줄어드는 형식은 압축해서 저장
+        content_hash = hasher.hexdigest()
+        codec = await choose_codec(file.filename, file_path, file_size)
+        path_on_disk, storage_codec = await acquire_blob(db, content_hash, file_size, file_path, codec)
+
         # 데이터베이스에 파일 정보 저장
         new_file = File(
             name=file.filename,
-            path_on_disk=str(file_path),
+            path_on_disk=path_on_disk,
+            content_hash=content_hash,
+            storage_codec=storage_codec,
             file_size=file_size,
             parent_folder_id=actual_parent_folder_id,
             owner_id=owner_id,
@@ -111,6 +136,8 @@ async def upload_file(
         )
         
         db.add(new_file)
+        await apply_file_delta(db, user_id, actual_parent_folder_id, 1, file_size)
+        await schedule_thumbnails(db, content_hash, path_on_disk, file.filename, file_size)
         await db.commit()
         await db.refresh(new_file)
         
@@ -132,48 +159,165 @@ async def upload_file(
         raise
     except Exception as e:
         await db.rollback()
-        # 업로드 실패 시 파일 삭제
-        if file_path and file_path.exists():
+        # 업로드 실패 시 파일 삭제 (파일 삭제 실패는 무시)
+        if file_path:
             try:
-                file_path.unlink()
-            except:
-                pass  # 파일 삭제 실패는 무시
+                await unlink(file_path)
+            except Exception:
+                pass
         raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
 
-@router.get("/files/download/{file_id}")
+# 해시 선확인 업로드 (같은 내용의 blob이 있으면 바이트 전송 없이 파일 생성)
+@router.post("/files/instant")
+async def instant_upload_file(
+    upload_data: FileInstantUpload,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
+
+    if not upload_data.name:
+        raise HTTPException(status_code=400, detail="Filename is required")
+
+    content_hash = upload_data.sha256.lower()
+    if len(content_hash) != 64 or any(c not in "0123456789abcdef" for c in content_hash):
+        raise HTTPException(status_code=400, detail="Invalid sha256")
+
+    actual_parent_folder_id = None if upload_data.parent_folder_id == 0 else upload_data.parent_folder_id
+    await get_parent_path(db, actual_parent_folder_id, user_id)
+
+    if not await find_blob(db, content_hash, upload_data.file_size):
+        return {"message": "Blob not found, upload required", "uploaded": False}
+
+    try:
+        path_on_disk, storage_codec = await acquire_blob(db, content_hash, upload_data.file_size)
+    except FileNotFoundError:
+        await db.rollback()
+        return {"message": "Blob not found, upload required", "uploaded": False}
+
+    new_file = File(
+        name=upload_data.name,
+        path_on_disk=path_on_disk,
+        content_hash=content_hash,
+        storage_codec=storage_codec,
+        file_size=upload_data.file_size,
+        parent_folder_id=actual_parent_folder_id,
+        owner_id=user_id,
+        created_at=datetime.now()
+    )
+    db.add(new_file)
+    await apply_file_delta(db, user_id, actual_parent_folder_id, 1, upload_data.file_size)
+    await schedule_thumbnails(db, content_hash, path_on_disk, upload_data.name, upload_data.file_size)
+    await db.commit()
+    await db.refresh(new_file)
+
+    return {
+        "message": "File uploaded successfully",
+        "uploaded": True,
+        "file": {
+            "id": new_file.id,
+            "name": new_file.name,
+            "file_size": new_file.file_size,
+            "path_on_disk": new_file.path_on_disk,
+            "parent_folder_id": actual_parent_folder_id,
+            "owner_id": new_file.owner_id,
+            "created_at": new_file.created_at.isoformat() if new_file.created_at else None
+        }
+    }
+
+@router.api_route("/files/download/{file_id}", methods=["GET", "HEAD"])
 async def download_file(
     file_id: int,
+    request: Request,
     authorization: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_async_db)
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid token format")
-    
-    token = authorization.replace("Bearer ", "")
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    user_id = await get_user_id(authorization, db)
     
-    file_query = select(File).where(File.id == file_id)
+    file_query = select(File).where(File.id == file_id, File.owner_id == user_id)
     result = await db.execute(file_query)
     file = result.scalars().first()
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
     
-    file_path = Path(file.path_on_disk)
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="File not found")
-    
     mime_type, _ = mimetypes.guess_type(file.name)
     if mime_type is None:
         mime_type = "application/octet-stream"
     
-    return FileResponse(
-        path=file_path,
+    # 존재 확인과 크기/수정시각 조회는 한 번의 stat으로 (로컬은 디스크 스레드, 원격은 HEAD 한 번)
+    # 압축 저장된 파일은 풀어서, 또는 클라이언트가 받을 수 있으면 Content-Encoding으로 그대로 전송
+    return await build_stored_file_response(
+        request,
+        stored_key=file.path_on_disk,
+        codec=file.storage_codec,
+        file_size=file.file_size,
         filename=file.name,
         media_type=mime_type,
-        headers={"Content-Disposition": f"attachment; filename={file.name}",
-        "X-Filename": file.name}
+        content_hash=file.content_hash,
+    )
+
+@router.post("/files/{file_id}/download-url")
+async def create_download_url(
+    file_id: int,
+    request: Request,
+    expires_in: int = Query(DOWNLOAD_URL_TTL_SECONDS, ge=60, le=DOWNLOAD_URL_MAX_TTL_SECONDS),
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """로그인 없이 쓸 수 있는 만료 시각이 있는 다운로드 링크 발급 (공유/캐시용)"""
+    user_id = await get_user_id(authorization, db)
+
+    file_query = select(File).where(File.id == file_id, File.owner_id == user_id, File.is_deleted == False)
+    result = await db.execute(file_query)
+    file = result.scalars().first()
+    if not file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    token, expires_at = sign_download(
+        file.path_on_disk, file.content_hash, file.name, expires_in,
+        codec=file.storage_codec, file_size=file.file_size,
+    )
+    return {
+        "url": str(request.url_for("download_signed", token=token)),
+        "expires_at": datetime.fromtimestamp(expires_at).isoformat(),
+    }
+
+@router.get("/files/{file_id}/thumbnail")
+async def get_file_thumbnail(
+    file_id: int,
+    request: Request,
+    size: int = 256,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """이미지 파일 썸네일 (WebP, 캐시에 없으면 처음 요청할 때 생성)"""
+    user_id = await get_user_id(authorization, db)
+
+    if size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {', '.join(map(str, THUMBNAIL_SIZES))}")
+
+    file_query = select(File).where(File.id == file_id, File.owner_id == user_id)
+    result = await db.execute(file_query)
+    file = result.scalars().first()
+    if not file:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not file.content_hash or not thumbnails_supported(file.name, file.file_size or 0):
+        raise HTTPException(status_code=404, detail="Preview not available")
+
+    try:
+        thumbnail_path = await get_thumbnail(file.content_hash, file.path_on_disk, size)
+        stat_result = await run_io(os.stat, thumbnail_path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Preview not available")
+
+    return build_file_response(
+        request,
+        path=str(thumbnail_path),
+        stat_result=stat_result,
+        filename=f"{Path(file.name).stem}.webp",
+        media_type="image/webp",
+        content_hash=f"{file.content_hash}-{size}",
+        disposition="inline",
     )
 
 @router.patch("/files/{file_id}")
@@ -189,11 +333,11 @@ async def update_file(
     result = await db.execute(query)
     file = result.scalars().first()
 
-    if file.owner_id != user_id:
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
+
+    if file.owner_id != user_id:
+        raise HTTPException(status_code=403, detail="Unauthorized")
     
     if update_data.name is not None:
         # 기존 파일의 확장자 추출
@@ -208,7 +352,15 @@ async def update_file(
     
     if update_data.parent_folder_id is not None:
         # parent_folder_id가 0이면 NULL로 변환
-        file.parent_folder_id = None if update_data.parent_folder_id == 0 else update_data.parent_folder_id
+        new_parent_id = None if update_data.parent_folder_id == 0 else update_data.parent_folder_id
+        # 대상 폴더가 내 폴더이고 휴지통에 없는지 확인 (아니면 404)
+        await get_parent_path(db, new_parent_id, user_id)
+
+        # 휴지통에 없는 파일이면 예전/새 부모 폴더 집계도 함께 갱신
+        if new_parent_id != file.parent_folder_id and not file.is_deleted:
+            await apply_file_delta(db, user_id, file.parent_folder_id, -1, -file.file_size)
+            await apply_file_delta(db, user_id, new_parent_id, 1, file.file_size)
+        file.parent_folder_id = new_parent_id
     
     # if update_data.file_size is not None:
     #     file.file_size = update_data.file_size
@@ -247,7 +399,9 @@ async def delete_file(
     #     except Exception as e:
     #         print(f"Failed to delete file from disk: {e}")
 
-    # 실제 파일 삭제 대신 soft delete 처리
+    # 실제 파일 삭제 대신 soft delete 처리 (이미 휴지통이면 집계는 그대로)
+    if not file.is_deleted:
+        await apply_file_delta(db, user_id, file.parent_folder_id, -1, -file.file_size)
     file.is_deleted = True
     file.deleted_at = datetime.now()
     
@@ -255,18 +409,79 @@ async def delete_file(
     # await db.delete(file)
     await db.commit()
     
+# 휴지통 목록: 따로 버린 파일 + 휴지통으로 보낸 폴더(하위 항목은 접어서 폴더 하나로)
+TRASH_BRANCHES = {
+    "file": """
+        SELECT 'file' AS type, id, name, file_size, parent_folder_id, created_at, deleted_at,
+               NULL::int AS file_count, NULL::int AS folder_count
+        FROM files
+        WHERE owner_id = :owner_id AND is_deleted = true AND trash_root_id IS NULL {cursor_condition}
+        ORDER BY deleted_at DESC, id DESC
+        LIMIT :fetch_limit
+    """,
+    "folder": """
+        SELECT 'folder' AS type, id, name, total_size AS file_size, parent_folder_id, created_at, deleted_at,
+               file_count, folder_count
+        FROM folders
+        WHERE owner_id = :owner_id AND is_deleted = true AND trash_root_id = id {cursor_condition}
+        ORDER BY deleted_at DESC, id DESC
+        LIMIT :fetch_limit
+    """,
+}
+
 @router.get("/files/trash")
 async def get_trash_files(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     authorization: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_async_db)
 ):
     user_id = await get_user_id(authorization, db)
 
-    trash_query = select(File).where(File.owner_id == user_id, File.is_deleted == True).order_by(File.deleted_at.desc())
+    # (deleted_at, type, id) 내림차순 keyset
+    # 각 갈래가 자기 인덱스 순서대로 limit + 1개만 읽도록 커서 조건을 갈래별로 풀어서 넣음
+    params = {"owner_id": user_id, "fetch_limit": limit + 1}
+    cursor_type = None
+    if cursor:
+        value, row_id = decode_cursor(cursor, "deleted_at", "desc")
+        try:
+            deleted_at, cursor_type = value
+            params["cursor_deleted_at"] = datetime.fromisoformat(deleted_at)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if cursor_type not in TRASH_BRANCHES:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        params["cursor_id"] = row_id
+
+    branches = []
+    for branch_type, branch_query in TRASH_BRANCHES.items():
+        if cursor_type is None:
+            cursor_condition = ""
+        elif branch_type < cursor_type:
+            cursor_condition = "AND deleted_at <= :cursor_deleted_at"
+        elif branch_type == cursor_type:
+            cursor_condition = "AND (deleted_at, id) < (:cursor_deleted_at, :cursor_id)"
+        else:
+            cursor_condition = "AND deleted_at < :cursor_deleted_at"
+        branches.append(f"({branch_query.format(cursor_condition=cursor_condition)})")
+
+    result = await db.execute(
+        text(f"""
+            SELECT * FROM ({" UNION ALL ".join(branches)}) trash
+            ORDER BY deleted_at DESC, type DESC, id DESC
+            LIMIT :fetch_limit
+        """),
+        params
+    )
+    rows = [dict(row._mapping) for row in result.fetchall()]
 
-    result = await db.execute(trash_query)
-    trash_files = result.scalars().all()
-    return trash_files
+    trash_items = rows[:limit]
+    if len(rows) > limit:
+        last = trash_items[-1]
+        next_cursor = encode_cursor("deleted_at", "desc", [last["deleted_at"].isoformat(), last["type"]], last["id"])
+        response.headers["X-Next-Cursor"] = next_cursor
+    return trash_items
 
 @router.post("/files/{file_id}/restore")
 async def restore_file(
@@ -276,15 +491,28 @@ async def restore_file(
 ):
     user_id = await get_user_id(authorization, db)
 
-    file_query = select(File).where(File.id == file_id, File.owner_id == user_id, File.is_deleted == True)
+    # 폴더와 함께 휴지통에 들어간 파일은 폴더 단위로만 복원
+    file_query = select(File).where(
+        File.id == file_id,
+        File.owner_id == user_id,
+        File.is_deleted == True,
+        File.trash_root_id.is_(None)
+    )
     result = await db.execute(file_query)
     file = result.scalars().first()
 
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
+
+    # 원래 폴더가 휴지통에 있으면 루트로 복원
+    if file.parent_folder_id is not None:
+        parent_query = select(Folder.is_deleted).where(Folder.id == file.parent_folder_id)
+        if (await db.execute(parent_query)).scalar():
+            file.parent_folder_id = None
     
     file.is_deleted = False
     file.deleted_at = None
+    await apply_file_delta(db, user_id, file.parent_folder_id, 1, file.file_size)
     await db.commit()
 
 @router.delete("/files/{file_id}/permanent")
@@ -299,7 +527,8 @@ async def delete_file_permanent(
     file_query = select(File).where(
         File.id == file_id, 
         File.is_deleted == True,
-        File.owner_id == user_id
+        File.owner_id == user_id,
+        File.trash_root_id.is_(None)
     )
     result = await db.execute(file_query)
     file = result.scalars().first()
@@ -307,14 +536,12 @@ async def delete_file_permanent(
     if not file:
         raise HTTPException(status_code=404, detail="File not found in trash")
     
-    # 실제 파일 삭제
-    file_path = Path(file.path_on_disk)
-    if file_path.exists():
-        try:
-            file_path.unlink()
-        except Exception as e:
-            print(f"Failed to delete file from disk: {e}")
+    # blob 참조 해제 (다른 파일이 같은 blob을 참조하면 실제 파일은 유지)
+    orphan_digests, legacy_paths = await release_blobs(db, [(file.content_hash, file.path_on_disk)])
     
+    # 참조가 0이 된 blob만 실제 파일 삭제 (같은 트랜잭션에서 작업 큐에 등록, 응답 후 워커가 처리)
+    await schedule_purge(db, orphan_digests, legacy_paths)
+
     # DB에서 파일 정보 삭제
     await db.delete(file)
     await db.commit()
\ No newline at end of file
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_async_db
 from sqlalchemy import select, func
@@ -6,39 +7,46 @@ from app.model.folder import Folder
 from app.schemas.folder import FolderUpdate, FolderCreate
 from typing import Optional
 from fastapi import Header
-from app.utilities.jwt import verify_token
-from app.model.user import User
-import asyncio
+from app.utilities.auth import get_user_id
+from app.utilities.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, split_page, encode_cursor
 from concurrent.futures import ThreadPoolExecutor
-from pathlib import Path
 from sqlalchemy import text
 from app.database import AsyncSessionLocal
+from app.services.blob import release_blobs, schedule_purge
+from app.services.folder_tree import build_path, get_parent_path, move_subtree, get_breadcrumb
+from app.services.folder_stats import apply_folder_delta
+from app.services.trash import trash_folders, restore_folders, get_subtree_files
+from app.services.archive import stream_zip
+from app.utilities.file_response import make_content_disposition
 
 router = APIRouter()
 
+# 정렬 가능한 컬럼: sort 파라미터 -> (컬럼, 속성명, datetime 여부)
+FOLDER_SORTS = {
+    "name": (Folder.name, "name", False),
+    "created_at": (Folder.created_at, "created_at", True),
+    "size": (Folder.total_size, "total_size", False),
+}
+
 @router.get("/folders/")
 async def get_folders(
+    response: Response,
     current_folder_id: Optional[int] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     authorization: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_async_db)
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid token format")
-    
-    token = authorization.replace("Bearer ", "")
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    
-    payload_user_email = payload.get("email")
-    query = select(User).where(User.email == payload_user_email)
-    
-    result = await db.execute(query)
-    user = result.scalars().first()
-    user_id = user.id
+    user_id = await get_user_id(authorization, db)
+
+    if sort not in FOLDER_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(FOLDER_SORTS)}")
+    sort_column, sort_attr, is_datetime = FOLDER_SORTS[sort]
 
     # 새로운 폴더 쿼리 생성
-    folder_query = select(Folder).where(Folder.owner_id == user_id).order_by(Folder.created_at.desc())
+    folder_query = select(Folder).where(Folder.owner_id == user_id, Folder.is_deleted == False)
 
     if current_folder_id == 0 or current_folder_id is None:  # 0을 루트 폴더로 사용
         folder_query = folder_query.where(Folder.parent_folder_id.is_(None))
@@ -58,9 +66,13 @@ async def get_folders(
         else:
             parent_folder_id_response = 0
 
+    folder_query = paginate(folder_query, sort_column, Folder.id, sort, order, cursor, limit, is_datetime)
     result = await db.execute(folder_query)
-    folders = result.scalars().all()
+    folders, next_cursor = split_page(result.scalars().all(), limit, sort, order, sort_attr)
 
+    # 다음 페이지 커서는 /files/, /files/trash와 같이 헤더로만 전달
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return {
         "folders": folders,
         "parent_folder_id": parent_folder_id_response
@@ -72,21 +84,10 @@ async def create_folder(
     authorization: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_async_db)
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid token format")
-    
-    token = authorization.replace("Bearer ", "")
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    payload_user_email = payload.get("email")
-    query = select(User).where(User.email == payload_user_email)
-    result = await db.execute(query)
-    user = result.scalars().first()
-    owner_id = user.id
+    owner_id = await get_user_id(authorization, db)
 
     parent_id = None if folder.parent_folder_id == 0 else folder.parent_folder_id
+    parent_path = await get_parent_path(db, parent_id, owner_id)
 
     new_folder = Folder(
         name=folder.name,
@@ -95,10 +96,215 @@ async def create_folder(
         created_at=func.now()
     )
     db.add(new_folder)
+    # id를 받아서 경로 설정 (같은 트랜잭션)
+    await db.flush()
+    new_folder.path = build_path(parent_path, new_folder.id)
+    await apply_folder_delta(db, owner_id, parent_id, 1, 0)
     await db.commit()
     await db.refresh(new_folder)
     return {"message": "Folder created successfully"}
 
+# 폴더 화면 한 번에 필요한 데이터를 쿼리 하나로 조회 (하위 폴더/파일은 이름순 첫 페이지)
+FOLDER_CONTENTS_QUERY = """
+    SELECT json_build_object(
+        'folder', (
+            SELECT json_build_object('id', f.id, 'parent_folder_id', f.parent_folder_id)
+            FROM folders f WHERE f.id = :folder_id AND f.owner_id = :owner_id AND f.is_deleted = false
+        ),
+        'breadcrumb', (
+            SELECT coalesce(json_agg(json_build_object('id', b.id, 'name', b.name) ORDER BY length(b.path)), '[]')
+            FROM folders f
+            JOIN folders b ON b.id = ANY(string_to_array(trim(both '/' from f.path), '/')::int[])
+            WHERE f.id = :folder_id AND f.owner_id = :owner_id
+        ),
+        'folders', (
+            SELECT coalesce(json_agg(sub ORDER BY sub.name, sub.id), '[]') FROM (
+                SELECT id, name, parent_folder_id, owner_id, created_at, file_count, folder_count, total_size
+                FROM folders
+                WHERE owner_id = :owner_id AND {parent_condition} AND is_deleted = false
+                ORDER BY name, id
+                LIMIT :fetch_limit
+            ) sub
+        ),
+        'files', (
+            SELECT coalesce(json_agg(sub ORDER BY sub.name, sub.id), '[]') FROM (
+                SELECT id, name, file_size, content_hash, parent_folder_id, owner_id, created_at
+                FROM files
+                WHERE owner_id = :owner_id AND {parent_condition} AND is_deleted = false
+                ORDER BY name, id
+                LIMIT :fetch_limit
+            ) sub
+        )
+    )
+"""
+
+@router.get("/folders/{folder_id}/contents")
+async def get_folder_contents(
+    folder_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """하위 폴더, 파일, 부모 id, 빵부스러기를 한 번에 반환 (folder_id 0 = 루트)
+
+    다음 페이지는 next_cursor를 /folders/, /files/ 에 sort=name&order=asc 와 함께 넘겨 이어서 조회한다.
+    """
+    user_id = await get_user_id(authorization, db)
+
+    # 루트는 parent_folder_id IS NULL 인덱스를 그대로 타도록 조건을 분리
+    parent_condition = "parent_folder_id IS NULL" if folder_id == 0 else "parent_folder_id = :folder_id"
+    result = await db.execute(
+        text(FOLDER_CONTENTS_QUERY.format(parent_condition=parent_condition)),
+        {"folder_id": folder_id, "owner_id": user_id, "fetch_limit": limit + 1}
+    )
+    contents = result.scalar()
+
+    if folder_id != 0 and contents["folder"] is None:
+        raise HTTPException(status_code=404, detail="Folder not found")
+
+    folders, folders_next_cursor = _split_json_page(contents["folders"], limit)
+    files, files_next_cursor = _split_json_page(contents["files"], limit)
+    return {
+        "folder_id": folder_id,
+        "parent_folder_id": contents["folder"]["parent_folder_id"] if contents["folder"] else None,
+        "breadcrumb": contents["breadcrumb"],
+        "folders": folders,
+        "folders_next_cursor": folders_next_cursor,
+        "files": files,
+        "files_next_cursor": files_next_cursor,
+    }
+
+def _split_json_page(rows: list, limit: int):
+    """limit + 1개 조회 결과를 (페이지, 이름순 다음 커서)로 분리"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor("name", "asc", page[-1]["name"], page[-1]["id"])
+
+@router.get("/folders/{folder_id}/breadcrumb")
+async def get_folder_breadcrumb(
+    folder_id: int,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
+
+    breadcrumb = await get_breadcrumb(db, folder_id, user_id)
+    if not breadcrumb:
+        raise HTTPException(status_code=404, detail="Folder not found")
+    return {"breadcrumb": breadcrumb}
+
+# 하위 트리 조회: 노드 수 상한 (depth를 주지 않으면 이 수까지 전체 트리)
+FOLDER_TREE_DEFAULT_LIMIT = 1000
+FOLDER_TREE_MAX_LIMIT = 10000
+
+# 깊이별로 한 단계씩 내려가는 재귀 쿼리 (자식 조회는 idx_folders_owner_parent 사용)
+# 첫 단계(바로 아래 폴더)는 재귀 전에 (name, id) 순으로 fetch_limit개까지만 고르므로 (idx_folders_list_name을 순서대로 읽음)
+# 첫 단계만으로 limit을 넘으면 잘리는 쪽은 이름순 뒤쪽이고, /folders/?sort=name&order=asc 커서로 이어서 볼 수 있다.
+# 재귀 CTE는 깊이 순서(너비 우선)로 행을 만들고 ORDER BY가 없으므로 LIMIT에 닿으면 더 내려가지 않는다.
+# 폴더 자신(depth 0)은 limit에 세지 않도록 따로 붙인다. (루트면 없음)
+FOLDER_TREE_QUERY = """
+    WITH RECURSIVE first_level AS (
+        SELECT id, name, parent_folder_id, 1 AS depth, file_count, folder_count, total_size
+        FROM folders
+        WHERE owner_id = :owner_id AND {parent_condition} AND is_deleted = false
+        ORDER BY name, id
+        LIMIT :fetch_limit
+    ),
+    tree AS (
+        SELECT id, name, parent_folder_id, depth, file_count, folder_count, total_size
+        FROM first_level
+        UNION ALL
+        SELECT c.id, c.name, c.parent_folder_id, t.depth + 1, c.file_count, c.folder_count, c.total_size
+        FROM tree t
+        JOIN folders c ON c.owner_id = :owner_id AND c.parent_folder_id = t.id AND c.is_deleted = false
+        WHERE t.depth < :max_depth
+    )
+    SELECT id, name, parent_folder_id, 0 AS depth, file_count, folder_count, total_size
+    FROM folders
+    WHERE id = :folder_id AND owner_id = :owner_id AND is_deleted = false
+    UNION ALL
+    (SELECT id, name, parent_folder_id, depth, file_count, folder_count, total_size FROM tree LIMIT :fetch_limit)
+"""
+
+@router.get("/folders/{folder_id}/tree")
+async def get_folder_tree(
+    folder_id: int,
+    depth: Optional[int] = Query(None, ge=1, description="가져올 깊이 (없으면 limit까지 전체)"),
+    limit: int = Query(FOLDER_TREE_DEFAULT_LIMIT, ge=1, le=FOLDER_TREE_MAX_LIMIT),
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """폴더 아래 depth 단계까지의 하위 트리를 쿼리 하나로 반환 (folder_id 0 = 루트)
+
+    folders는 부모가 자식보다 앞에 오는 인접 리스트(깊이, 이름순)이며, 폴더 자신은 depth 0으로 맨 앞에 온다.
+    노드가 limit개를 넘으면 마지막으로 가져온 깊이를 통째로 빼고 truncated=true를 반환한다.
+    (그 깊이의 폴더는 folder_count로 하위 폴더가 있는지 알 수 있으므로 필요할 때 그 폴더부터 다시 조회)
+    바로 아래 폴더만으로 limit을 넘으면 이름순 앞쪽 limit개와, /folders/?current_folder_id=...&sort=name&order=asc에
+    넘겨 나머지를 이어서 볼 next_cursor를 반환한다.
+    """
+    user_id = await get_user_id(authorization, db)
+
+    # 루트는 parent_folder_id IS NULL 인덱스를 그대로 타도록 조건을 분리
+    parent_condition = "parent_folder_id IS NULL" if folder_id == 0 else "parent_folder_id = :folder_id"
+    fetch_limit = limit + 1
+    result = await db.execute(
+        text(FOLDER_TREE_QUERY.format(parent_condition=parent_condition)),
+        {
+            "owner_id": user_id,
+            "folder_id": folder_id,
+            "max_depth": depth if depth is not None else FOLDER_TREE_MAX_LIMIT,
+            "fetch_limit": fetch_limit,
+        }
+    )
+    rows = [dict(row._mapping) for row in result.fetchall()]
+    if folder_id != 0 and not any(row["depth"] == 0 for row in rows):
+        raise HTTPException(status_code=404, detail="Folder not found")
+
+    rows.sort(key=lambda row: (row["depth"], row["name"], row["id"]))
+    truncated = sum(1 for row in rows if row["depth"] > 0) == fetch_limit
+    next_cursor = None
+    if truncated:
+        deepest = rows[-1]["depth"]
+        if deepest > 1:
+            rows = [row for row in rows if row["depth"] < deepest]
+        else:
+            # 바로 아래 폴더만으로 limit을 넘은 경우 - 이름순으로 골랐으므로 앞쪽 limit개를 남기고 이어서 볼 커서를 줌
+            rows = rows[:-1]
+            next_cursor = encode_cursor("name", "asc", rows[-1]["name"], rows[-1]["id"])
+
+    return {
+        "folder_id": folder_id,
+        "depth": max((row["depth"] for row in rows), default=0),
+        "truncated": truncated,
+        "next_cursor": next_cursor,
+        "folders": rows,
+    }
+
+@router.get("/folders/{folder_id}/download")
+async def download_folder(
+    folder_id: int,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """폴더 하위 트리를 ZIP으로 스트리밍 (임시 파일 없이 만들면서 전송)"""
+    user_id = await get_user_id(authorization, db)
+
+    result = await db.execute(
+        select(Folder.name).where(Folder.id == folder_id, Folder.owner_id == user_id, Folder.is_deleted == False)
+    )
+    folder_name = result.scalar()
+    if folder_name is None:
+        raise HTTPException(status_code=404, detail="Folder not found")
+
+    # 전송이 오래 걸릴 수 있으므로 요청 세션의 연결은 바로 반환 (목록은 배치마다 새 세션으로 조회)
+    await db.close()
+    return StreamingResponse(
+        stream_zip(user_id, [folder_id], []),
+        media_type="application/zip",
+        headers={"Content-Disposition": make_content_disposition(f"{folder_name}.zip")},
+    )
+
 @router.patch("/folders/{folder_id}")
 async def update_folder(
     folder_id: int,
@@ -106,36 +312,30 @@ async def update_folder(
     authorization: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_async_db)
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid token format")
-    
-    token = authorization.replace("Bearer ", "")
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    
-    payload_user_email = payload.get("email")
-    query = select(User).where(User.email == payload_user_email)
-    result = await db.execute(query)
-    user = result.scalars().first()
-    user_id = user.id
+    user_id = await get_user_id(authorization, db)
 
-    query = select(Folder).where(Folder.id == folder_id)
+    query = select(Folder).where(Folder.id == folder_id, Folder.is_deleted == False)
     result = await db.execute(query)
     folder = result.scalars().first()
 
-    if folder.owner_id != user_id:
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
     if not folder:
         raise HTTPException(status_code=404, detail="Folder not found")
+
+    if folder.owner_id != user_id:
+        raise HTTPException(status_code=403, detail="Unauthorized")
     
     if update_data.name is not None:
         folder.name = update_data.name
 
     if update_data.parent_folder_id is not None:
-        # parent_folder_id가 0이면 NULL로 변환
-        folder.parent_folder_id = None if update_data.parent_folder_id == 0 else update_data.parent_folder_id
+        # parent_folder_id가 0이면 NULL로 변환, 하위 트리 경로도 함께 갱신
+        new_parent_id = None if update_data.parent_folder_id == 0 else update_data.parent_folder_id
+        old_parent_id = await move_subtree(db, folder, new_parent_id)
+
+        # 예전 부모 쪽 조상에서 빼고 새 부모 쪽 조상에 더함
+        if new_parent_id != old_parent_id:
+            await apply_folder_delta(db, user_id, old_parent_id, -1, -(folder.total_size or 0))
+            await apply_folder_delta(db, user_id, new_parent_id, 1, folder.total_size or 0)
     
     await db.commit()
     return {"message": "Folder updated successfully"}
@@ -146,25 +346,11 @@ async def delete_folder(
     authorization: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_async_db)
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid token format")
-    
-    token = authorization.replace("Bearer ", "")
-
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
     # 사용자 확인
-    payload_user_email = payload.get("email")
-    user_query = select(User).where(User.email == payload_user_email)
-    user_result = await db.execute(user_query)
-    user = user_result.scalars().first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = await get_user_id(authorization, db)
     
     # 폴더 조회
-    folder_query = select(Folder).where(Folder.id == folder_id)
+    folder_query = select(Folder).where(Folder.id == folder_id, Folder.is_deleted == False)
     result = await db.execute(folder_query)
     folder = result.scalars().first()
     
@@ -172,56 +358,78 @@ async def delete_folder(
         raise HTTPException(status_code=404, detail="Folder not found")
     
     # 폴더 소유자 확인
-    if folder.owner_id != user.id:
+    if folder.owner_id != user_id:
         raise HTTPException(status_code=403, detail="Unauthorized")
 
-    # 1. 먼저 파일 경로들 조회
-    file_paths = await get_files_to_delete(db, folder_id)
-    
-    # DB에서 폴더 정보 삭제
-    await db.delete(folder)
+    # 하위 트리 전체를 휴지통으로 (문장 하나), 부모 쪽 집계에서 제외
+    await trash_folders(db, user_id, [(folder.id, folder.path)])
+    await apply_folder_delta(db, user_id, folder.parent_folder_id, -1, -(folder.total_size or 0))
     await db.commit()
 
-    # 3. 백그라운드에서 파일 삭제
-    if file_paths:
-        asyncio.create_task(cleanup_files_background(file_paths))
-    else:
-        print("No files to cleanup")
+    return {"message": "Folder moved to trash"}
 
-    return {"message": "Folder deleted successfully"}
+@router.post("/folders/{folder_id}/restore")
+async def restore_folder(
+    folder_id: int,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
 
-async def get_files_to_delete(db: AsyncSession, folder_id: int):
-    """삭제할 파일 경로들을 조회"""
-    query = text("""
-        WITH RECURSIVE subfolder_tree AS (
-            SELECT id FROM folders WHERE id = :folder_id
-            UNION ALL
-            SELECT f.id FROM folders f
-            INNER JOIN subfolder_tree st ON f.parent_folder_id = st.id
-        )
-        SELECT path_on_disk FROM files 
-        WHERE parent_folder_id IN (SELECT id FROM subfolder_tree)
-    """)
-    
-    result = await db.execute(query, {"folder_id": folder_id})
-    file_paths = [row[0] for row in result.fetchall()]
-    return file_paths
+    # 휴지통 목록에 보이는(직접 휴지통으로 보낸) 폴더만 복원 가능
+    folder_query = select(Folder).where(
+        Folder.id == folder_id,
+        Folder.owner_id == user_id,
+        Folder.is_deleted == True,
+        Folder.trash_root_id == Folder.id
+    )
+    result = await db.execute(folder_query)
+    folder = result.scalars().first()
 
-async def cleanup_files_background(file_paths: list):
-    """백그라운드에서 실제 파일들을 삭제"""
-    print(f"Background cleanup started for {len(file_paths)} files")
-    
-    try:
-        deleted_count = 0
-        for file_path in file_paths:
-            try:
-                Path(file_path).unlink(missing_ok=True)
-                deleted_count += 1
-                print(f"Deleted file: {file_path}")
-            except Exception as e:
-                print(f"Failed to delete {file_path}: {e}")
-        
-        print(f"Background cleanup completed. Deleted {deleted_count}/{len(file_paths)} files")
-        
-    except Exception as e:
-        print(f"Background cleanup failed: {e}")
\ No newline at end of file
+    if not folder:
+        raise HTTPException(status_code=404, detail="Folder not found in trash")
+
+    # 원래 부모가 휴지통에 있으면 루트로 복원
+    if folder.parent_folder_id is not None:
+        parent_query = select(Folder.is_deleted).where(Folder.id == folder.parent_folder_id)
+        if (await db.execute(parent_query)).scalar():
+            await move_subtree(db, folder, None)
+
+    await restore_folders(db, user_id, [folder.id])
+    await apply_folder_delta(db, user_id, folder.parent_folder_id, 1, folder.total_size or 0)
+    await db.commit()
+
+    return {"message": "Folder restored successfully"}
+
+@router.delete("/folders/{folder_id}/permanent")
+async def delete_folder_permanent(
+    folder_id: int,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
+
+    folder_query = select(Folder).where(
+        Folder.id == folder_id,
+        Folder.owner_id == user_id,
+        Folder.is_deleted == True,
+        Folder.trash_root_id == Folder.id
+    )
+    result = await db.execute(folder_query)
+    folder = result.scalars().first()
+
+    if not folder:
+        raise HTTPException(status_code=404, detail="Folder not found in trash")
+
+    # 1. 하위 트리 파일들의 blob 참조 해제
+    files_to_delete = await get_subtree_files(db, user_id, [folder.path])
+    orphan_digests, legacy_paths = await release_blobs(db, files_to_delete)
+
+    # 2. 참조가 0이 된 파일 정리를 같은 트랜잭션에서 작업 큐에 등록 (재시작되어도 유지)
+    await schedule_purge(db, orphan_digests, legacy_paths)
+
+    # 3. DB에서 폴더 삭제 (하위 폴더/파일은 CASCADE, 집계는 휴지통으로 보낼 때 이미 반영됨)
+    await db.delete(folder)
+    await db.commit()
+
+    return {"message": "Folder deleted successfully"}
@@ -0,0 +1,47 @@
+import hmac
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_pool_status
+from app.services.request_profiles import list_request_profiles
+from app.utilities.metrics import export_metrics
+
+# 지정하면 Authorization: Bearer <METRICS_TOKEN> 이 있어야 지표를 볼 수 있음 (없으면 같은 호스트에서만)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+def require_metrics_access(request: Request, authorization: Optional[str] = Header(None)):
+    """지표 접근 확인 (라우트, SQL, 풀 상태가 드러나므로 공개하지 않음)"""
+    if METRICS_TOKEN:
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    elif request.client is None or request.client.host not in METRICS_LOCAL_HOSTS:
+        raise HTTPException(status_code=403, detail="Metrics are only available locally")
+
+router = APIRouter(dependencies=[Depends(require_metrics_access)])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus 텍스트 형식 지표 (METRICS_DIR를 지정하면 모든 워커 프로세스의 합계)"""
+    return PlainTextResponse(await export_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# 현재 워커 프로세스의 값이므로 pid로 구분
+@router.get("/metrics/db-pool")
+async def db_pool_metrics():
+    """DB 연결 풀 상태: 사용 중/유휴 연결, 대기 중인 요청 수, 연결을 꺼낼 때 기다린 시간 분포 (누적 구간)
+
+    요청이 느릴 때 waiting과 wait_seconds가 함께 늘면 풀이 모자란 것이고, 그대로면 Postgres 쪽이 느린 것이다.
+    """
+    return get_pool_status()
+
+@router.get("/metrics/slow-requests")
+async def slow_requests(
+    route: Optional[str] = Query(None, description="라우트 템플릿 (예: /folders/{folder_id})"),
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """샘플링된 요청 중 SQL_PROFILE_SLOW_MS 이상 걸린 요청과 실행한 SQL 목록 (느린 순, SQL_PROFILE_SAMPLE_RATE를 켜야 쌓임)"""
+    return await list_request_profiles(db, route, limit)
@@ -0,0 +1,181 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from typing import Optional
+from fastapi import Header
+import os
+from app.database import get_async_db
+from app.utilities.auth import get_user_id
+from app.utilities.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor
+
+router = APIRouter()
+
+# 트라이그램 인덱스는 3글자부터 효과가 있으므로 부분/유사 검색은 이보다 짧은 검색어를 받지 않음
+SEARCH_MIN_QUERY_LENGTH = int(os.getenv("SEARCH_MIN_QUERY_LENGTH", "3"))
+SEARCH_MAX_QUERY_LENGTH = 255
+
+# 검색 방식: mode -> (조건, 정렬 키, 정렬 방향)
+# - prefix: (owner_id, lower(name) COLLATE "C", id) btree 범위 검색, 이름순이라 인덱스 순서대로 limit개만 읽음
+# - substring: (owner_id, name) 트라이그램 GIN으로 ILIKE '%검색어%', 앞부분 일치 + 유사도순
+# - fuzzy: 트라이그램 GIN으로 단어 유사도(<%) 검색, 오타가 있어도 찾음, 유사도순
+SEARCH_MODES = {
+    "prefix": (
+        """lower(name) COLLATE "C" >= lower(:q) AND lower(name) COLLATE "C" < lower(:q) || chr(1114111)""",
+        'lower(name) COLLATE "C"',
+        "asc",
+    ),
+    "substring": (
+        "name ILIKE :contains_pattern",
+        "(CASE WHEN name ILIKE :prefix_pattern THEN 1 ELSE 0 END + similarity(name, :q))::float8",
+        "desc",
+    ),
+    "fuzzy": (
+        ":q <% name",
+        "word_similarity(:q, name)::float8",
+        "desc",
+    ),
+}
+
+# 검색 대상: 파일 + 폴더 (휴지통 제외), 하위 트리로 좁힐 때는 materialized path로 범위를 잡음
+SEARCH_BRANCHES = {
+    "file": """
+        SELECT * FROM (
+            SELECT 'file' AS type, id, name, file_size, parent_folder_id, created_at, {sort_key} AS sort_key
+            FROM files
+            WHERE owner_id = :owner_id AND is_deleted = false AND {condition}
+              {subtree_condition}
+        ) matched
+        WHERE true {cursor_condition}
+        ORDER BY sort_key {order}, id {order}
+        LIMIT :fetch_limit
+    """,
+    "folder": """
+        SELECT * FROM (
+            SELECT 'folder' AS type, id, name, total_size AS file_size, parent_folder_id, created_at, {sort_key} AS sort_key
+            FROM folders
+            WHERE owner_id = :owner_id AND is_deleted = false AND {condition}
+              {subtree_condition}
+        ) matched
+        WHERE true {cursor_condition}
+        ORDER BY sort_key {order}, id {order}
+        LIMIT :fetch_limit
+    """,
+}
+
+SUBTREE_CONDITIONS = {
+    "file": """AND parent_folder_id IN (
+                  SELECT id FROM folders WHERE owner_id = :owner_id AND path LIKE :subtree_pattern AND is_deleted = false
+              )""",
+    "folder": "AND path LIKE :subtree_pattern AND id <> :folder_id",
+}
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _cursor_condition(branch_type: str, cursor_type: Optional[str], order: str) -> str:
+    """(정렬 키, type, id) keyset 조건을 갈래별로 풀어서 각 갈래가 limit + 1개만 읽게 함"""
+    if cursor_type is None:
+        return ""
+    op = ">" if order == "asc" else "<"
+    # 같은 정렬 키 안에서 type 순서상 커서보다 뒤에 오는 갈래는 같은 키도 포함
+    comes_after = branch_type > cursor_type if order == "asc" else branch_type < cursor_type
+    if branch_type == cursor_type:
+        return f"AND (sort_key, id) {op} (:cursor_key, :cursor_id)"
+    if comes_after:
+        return f"AND sort_key {op}= :cursor_key"
+    return f"AND sort_key {op} :cursor_key"
+
+@router.get("/search")
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=SEARCH_MAX_QUERY_LENGTH),
+    mode: str = "substring",
+    type: str = "all",
+    folder_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """파일/폴더 이름 검색 (X-Next-Cursor 헤더로 다음 페이지)
+
+    mode: prefix(이름순) / substring / fuzzy(관련도순), type: all / file / folder
+    folder_id를 주면 그 폴더의 하위 트리에서만 찾는다.
+    """
+    user_id = await get_user_id(authorization, db)
+
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(SEARCH_MODES)}")
+    if type != "all" and type not in SEARCH_BRANCHES:
+        raise HTTPException(status_code=400, detail="type must be all, file or folder")
+    if mode != "prefix" and len(q) < SEARCH_MIN_QUERY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"q must be at least {SEARCH_MIN_QUERY_LENGTH} characters for {mode} search (use mode=prefix for shorter queries)"
+        )
+    condition, sort_key, order = SEARCH_MODES[mode]
+
+    params = {
+        "owner_id": user_id,
+        "q": q,
+        "contains_pattern": f"%{_escape_like(q)}%",
+        "prefix_pattern": f"{_escape_like(q)}%",
+        "fetch_limit": limit + 1,
+    }
+
+    subtree = folder_id is not None and folder_id != 0  # 0을 루트 폴더로 사용
+    if subtree:
+        result = await db.execute(
+            text("SELECT path FROM folders WHERE id = :folder_id AND owner_id = :owner_id AND is_deleted = false"),
+            {"folder_id": folder_id, "owner_id": user_id}
+        )
+        folder_path = result.scalar()
+        if folder_path is None:
+            raise HTTPException(status_code=404, detail="Folder not found")
+        params["folder_id"] = folder_id
+        params["subtree_pattern"] = _escape_like(folder_path) + "%"
+
+    cursor_type = None
+    if cursor:
+        value, row_id = decode_cursor(cursor, mode, order)
+        try:
+            cursor_key, cursor_type = value
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if cursor_type not in SEARCH_BRANCHES or not isinstance(cursor_key, (str if mode == "prefix" else (int, float))):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        params["cursor_key"] = cursor_key
+        params["cursor_id"] = row_id
+
+    branch_types = list(SEARCH_BRANCHES) if type == "all" else [type]
+    branches = [
+        "(" + SEARCH_BRANCHES[branch_type].format(
+            condition=condition,
+            sort_key=sort_key,
+            subtree_condition=SUBTREE_CONDITIONS[branch_type] if subtree else "",
+            cursor_condition=_cursor_condition(branch_type, cursor_type, order),
+            order=order,
+        ) + ")"
+        for branch_type in branch_types
+    ]
+
+    result = await db.execute(
+        text(f"""
+            SELECT * FROM ({" UNION ALL ".join(branches)}) found
+            ORDER BY sort_key {order}, type {order}, id {order}
+            LIMIT :fetch_limit
+        """),
+        params
+    )
+    rows = [dict(row._mapping) for row in result.fetchall()]
+
+    items = rows[:limit]
+    if len(rows) > limit:
+        last = items[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(mode, order, [last["sort_key"], last["type"]], last["id"])
+
+    for item in items:
+        score = item.pop("sort_key")
+        if mode != "prefix":
+            item["score"] = score
+    return items
@@ -0,0 +1,268 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from sqlalchemy import select
+from app.model.file import File
+from app.model.upload_session import UploadSession
+from app.schemas.upload import UploadSessionCreate
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import Header
+from app.utilities.auth import get_user_id
+from app.services.blob import new_temp_path, acquire_blob
+from app.services.compression import choose_codec
+from app.services.thumbnail import schedule_thumbnails
+from app.services.folder_stats import apply_file_delta
+from app.services.folder_tree import get_parent_path
+from app.services.disk import AsyncFileWriter, run_io, unlink
+from app.services.upload import (
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_MIN_CHUNK_SIZE,
+    UPLOAD_MAX_CHUNK_SIZE,
+    UPLOAD_MAX_FILE_SIZE,
+    UPLOAD_SESSION_TTL_HOURS,
+    get_chunk_count,
+    get_expected_chunk_size,
+    get_chunk_temp_path,
+    commit_chunk,
+    list_received_chunks,
+    assemble_chunks,
+    remove_session_dir,
+)
+import uuid
+
+router = APIRouter()
+
+async def get_upload_session(db: AsyncSession, upload_id: str, user_id: int, for_update: bool = False) -> UploadSession:
+    """업로드 세션 조회 (소유자/만료 확인 포함)
+
+    for_update면 세션 행에 락을 잡는다. 같은 세션의 complete가 동시에 들어오면 나중 요청은
+    앞 요청이 끝날 때까지 기다렸다가 이미 지워진 세션을 보고 404를 받는다.
+    """
+    query = select(UploadSession).where(
+        UploadSession.id == upload_id,
+        UploadSession.owner_id == user_id
+    )
+    if for_update:
+        query = query.with_for_update()
+    result = await db.execute(query)
+    session = result.scalars().first()
+
+    if not session or session.expires_at < datetime.now():
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+# 업로드 세션 생성
+@router.post("/uploads/")
+async def create_upload_session(
+    upload: UploadSessionCreate,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
+
+    if not upload.name:
+        raise HTTPException(status_code=400, detail="Filename is required")
+
+    if upload.total_size < 0:
+        raise HTTPException(status_code=400, detail="Invalid file size")
+
+    if upload.total_size > UPLOAD_MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size: {UPLOAD_MAX_FILE_SIZE / (1024 ** 3):.0f}GB"
+        )
+
+    chunk_size = upload.chunk_size or UPLOAD_CHUNK_SIZE
+    if not UPLOAD_MIN_CHUNK_SIZE <= chunk_size <= UPLOAD_MAX_CHUNK_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"chunk_size must be between {UPLOAD_MIN_CHUNK_SIZE} and {UPLOAD_MAX_CHUNK_SIZE}"
+        )
+
+    # 부모 폴더 검증 (없거나 남의 폴더거나 휴지통이면 404)
+    parent_folder_id = None if upload.parent_folder_id == 0 else upload.parent_folder_id
+    await get_parent_path(db, parent_folder_id, user_id)
+
+    now = datetime.now()
+    new_session = UploadSession(
+        id=uuid.uuid4().hex,
+        name=upload.name,
+        total_size=upload.total_size,
+        chunk_size=chunk_size,
+        parent_folder_id=parent_folder_id,
+        owner_id=user_id,
+        created_at=now,
+        expires_at=now + timedelta(hours=UPLOAD_SESSION_TTL_HOURS)
+    )
+    db.add(new_session)
+    await db.commit()
+
+    return {
+        "upload_id": new_session.id,
+        "chunk_size": new_session.chunk_size,
+        "chunk_count": get_chunk_count(new_session.total_size, new_session.chunk_size),
+        "expires_at": new_session.expires_at.isoformat()
+    }
+
+# 청크 업로드 (순서 무관, 병렬 가능, 같은 청크 재전송 시 덮어쓰기)
+@router.put("/uploads/{upload_id}/chunks/{index}")
+async def upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
+    session = await get_upload_session(db, upload_id, user_id)
+
+    chunk_count = get_chunk_count(session.total_size, session.chunk_size)
+    if index < 0 or index >= chunk_count:
+        raise HTTPException(status_code=400, detail=f"Chunk index must be between 0 and {chunk_count - 1}")
+
+    expected_size = get_expected_chunk_size(session.total_size, session.chunk_size, index)
+
+    # Content-Length가 있으면 본문을 읽기 전에 먼저 거절
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        try:
+            declared_size = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+        if declared_size != expected_size:
+            raise HTTPException(status_code=400, detail=f"Chunk {index} must be {expected_size} bytes")
+
+    # 본문을 메모리에 모으지 않고 임시 청크 파일로 바로 스트리밍 (쓰기는 디스크 전용 스레드풀)
+    tmp_path = get_chunk_temp_path(upload_id, index)
+    received = 0
+    async with AsyncFileWriter(tmp_path) as writer:
+        async for piece in request.stream():
+            received += len(piece)
+            if received > expected_size:
+                raise HTTPException(status_code=400, detail=f"Chunk {index} must be {expected_size} bytes")
+            await writer.write(piece)
+
+    if received != expected_size:
+        await unlink(tmp_path)
+        raise HTTPException(status_code=400, detail=f"Chunk {index} must be {expected_size} bytes")
+
+    await run_io(commit_chunk, tmp_path, upload_id, index)
+
+    return {"index": index, "size": expected_size}
+
+# 업로드 상태 조회 (이미 저장된 청크/오프셋)
+@router.get("/uploads/{upload_id}")
+async def get_upload_status(
+    upload_id: str,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
+    session = await get_upload_session(db, upload_id, user_id)
+
+    received = await run_io(list_received_chunks, upload_id)
+
+    chunk_count = get_chunk_count(session.total_size, session.chunk_size)
+    received_set = set(received)
+
+    return {
+        "upload_id": session.id,
+        "name": session.name,
+        "total_size": session.total_size,
+        "chunk_size": session.chunk_size,
+        "chunk_count": chunk_count,
+        "received_chunks": received,
+        "received_offsets": [index * session.chunk_size for index in received],
+        "missing_chunks": [index for index in range(chunk_count) if index not in received_set],
+        "expires_at": session.expires_at.isoformat()
+    }
+
+# 업로드 완료 (청크 조립 후 파일 등록)
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload(
+    upload_id: str,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
+    session = await get_upload_session(db, upload_id, user_id, for_update=True)
+
+    # 세션을 만든 뒤 부모 폴더가 휴지통으로 갔을 수 있으므로 다시 확인
+    await get_parent_path(db, session.parent_folder_id, user_id)
+
+    chunk_count = get_chunk_count(session.total_size, session.chunk_size)
+    received = await run_io(list_received_chunks, upload_id)
+    missing = sorted(set(range(chunk_count)) - set(received))
+    if missing:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Upload is incomplete", "missing_chunks": missing}
+        )
+
+    file_path = new_temp_path()
+    try:
+        file_size, content_hash = await run_io(assemble_chunks, upload_id, chunk_count, file_path)
+        if file_size != session.total_size:
+            raise HTTPException(status_code=409, detail="Assembled size does not match total_size")
+
+        # 같은 내용의 blob이 있으면 재사용 (참조 카운트 증가), 없으면 잘 줄어드는 형식은 압축해서 저장
+        codec = await choose_codec(session.name, file_path, file_size)
+        path_on_disk, storage_codec = await acquire_blob(db, content_hash, file_size, file_path, codec)
+
+        new_file = File(
+            name=session.name,
+            path_on_disk=path_on_disk,
+            content_hash=content_hash,
+            storage_codec=storage_codec,
+            file_size=file_size,
+            parent_folder_id=session.parent_folder_id,
+            owner_id=session.owner_id,
+            created_at=datetime.now()
+        )
+        db.add(new_file)
+        await apply_file_delta(db, session.owner_id, session.parent_folder_id, 1, file_size)
+        await schedule_thumbnails(db, content_hash, path_on_disk, session.name, file_size)
+        await db.delete(session)
+        await db.commit()
+        await db.refresh(new_file)
+
+    except Exception as e:
+        await db.rollback()
+        # 조립된 파일 정리 (청크는 재시도를 위해 남겨둠)
+        await unlink(file_path)
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Failed to complete upload: {str(e)}")
+
+    await run_io(remove_session_dir, upload_id)
+
+    return {
+        "message": "File uploaded successfully",
+        "file": {
+            "id": new_file.id,
+            "name": new_file.name,
+            "file_size": new_file.file_size,
+            "path_on_disk": new_file.path_on_disk,
+            "parent_folder_id": new_file.parent_folder_id,
+            "owner_id": new_file.owner_id,
+            "created_at": new_file.created_at.isoformat() if new_file.created_at else None
+        }
+    }
+
+# 업로드 취소
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(
+    upload_id: str,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await get_user_id(authorization, db)
+    session = await get_upload_session(db, upload_id, user_id)
+
+    await db.delete(session)
+    await db.commit()
+
+    await run_io(remove_session_dir, upload_id)
+
+    return {"message": "Upload aborted"}
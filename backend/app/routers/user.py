@@ -4,9 +4,6 @@ from app.database import get_async_db
 from sqlalchemy import select
 from app.model.user import User
 from app.schemas.user import UserCreate, UserUpdate, LoginData, RefreshTokenData
-import os
-import asyncio
-from pathlib import Path
 from app.utilities.jwt import create_access_token, create_refresh_token, verify_access_token, verify_refresh_token, verify_token
 import bcrypt
 
@@ -36,19 +33,7 @@ async def create_user(
         await db.commit()
         await db.refresh(new_user)  # 생성된 사용자 ID 가져오기
 
-        # 현재 작업 디렉토리 기준 상대 경로 사용
-        base_path = Path("data/files")
-        user_folder_path = base_path / str(new_user.id)
-        
-        # 비동기적으로 폴더 생성
-        def create_user_folder():
-            os.makedirs(user_folder_path, exist_ok=True)
-            print(f"User folder created: {user_folder_path}")
-        
-        # 별도 스레드에서 폴더 생성 (파일 시스템 작업은 블로킹이므로)
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, create_user_folder)
-        
+        # 파일 내용은 저장소 드라이버에 내용 해시 기준으로 저장되므로 사용자별 디렉토리는 만들지 않음
         return {
             "message": "User created successfully",
             "user": {
@@ -57,8 +42,7 @@ async def create_user(
                 "name": new_user.name,
                 "password": new_user.password,
                 "created_at": new_user.created_at.isoformat() if new_user.created_at else None
-            },
-            "folder_path": user_folder_path
+            }
         }
     
     except Exception as e:
@@ -108,11 +92,12 @@ async def login(
     ):
         raise HTTPException(status_code=401, detail="Invalid password")
 
+    # user_id는 바뀌지 않으므로 토큰에 포함해 인증 시 DB 조회를 생략
     access_token = create_access_token(
-        data={"email": user.email, "name": user.name}
+        data={"user_id": user.id, "email": user.email, "name": user.name}
     )
     refresh_token = create_refresh_token(
-        data={"email": user.email, "name": user.name}
+        data={"user_id": user.id, "email": user.email, "name": user.name}
     )
 
     return {
@@ -136,18 +121,22 @@ async def refresh_access_token(
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
     
-    # 사용자 정보 확인
-    user_email = payload.get("email")
-    result = await db.execute(
-        select(User).where(User.email == user_email)
-    )
-    user = result.scalar_one_or_none()
+    # 사용자 정보 확인 (user_id가 없는 예전 토큰은 이메일로 조회)
+    user_id = payload.get("user_id")
+    if user_id is not None:
+        user = await db.get(User, user_id)
+    else:
+        user_email = payload.get("email")
+        result = await db.execute(
+            select(User).where(User.email == user_email)
+        )
+        user = result.scalar_one_or_none()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # 새로운 Access Token 생성
-    token_data = {"email": user.email, "name": user.name}
+    token_data = {"user_id": user.id, "email": user.email, "name": user.name}
     new_access_token = create_access_token(data=token_data)
     
     return {
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import List
+
+class BulkItems(BaseModel):
+    file_ids: List[int] = []
+    folder_ids: List[int] = []
+
+class BulkMove(BulkItems):
+    target_folder_id: int = 0  # 0 = 루트
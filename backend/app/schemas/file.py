@@ -13,9 +13,17 @@ class FileUpdate(BaseModel):
     name: Optional[str] = None
     parent_folder_id: Optional[int] = None
 
+class FileInstantUpload(BaseModel):
+    name: str
+    sha256: str
+    file_size: int
+    parent_folder_id: Optional[int] = None
+
 class FileResponse(FileBase):
     id: int
     path_on_disk: str
+    content_hash: Optional[str] = None
+    storage_codec: Optional[str] = None
     owner_id: int
     created_at: datetime
     
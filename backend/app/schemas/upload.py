@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class UploadSessionCreate(BaseModel):
+    name: str
+    total_size: int
+    parent_folder_id: Optional[int] = None
+    chunk_size: Optional[int] = None
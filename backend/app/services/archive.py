@@ -0,0 +1,183 @@
+import os
+import zipfile
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import text
+from app.database import AsyncSessionLocal
+from app.services.disk import run_io
+from app.services.storage import resolve_storage
+from app.services.compression import open_decoded
+
+# 폴더/여러 항목 ZIP 다운로드
+# 임시 파일 없이 zipfile을 탐색 불가능한(seek 없는) 출력에 쓰게 해서 만든 바이트를 바로 응답으로 흘려보낸다.
+# - 항목 크기를 알 수 없으므로 zipfile이 data descriptor를 붙이고, 4GB를 넘으면 ZIP64 헤더를 쓴다.
+# - 파일 목록은 배치 단위로 조회하고 (한 배치마다 짧은 세션), 파일 본문은 저장소에서 청크 단위로 읽어 압축하므로
+#   메모리는 아카이브 크기와 무관하다. (ZIP 형식상 central directory 항목만 파일 수에 비례)
+ZIP_LISTING_BATCH_SIZE = int(os.getenv("ZIP_LISTING_BATCH_SIZE", "500"))
+
+# 이미 압축된 형식은 deflate해도 줄지 않으므로 그대로 저장
+ZIP_STORED_EXTENSIONS = {
+    "jpg", "jpeg", "png", "gif", "webp", "heic", "avif",
+    "mp4", "mov", "mkv", "avi", "webm", "m4v",
+    "mp3", "aac", "m4a", "ogg", "opus", "flac",
+    "zip", "gz", "tgz", "bz2", "xz", "zst", "7z", "rar",
+    "docx", "xlsx", "pptx", "hwpx", "pdf",
+}
+
+class _ZipSink:
+    """zipfile이 쓰는 출력 - tell/seek가 없어 zipfile이 스트리밍 모드로 동작함"""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+def _zip_date(value: Optional[datetime]) -> tuple:
+    if value is None or value.year < 1980:
+        return (1980, 1, 1, 0, 0, 0)
+    return value.timetuple()[:6]
+
+def _unique_name(name: str, used: set) -> str:
+    """같은 폴더에 이름이 겹치면 "이름 (1).확장자" 형태로 바꿈"""
+    candidate = name
+    stem, dot, ext = name.rpartition(".")
+    if not stem:
+        stem, dot, ext = name, "", ""
+    count = 1
+    while candidate in used:
+        candidate = f"{stem} ({count}){dot}{ext}"
+        count += 1
+    used.add(candidate)
+    return candidate
+
+def _compress_type(name: str) -> int:
+    ext = name.rpartition(".")[2].lower()
+    return zipfile.ZIP_STORED if ext in ZIP_STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+async def _write_file(zf: zipfile.ZipFile, sink: _ZipSink, arcname: str, path_on_disk: str, codec, file_size: int, created_at):
+    storage, key = resolve_storage(path_on_disk)
+    try:
+        stat_result = await storage.stat(key)
+    except FileNotFoundError:
+        print(f"Skipping missing file in archive: {path_on_disk}")
+        return
+
+    info = zipfile.ZipInfo(arcname, date_time=_zip_date(created_at))
+    info.compress_type = _compress_type(arcname)
+    info.external_attr = 0o644 << 16
+    # 크기를 미리 알려 주면 zipfile이 ZIP64 헤더가 필요한지 판단함 (압축 저장된 파일은 원본 크기)
+    info.file_size = file_size if codec else stat_result.st_size
+    with zf.open(info, "w") as dest:
+        async for chunk in open_decoded(storage, key, codec):
+            # 압축은 CPU를 쓰므로 스레드에서
+            await run_io(dest.write, chunk)
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+def _write_dir(zf: zipfile.ZipFile, arcname: str, created_at):
+    info = zipfile.ZipInfo(arcname + "/", date_time=_zip_date(created_at))
+    info.external_attr = (0o40755 << 16) | 0x10
+    zf.writestr(info, b"")
+
+async def _load_folders(owner_id: int, root_ids: list) -> list:
+    """선택한 폴더들의 하위 트리 (부모가 자식보다 먼저 오도록 경로 순)"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            text("""
+                SELECT f.id, f.parent_folder_id, f.name, f.created_at
+                FROM folders r
+                JOIN folders f ON f.owner_id = r.owner_id AND f.path LIKE r.path || '%' AND f.is_deleted = false
+                WHERE r.id = ANY(:root_ids) AND r.owner_id = :owner_id AND r.is_deleted = false
+                ORDER BY f.path COLLATE "C"
+            """),
+            {"root_ids": root_ids, "owner_id": owner_id}
+        )
+        return result.fetchall()
+
+async def _iter_file_batches(owner_id: int, root_ids: list, file_ids: list):
+    """하위 트리의 파일 + 따로 선택한 파일을 (부모 폴더, 이름, id) keyset으로 배치 조회"""
+    last_parent, last_name, last_id = -1, "", 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                text("""
+                    SELECT fi.id, coalesce(fi.parent_folder_id, 0) AS parent_key, fi.name, fi.path_on_disk,
+                           fi.storage_codec, fi.file_size, fi.created_at
+                    FROM files fi
+                    WHERE fi.owner_id = :owner_id AND fi.is_deleted = false
+                      AND (
+                        fi.id = ANY(:file_ids)
+                        OR fi.parent_folder_id IN (
+                            SELECT f.id FROM folders r
+                            JOIN folders f ON f.owner_id = r.owner_id AND f.path LIKE r.path || '%' AND f.is_deleted = false
+                            WHERE r.id = ANY(:root_ids) AND r.owner_id = :owner_id AND r.is_deleted = false
+                        )
+                      )
+                      AND (coalesce(fi.parent_folder_id, 0), fi.name, fi.id) > (:last_parent, :last_name, :last_id)
+                    ORDER BY coalesce(fi.parent_folder_id, 0), fi.name, fi.id
+                    LIMIT :batch_size
+                """),
+                {
+                    "owner_id": owner_id,
+                    "file_ids": file_ids,
+                    "root_ids": root_ids,
+                    "last_parent": last_parent,
+                    "last_name": last_name,
+                    "last_id": last_id,
+                    "batch_size": ZIP_LISTING_BATCH_SIZE,
+                }
+            )
+            rows = result.fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id, last_parent, last_name = rows[-1][0], rows[-1][1], rows[-1][2]
+
+async def stream_zip(owner_id: int, root_folder_ids: list, file_ids: list):
+    """선택한 폴더(하위 트리째, 최상위 디렉터리로)와 파일(최상위로)을 ZIP으로 만들며 바이트를 내보냄
+
+    file_ids는 root_folder_ids 하위에 있지 않은 파일이어야 한다. (호출자가 중첩 선택을 걸러냄)
+    """
+    sink = _ZipSink()
+    zf = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+
+    # 폴더 id -> 아카이브 안 경로, 폴더별로 이미 쓴 이름
+    arc_paths = {}
+    used_names = {None: set()}
+    if root_folder_ids:
+        for folder_id, parent_id, name, created_at in await _load_folders(owner_id, root_folder_ids):
+            parent_key = parent_id if parent_id in arc_paths else None
+            name = _unique_name(name, used_names[parent_key])
+            arc_paths[folder_id] = f"{arc_paths[parent_key]}/{name}" if parent_key else name
+            used_names[folder_id] = set()
+            _write_dir(zf, arc_paths[folder_id], created_at)
+            yield sink.drain()
+
+    # 파일은 폴더별로 모여서 오므로 현재 폴더의 이름 집합만 유지
+    current_parent, current_used = None, None
+    async for rows in _iter_file_batches(owner_id, root_folder_ids, file_ids):
+        for file_id, parent_key, name, path_on_disk, codec, file_size, created_at in rows:
+            parent_id = parent_key if parent_key in arc_paths else None
+            if current_used is None or parent_id != current_parent:
+                # 최상위는 여러 폴더에서 따로 선택한 파일이 섞여 오므로 끝까지 유지
+                current_parent = parent_id
+                current_used = used_names[None] if parent_id is None else used_names.pop(parent_id, set())
+            name = _unique_name(name, current_used)
+            arcname = f"{arc_paths[parent_id]}/{name}" if parent_id else name
+            async for data in _write_file(zf, sink, arcname, path_on_disk, codec, file_size, created_at):
+                yield data
+
+    zf.close()
+    yield sink.drain()
@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app.services.disk import run_io, unlink
+from app.services.storage import get_storage, resolve_storage, delete_stored
+from app.services.compression import CODEC_SUFFIXES, compress_file
+from app.services.jobs import enqueue_job, job_handler
+from app.services.thumbnail import remove_thumbnails
+
+# 내용 주소 기반 저장소 (저장소 드라이버의 blobs/ab/cd/abcd... 키)
+# 업로드 중인 임시 파일은 드라이버와 관계없이 로컬에 둠
+TMP_ROOT = Path("data/tmp")
+
+# 참조가 0이 된 blob을 동시에 정리하는 개수 (blob마다 DB 연결을 하나씩 사용)
+PURGE_CONCURRENCY = int(os.getenv("PURGE_CONCURRENCY", "4"))
+# 정리 작업 하나에 담는 blob/파일 수
+PURGE_JOB = "purge_storage"
+PURGE_JOB_BATCH_SIZE = int(os.getenv("PURGE_JOB_BATCH_SIZE", "1000"))
+# 새로 올린 blob이 요청 트랜잭션과 함께 등록되었는지 확인하는 작업 (롤백되면 저장소에 남은 사본을 지움)
+UPLOAD_CHECK_JOB = "check_uploaded_blob"
+UPLOAD_CHECK_DELAY_SECONDS = int(os.getenv("UPLOAD_CHECK_DELAY_SECONDS", "3600"))
+
+def get_blob_key(digest: str, codec: Optional[str] = None) -> str:
+    return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}{CODEC_SUFFIXES.get(codec, '')}"
+
+def new_temp_path() -> Path:
+    # 디렉토리는 파일을 여는 쪽(디스크 스레드)에서 생성
+    return TMP_ROOT / f"{uuid.uuid4().hex}.tmp"
+
+def new_hasher():
+    return hashlib.sha256()
+
+async def _lock_blob(db: AsyncSession, digest: str):
+    # 같은 해시에 대한 참조 추가/삭제를 직렬화 (트랜잭션 종료 시 자동 해제)
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtextextended(:digest, 0))"),
+        {"digest": digest}
+    )
+
+async def find_blob(db: AsyncSession, digest: str, size: int) -> bool:
+    """해시와 크기가 일치하는 blob이 이미 저장되어 있는지 확인"""
+    blob = await _get_blob(db, digest, size)
+    return blob is not None and await _blob_exists(blob[0])
+
+async def _get_blob(db: AsyncSession, digest: str, size: Optional[int] = None) -> Optional[tuple]:
+    """(저장소 키, codec) 또는 None"""
+    result = await db.execute(
+        text("SELECT path_on_disk, storage_codec FROM blobs WHERE hash = :digest AND (CAST(:size AS bigint) IS NULL OR size = :size)"),
+        {"digest": digest, "size": size}
+    )
+    return result.first()
+
+async def _blob_exists(stored_key: str) -> bool:
+    storage, key = resolve_storage(stored_key)
+    return await storage.exists(key)
+
+async def _prepare_upload(tmp_path: Path, codec: Optional[str]) -> tuple:
+    """저장소에 올릴 파일의 (경로, 저장 크기) - codec이 있으면 압축한 새 임시 파일 (tmp_path는 그대로 둠)"""
+    if codec is None:
+        return tmp_path, (await run_io(os.stat, tmp_path)).st_size
+    return await compress_file(tmp_path, codec)
+
+async def acquire_blob(db: AsyncSession, digest: str, size: int, tmp_path: Path = None, codec: Optional[str] = None) -> tuple:
+    """blob 참조 카운트를 1 올리고 (저장소 키("드라이버:키"), codec)을 반환 (commit은 호출자가 수행)
+
+    저장소에 blob이 없으면 tmp_path를 올리고 (codec이 있으면 압축해서), tmp_path는 끝나면 항상 삭제한다.
+    같은 내용의 blob이 이미 있으면 그 blob의 codec을 따른다.
+    원격 저장소 업로드는 오래 걸릴 수 있으므로 락을 잡기 전에 올린다 (같은 내용은 같은 키라 동시에 올려도 안전).
+    락을 잡기 전에 확인하거나 올린 blob은 그 사이 정리 작업이 지웠을 수 있으므로, tmp_path를 남겨 두었다가
+    락을 잡은 뒤 저장소에 없으면 락 안에서 다시 올린다.
+    tmp_path 없이 호출했는데 blob이 저장소에 없으면 FileNotFoundError.
+    """
+    storage = get_storage()
+    upload_path = None  # 저장소에 올릴 파일 (codec이 있으면 압축한 임시 파일)
+    stored_size = None
+    uploaded = False
+    try:
+        if tmp_path is not None:
+            existing = await _get_blob(db, digest)
+            if existing:
+                codec = existing[1]
+            if not (existing and await _blob_exists(existing[0])):
+                key = get_blob_key(digest, codec)
+                await _schedule_upload_check(digest, storage.qualify(key))
+                upload_path, stored_size = await _prepare_upload(tmp_path, codec)
+                # 로컬 저장소는 이름만 바꾸면 되므로 락 안에서 올림
+                if storage.local_path(key) is None:
+                    await storage.copy_file(key, upload_path)
+                    uploaded = True
+
+        await _lock_blob(db, digest)
+
+        key = get_blob_key(digest, codec)
+        result = await db.execute(
+            text("""
+                INSERT INTO blobs (hash, path_on_disk, size, storage_codec, stored_size, ref_count, created_at)
+                VALUES (:digest, :path_on_disk, :size, :codec, :stored_size, 1, now())
+                ON CONFLICT (hash) DO UPDATE SET ref_count = blobs.ref_count + 1
+                RETURNING path_on_disk, storage_codec
+            """),
+            {
+                "digest": digest,
+                "path_on_disk": storage.qualify(key),
+                "size": size,
+                "codec": codec,
+                "stored_size": stored_size,
+            }
+        )
+        stored_key, stored_codec = result.first()
+
+        if stored_key != storage.qualify(key):
+            if uploaded:
+                # 그 사이 다른 키(다른 codec)로 먼저 등록된 경우 - 방금 올린 사본은 쓰이지 않으므로 삭제
+                await storage.delete(key)
+        elif tmp_path is not None and ((upload_path is not None and not uploaded) or not await storage.exists(key)):
+            if upload_path is None:
+                # 있던 blob이 락을 잡기 전에 정리된 경우 - 같은 키로 다시 올림
+                await _schedule_upload_check(digest, stored_key)
+                upload_path, stored_size = await _prepare_upload(tmp_path, codec)
+                await db.execute(
+                    text("UPDATE blobs SET stored_size = :stored_size WHERE hash = :digest"),
+                    {"digest": digest, "stored_size": stored_size}
+                )
+            await storage.put_file(key, upload_path)
+
+        if not await _blob_exists(stored_key):
+            raise FileNotFoundError(f"Blob {digest} is missing from storage")
+        return stored_key, stored_codec
+    finally:
+        # 남은 임시 파일 정리 (put_file이 이미 옮겼거나 지웠으면 아무 일도 없음)
+        for path in (tmp_path, upload_path):
+            if path is not None:
+                await unlink(path)
+
+async def _schedule_upload_check(digest: str, stored_key: str):
+    """올리기 전에 확인 작업을 별도 트랜잭션으로 등록 (요청 트랜잭션이 롤백되거나 업로드 도중 멈춰도 남도록)"""
+    async with AsyncSessionLocal() as db:
+        await enqueue_job(
+            db,
+            UPLOAD_CHECK_JOB,
+            {"digest": digest, "stored_key": stored_key},
+            delay_seconds=UPLOAD_CHECK_DELAY_SECONDS,
+        )
+        await db.commit()
+
+@job_handler(UPLOAD_CHECK_JOB)
+async def _check_uploaded_blob_job(payload: dict):
+    # 같은 해시의 락을 잡으므로 올린 요청의 트랜잭션이 아직 열려 있으면 끝날 때까지 기다린 뒤 확인
+    digest, stored_key = payload["digest"], payload["stored_key"]
+    async with AsyncSessionLocal() as db:
+        await _lock_blob(db, digest)
+        result = await db.execute(
+            text("SELECT 1 FROM blobs WHERE hash = :digest AND path_on_disk = :stored_key"),
+            {"digest": digest, "stored_key": stored_key}
+        )
+        if result.first() is None:
+            # 커밋되지 않은 업로드 (또는 다른 키로 등록된 경우) - 어떤 행도 가리키지 않는 사본 삭제
+            await delete_stored(stored_key)
+        await db.commit()
+
+async def release_blobs(db: AsyncSession, files) -> tuple:
+    """파일들이 참조하던 blob 참조 카운트를 감소 (commit은 호출자가 수행)
+
+    files: (content_hash, path_on_disk) 목록
+    반환값: (참조가 0이 된 해시 목록, 해시가 없는 예전 방식 파일 경로 목록)
+    커밋 후 purge_storage()로 실제 파일을 정리해야 한다.
+    """
+    counts = {}
+    legacy_paths = []
+    for content_hash, path_on_disk in files:
+        if content_hash:
+            counts[content_hash] = counts.get(content_hash, 0) + 1
+        elif path_on_disk:
+            legacy_paths.append(path_on_disk)
+
+    orphan_digests = []
+    if counts:
+        digests = sorted(counts)
+        result = await db.execute(
+            text("""
+                UPDATE blobs SET ref_count = blobs.ref_count - d.cnt
+                FROM (SELECT unnest(CAST(:digests AS text[])) AS hash,
+                             unnest(CAST(:counts AS int[])) AS cnt) d
+                WHERE blobs.hash = d.hash
+                RETURNING blobs.hash, blobs.ref_count
+            """),
+            {"digests": digests, "counts": [counts[d] for d in digests]}
+        )
+        orphan_digests = [row[0] for row in result.fetchall() if row[1] <= 0]
+
+    return orphan_digests, legacy_paths
+
+async def purge_blob(digest: str) -> int:
+    """참조 카운트가 0인 blob을 삭제하고 디스크에서 해제된 바이트 수(압축 저장이면 압축된 크기)를 반환"""
+    async with AsyncSessionLocal() as db:
+        await _lock_blob(db, digest)
+        result = await db.execute(
+            text("DELETE FROM blobs WHERE hash = :digest AND ref_count <= 0 RETURNING path_on_disk, coalesce(stored_size, size)"),
+            {"digest": digest}
+        )
+        row = result.first()
+        if row:
+            # 락을 쥔 상태에서 삭제해야 동시에 같은 파일을 올리는 요청과 경합하지 않음
+            await delete_stored(row[0])
+            await remove_thumbnails(digest)
+        await db.commit()
+    return row[1] if row else 0
+
+async def purge_storage(orphan_digests: list, legacy_paths: list, raise_errors: bool = False) -> int:
+    """release_blobs() 커밋 이후 실제 파일 정리, 해제된 blob 바이트 수를 반환
+
+    blob마다 DB 연결과 디스크 스레드를 쓰므로 동시에 PURGE_CONCURRENCY개까지만 진행한다.
+    raise_errors면 모두 시도한 뒤 실패가 있을 때 예외를 던진다 (작업 큐 재시도용).
+    """
+    semaphore = asyncio.Semaphore(PURGE_CONCURRENCY)
+    errors = []
+
+    async def remove_legacy(path_on_disk):
+        async with semaphore:
+            try:
+                await delete_stored(path_on_disk)
+            except Exception as e:
+                print(f"Failed to delete file from disk: {e}")
+                errors.append(e)
+        return 0
+
+    async def remove_blob(digest):
+        async with semaphore:
+            try:
+                return await purge_blob(digest)
+            except Exception as e:
+                print(f"Failed to purge blob {digest}: {e}")
+                errors.append(e)
+                return 0
+
+    freed = await asyncio.gather(
+        *[remove_legacy(path) for path in legacy_paths],
+        *[remove_blob(digest) for digest in orphan_digests],
+    )
+    if errors and raise_errors:
+        raise RuntimeError(f"{len(errors)} of {len(legacy_paths) + len(orphan_digests)} purges failed: {errors[0]}")
+    return sum(freed)
+
+async def schedule_purge(db: AsyncSession, orphan_digests: list, legacy_paths: list, delay_seconds: int = 0) -> list:
+    """release_blobs() 결과를 같은 트랜잭션에서 작업 큐에 등록 (commit은 호출자가 수행)
+
+    커밋과 함께 남으므로 서버가 재시작되어도 정리 대상이 사라지지 않는다.
+    PURGE_JOB_BATCH_SIZE개씩 나눠 등록하고 작업 id 목록을 반환한다.
+    """
+    items = [("blob", digest) for digest in orphan_digests] + [("path", path) for path in legacy_paths]
+    job_ids = []
+    for start in range(0, len(items), PURGE_JOB_BATCH_SIZE):
+        batch = items[start:start + PURGE_JOB_BATCH_SIZE]
+        job_ids.append(await enqueue_job(
+            db,
+            PURGE_JOB,
+            {
+                "orphan_digests": [value for kind, value in batch if kind == "blob"],
+                "legacy_paths": [value for kind, value in batch if kind == "path"],
+            },
+            delay_seconds=delay_seconds,
+        ))
+    return job_ids
+
+@job_handler(PURGE_JOB)
+async def _purge_storage_job(payload: dict):
+    # purge_blob()이 락을 잡은 뒤 ref_count <= 0을 다시 확인하므로 여러 번 실행되어도 안전
+    await purge_storage(payload.get("orphan_digests", []), payload.get("legacy_paths", []), raise_errors=True)
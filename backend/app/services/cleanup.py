@@ -1,36 +1,241 @@
+import os
+import time
 from datetime import datetime, timedelta
-from sqlalchemy import select
-from app.model.file import File
-from app.database import get_async_db
-from pathlib import Path
-
-async def cleanup_old_trash_files():
-    """일주일 이상 된 휴지통 파일들을 정리"""
-    async with get_async_db() as db:
-        # 일주일 이전 시점 계산
-        week_ago = datetime.now() - timedelta(days=7)
-        
-        # 일주일 이상 된 휴지통 파일들 조회
-        old_files_query = select(File).where(
-            File.is_deleted == True,
-            File.deleted_at < week_ago
-        )
-        
-        result = await db.execute(old_files_query)
-        old_files = result.scalars().all()
-        
-        for file in old_files:
-            # 실제 파일 삭제
-            file_path = Path(file.path_on_disk)
-            if file_path.exists():
-                try:
-                    file_path.unlink()
-                    print(f"Deleted file: {file.name}")
-                except Exception as e:
-                    print(f"Failed to delete file {file.name}: {e}")
-            
-            # DB에서 파일 정보 삭제
-            await db.delete(file)
-        
+from sqlalchemy import select, delete, text
+from app.model.blob import Blob
+from app.model.upload_session import UploadSession
+from app.database import AsyncSessionLocal
+from app.services.blob import release_blobs, purge_storage, schedule_purge
+from app.services.jobs import job_handler, delete_job, JOB_LOCK_TIMEOUT_SECONDS
+from app.services.upload import remove_session_dir
+from app.services.disk import run_io
+
+# 휴지통 보관 기간과 한 번에 지우는 행 수
+TRASH_RETENTION_DAYS = int(os.getenv("TRASH_RETENTION_DAYS", "7"))
+TRASH_REAPER_BATCH_SIZE = int(os.getenv("TRASH_REAPER_BATCH_SIZE", "1000"))
+TRASH_REAPER_DRY_RUN = os.getenv("TRASH_REAPER_DRY_RUN", "false").lower() == "true"
+TRASH_REAPER_CHECKPOINT = "trash_reaper"
+
+async def _load_checkpoint(db, name: str):
+    result = await db.execute(
+        text("SELECT cutoff, last_deleted_at, last_id FROM maintenance_checkpoints WHERE name = :name"),
+        {"name": name}
+    )
+    return result.first()
+
+async def cleanup_old_trash_files(
+    dry_run: bool = TRASH_REAPER_DRY_RUN,
+    batch_size: int = TRASH_REAPER_BATCH_SIZE,
+    retention_days: int = TRASH_RETENTION_DAYS,
+) -> dict:
+    """보관 기간이 지난 휴지통 파일을 배치 단위로 정리하고 처리량 지표를 반환
+
+    (deleted_at, id) 순서로 batch_size개씩 지우고, 배치마다 같은 트랜잭션에서 진행 위치를 기록한다.
+    중간에 멈추면 다음 실행이 기록된 위치(와 같은 기준 시각)부터 이어서 진행한다.
+    디스크 파일은 커밋 후 바로 동시에 정리하고, 그 전에 멈추더라도 같은 트랜잭션에서 지연 등록한
+    정리 작업이 나중에 이어서 처리한다.
+    파일을 모두 정리한 뒤 보관 기간이 지난 휴지통 폴더(하위 트리)를 같은 방식으로 삭제한다.
+    dry_run이면 아무것도 지우지 않고 지울 대상만 집계한다.
+    """
+    started = time.perf_counter()
+    stats = {"dry_run": dry_run, "batches": 0, "files": 0, "folders": 0, "file_bytes": 0, "bytes_freed": 0}
+
+    async with AsyncSessionLocal() as db:
+        checkpoint = None if dry_run else await _load_checkpoint(db, TRASH_REAPER_CHECKPOINT)
+    if checkpoint:
+        cutoff, last_deleted_at, last_id = checkpoint
+        print(f"Resuming trash cleanup from ({last_deleted_at}, {last_id})")
+    else:
+        cutoff, last_deleted_at, last_id = datetime.now() - timedelta(days=retention_days), datetime.min, 0
+
+    while True:
+        async with AsyncSessionLocal() as db:
+            params = {
+                "cutoff": cutoff,
+                "last_deleted_at": last_deleted_at,
+                "last_id": last_id,
+                "batch_size": batch_size,
+            }
+            if dry_run:
+                result = await db.execute(
+                    text("""
+                        SELECT id, deleted_at, content_hash, path_on_disk, file_size FROM files
+                        WHERE is_deleted = true AND deleted_at < :cutoff
+                          AND (deleted_at, id) > (:last_deleted_at, :last_id)
+                        ORDER BY deleted_at, id
+                        LIMIT :batch_size
+                    """),
+                    params
+                )
+            else:
+                # 복원 중인(잠긴) 행은 건너뛰고, 삭제 시점에 조건을 다시 확인
+                result = await db.execute(
+                    text("""
+                        WITH batch AS (
+                            SELECT id FROM files
+                            WHERE is_deleted = true AND deleted_at < :cutoff
+                              AND (deleted_at, id) > (:last_deleted_at, :last_id)
+                            ORDER BY deleted_at, id
+                            LIMIT :batch_size
+                            FOR UPDATE SKIP LOCKED
+                        )
+                        DELETE FROM files USING batch
+                        WHERE files.id = batch.id
+                        RETURNING files.id, files.deleted_at, files.content_hash, files.path_on_disk, files.file_size
+                    """),
+                    params
+                )
+            rows = result.fetchall()
+            if not rows:
+                break
+
+            last_deleted_at, last_id = max((row[1], row[0]) for row in rows)
+            stats["batches"] += 1
+            stats["files"] += len(rows)
+            stats["file_bytes"] += sum(row[4] or 0 for row in rows)
+
+            if dry_run:
+                continue
+
+            # blob 참조 해제와 진행 위치 기록을 삭제와 같은 트랜잭션에서
+            orphan_digests, legacy_paths = await release_blobs(db, [(row[2], row[3]) for row in rows])
+            purge_job_ids = await schedule_purge(db, orphan_digests, legacy_paths, delay_seconds=JOB_LOCK_TIMEOUT_SECONDS)
+            await db.execute(
+                text("""
+                    INSERT INTO maintenance_checkpoints (name, cutoff, last_deleted_at, last_id, updated_at)
+                    VALUES (:name, :cutoff, :last_deleted_at, :last_id, now())
+                    ON CONFLICT (name) DO UPDATE SET
+                        cutoff = EXCLUDED.cutoff,
+                        last_deleted_at = EXCLUDED.last_deleted_at,
+                        last_id = EXCLUDED.last_id,
+                        updated_at = EXCLUDED.updated_at
+                """),
+                {"name": TRASH_REAPER_CHECKPOINT, "cutoff": cutoff, "last_deleted_at": last_deleted_at, "last_id": last_id}
+            )
+            await db.commit()
+
+        legacy_sizes = {row[3]: row[4] or 0 for row in rows if not row[2]}
+        stats["bytes_freed"] += await _purge_now(orphan_digests, legacy_paths, purge_job_ids)
+        stats["bytes_freed"] += sum(legacy_sizes.get(path, 0) for path in legacy_paths)
+
+    await _reap_trashed_folders(cutoff, batch_size, dry_run, stats)
+
+    if not dry_run:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                text("DELETE FROM maintenance_checkpoints WHERE name = :name"),
+                {"name": TRASH_REAPER_CHECKPOINT}
+            )
+            await db.commit()
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["files_per_s"] = round(stats["files"] / elapsed, 1) if elapsed > 0 else 0.0
+    prefix = "[dry-run] Would clean up" if dry_run else "Cleaned up"
+    print(
+        f"{prefix} {stats['files']} old files and {stats['folders']} folders ({stats['file_bytes']} bytes, {stats['bytes_freed']} bytes freed on disk) "
+        f"in {stats['batches']} batches, {stats['files_per_s']} files/s"
+    )
+    return stats
+
+async def _purge_now(orphan_digests: list, legacy_paths: list, purge_job_ids: list) -> int:
+    """배치 커밋 직후 바로 정리하고, 성공하면 안전망으로 등록해 둔 정리 작업을 지움
+
+    일부가 실패하면 등록해 둔 작업을 남겨 두어 작업 큐가 재시도하게 한다.
+    """
+    try:
+        freed = await purge_storage(orphan_digests, legacy_paths, raise_errors=True)
+    except Exception as e:
+        print(f"Purge deferred to job queue: {e}")
+        return 0
+    for job_id in purge_job_ids:
+        await delete_job(job_id)
+    return freed
+
+@job_handler("reap_trash")
+async def _reap_trash_job(payload: dict):
+    await cleanup_old_trash_files(dry_run=payload.get("dry_run", TRASH_REAPER_DRY_RUN))
+
+async def _reap_trashed_folders(cutoff: datetime, batch_size: int, dry_run: bool, stats: dict):
+    """보관 기간이 지난 휴지통 폴더를 batch_size개씩 삭제 (하위 폴더/파일은 CASCADE)
+
+    하위 파일 대부분은 앞 단계에서 이미 지워졌으므로, 남은 파일의 blob 참조만 해제하고 폴더를 지운다.
+    지운 행은 다시 조회되지 않으므로 진행 위치를 따로 기록하지 않는다.
+    """
+    last_deleted_at, last_id = datetime.min, 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                text(f"""
+                    SELECT id, deleted_at FROM folders
+                    WHERE is_deleted = true AND trash_root_id = id AND deleted_at < :cutoff
+                      AND (deleted_at, id) > (:last_deleted_at, :last_id)
+                    ORDER BY deleted_at, id
+                    LIMIT :batch_size
+                    {"" if dry_run else "FOR UPDATE SKIP LOCKED"}
+                """),
+                {"cutoff": cutoff, "last_deleted_at": last_deleted_at, "last_id": last_id, "batch_size": batch_size}
+            )
+            folder_rows = result.fetchall()
+            if not folder_rows:
+                break
+            folder_ids = [row[0] for row in folder_rows]
+            last_deleted_at, last_id = max((row[1], row[0]) for row in folder_rows)
+
+            # 참조를 해제할 파일 행을 잠가 둔다. 그 사이 개별 복원으로 루트로 옮겨진 파일은 락을 얻은 뒤
+            # 조건을 다시 검사할 때 빠지므로, CASCADE로 지워지는 파일과 참조를 해제하는 파일이 같아진다.
+            result = await db.execute(
+                text(f"""
+                    SELECT fi.content_hash, fi.path_on_disk, fi.file_size
+                    FROM folders r
+                    JOIN folders f ON f.owner_id = r.owner_id AND f.path LIKE r.path || '%'
+                    JOIN files fi ON fi.parent_folder_id = f.id
+                    WHERE r.id = ANY(:folder_ids)
+                    ORDER BY fi.id
+                    {"" if dry_run else "FOR UPDATE OF fi"}
+                """),
+                {"folder_ids": folder_ids}
+            )
+            file_rows = result.fetchall()
+            stats["batches"] += 1
+            stats["folders"] += len(folder_ids)
+            stats["files"] += len(file_rows)
+            stats["file_bytes"] += sum(row[2] or 0 for row in file_rows)
+
+            if dry_run:
+                continue
+
+            orphan_digests, legacy_paths = await release_blobs(db, [(row[0], row[1]) for row in file_rows])
+            purge_job_ids = await schedule_purge(db, orphan_digests, legacy_paths, delay_seconds=JOB_LOCK_TIMEOUT_SECONDS)
+            await db.execute(text("DELETE FROM folders WHERE id = ANY(:folder_ids)"), {"folder_ids": folder_ids})
+            await db.commit()
+
+        legacy_sizes = {row[1]: row[2] or 0 for row in file_rows if not row[0]}
+        stats["bytes_freed"] += await _purge_now(orphan_digests, legacy_paths, purge_job_ids)
+        stats["bytes_freed"] += sum(legacy_sizes.get(path, 0) for path in legacy_paths)
+
+async def cleanup_orphan_blobs():
+    """참조 카운트가 0으로 남은 blob 정리 (purge 도중 중단된 경우 대비)"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Blob.hash).where(Blob.ref_count <= 0).limit(1000))
+        orphan_digests = [row[0] for row in result.fetchall()]
+
+    await purge_storage(orphan_digests, [])
+    print(f"Cleaned up {len(orphan_digests)} orphan blobs")
+
+async def cleanup_expired_upload_sessions():
+    """만료된 업로드 세션과 남은 청크들을 정리"""
+    async with AsyncSessionLocal() as db:
+        expired_query = delete(UploadSession).where(
+            UploadSession.expires_at < datetime.now()
+        ).returning(UploadSession.id)
+
+        result = await db.execute(expired_query)
+        expired_ids = [row[0] for row in result.fetchall()]
         await db.commit()
-        print(f"Cleaned up {len(old_files)} old files")
\ No newline at end of file
+
+    # 청크 디렉토리 삭제는 블로킹이므로 디스크 전용 스레드풀에서 처리
+    for upload_id in expired_ids:
+        await run_io(remove_session_dir, upload_id)
+
+    print(f"Cleaned up {len(expired_ids)} expired upload sessions")
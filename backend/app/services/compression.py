@@ -0,0 +1,204 @@
+import functools
+import mimetypes
+import os
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.responses import Response
+from app.services.disk import run_io, unlink
+from app.services.storage import StorageBackend, StorageStat, resolve_storage
+from app.utilities.file_response import IMMUTABLE_CACHE_CONTROL, accepts_encoding, build_file_response
+
+# zstandard가 없으면 압축 저장만 비활성화 (이미 압축해 둔 blob은 읽을 수 없으므로 운영 중에는 빼지 말 것)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 저장 시 압축 (텍스트, CSV, JSON, 로그처럼 잘 줄어드는 형식만)
+# blob은 원본 내용의 해시로 찾고, 저장된 형식(codec)은 blobs.storage_codec / files.storage_codec에 기록한다. (NULL이면 원본 그대로)
+# 압축된 blob은 받을 때 스트리밍으로 풀어서 보내고, 클라이언트가 zstd를 받을 수 있으면 압축된 그대로 보낸다.
+STORAGE_COMPRESSION = os.getenv("STORAGE_COMPRESSION", "none").lower()
+# 브라우저는 창 크기 8MB까지만 풀 수 있으므로 창이 더 커지는 20 이상은 쓰지 않음
+STORAGE_COMPRESSION_LEVEL = min(19, max(1, int(os.getenv("STORAGE_COMPRESSION_LEVEL", "3"))))
+# 이보다 작은 파일은 줄여도 얻는 것이 없으므로 그대로 저장
+STORAGE_COMPRESSION_MIN_SIZE = int(os.getenv("STORAGE_COMPRESSION_MIN_SIZE", "4096"))
+# 앞부분 샘플을 압축해 보고 이 비율 이상 줄어들 때만 압축
+STORAGE_COMPRESSION_MIN_RATIO = float(os.getenv("STORAGE_COMPRESSION_MIN_RATIO", "1.5"))
+STORAGE_COMPRESSION_SAMPLE_SIZE = int(os.getenv("STORAGE_COMPRESSION_SAMPLE_SIZE", 256 * 1024))
+
+CODEC_ZSTD = "zstd"
+# codec -> 저장소 키 접미사 (같은 내용의 원본/압축본이 같은 키를 쓰지 않도록)
+CODEC_SUFFIXES = {CODEC_ZSTD: ".zst"}
+
+# 압축 대상 형식 (mimetype이 text/*이거나 아래 목록, 또는 확장자가 아래 목록)
+# docx/xlsx 등 OOXML은 이미 zip으로 압축된 형식이라 제외
+COMPRESSIBLE_MEDIA_TYPES = {
+    "application/json", "application/xml", "application/javascript", "application/x-javascript",
+    "application/x-ndjson", "application/sql", "application/x-sh", "application/x-tex",
+    "application/rtf", "application/postscript", "application/x-yaml", "application/yaml", "application/toml",
+    "application/msword", "application/vnd.ms-excel", "application/vnd.ms-powerpoint",
+}
+COMPRESSIBLE_EXTENSIONS = {
+    "txt", "log", "csv", "tsv", "json", "jsonl", "ndjson", "xml", "yaml", "yml", "toml", "ini", "conf",
+    "md", "sql", "html", "htm", "css", "js", "ts", "py", "java", "c", "h", "cpp", "go", "rs", "sh",
+}
+
+def compression_enabled() -> bool:
+    return STORAGE_COMPRESSION == CODEC_ZSTD and zstandard is not None
+
+def is_compressible(name: str) -> bool:
+    ext = name.rpartition(".")[2].lower()
+    if ext in COMPRESSIBLE_EXTENSIONS:
+        return True
+    mime_type, encoding = mimetypes.guess_type(name)
+    # .csv.gz처럼 이미 압축된 파일은 encoding이 붙음
+    if mime_type is None or encoding:
+        return False
+    return mime_type.startswith("text/") or mime_type in COMPRESSIBLE_MEDIA_TYPES or mime_type.endswith(("+xml", "+json"))
+
+def _sample_ratio(path: Path) -> float:
+    with open(path, "rb") as handle:
+        sample = handle.read(STORAGE_COMPRESSION_SAMPLE_SIZE)
+    if not sample:
+        return 1.0
+    compressed = zstandard.ZstdCompressor(level=STORAGE_COMPRESSION_LEVEL).compress(sample)
+    return len(sample) / len(compressed)
+
+async def choose_codec(name: str, path: Path, file_size: int) -> Optional[str]:
+    """업로드한 임시 파일을 압축해서 저장할지 결정 (형식 + 앞부분 샘플의 압축률), 그대로 저장하면 None"""
+    if not compression_enabled() or file_size < STORAGE_COMPRESSION_MIN_SIZE or not is_compressible(name):
+        return None
+    ratio = await run_io(_sample_ratio, path)
+    return CODEC_ZSTD if ratio >= STORAGE_COMPRESSION_MIN_RATIO else None
+
+def _compress_file(source: Path, dest: Path) -> int:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    compressor = zstandard.ZstdCompressor(level=STORAGE_COMPRESSION_LEVEL, write_content_size=True)
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        _, written = compressor.copy_stream(src, dst, size=os.fstat(src.fileno()).st_size)
+    return written
+
+async def compress_file(source: Path, codec: str) -> tuple:
+    """임시 파일을 압축한 새 임시 파일의 (경로, 크기) 반환 (원본은 그대로 둠)
+
+    zstandard는 압축 중 GIL을 놓으므로 디스크 스레드에서 읽기/쓰기와 함께 처리한다.
+    """
+    dest = source.with_name(source.name + CODEC_SUFFIXES[codec])
+    try:
+        size = await run_io(_compress_file, source, dest)
+    except BaseException:
+        await unlink(dest)
+        raise
+    return dest, size
+
+async def compression_report(db: AsyncSession) -> list:
+    """codec별 blob 수, 원본/저장 크기, 줄어든 바이트 (참조가 남은 blob 기준)"""
+    result = await db.execute(text("""
+        SELECT coalesce(storage_codec, 'none') AS codec,
+               count(*) AS blobs,
+               sum(size) AS original_bytes,
+               sum(coalesce(stored_size, size)) AS stored_bytes
+        FROM blobs
+        WHERE ref_count > 0
+        GROUP BY 1
+        ORDER BY 1
+    """))
+    report = []
+    for row in result.fetchall():
+        item = dict(row._mapping)
+        item["original_bytes"] = int(item["original_bytes"] or 0)
+        item["stored_bytes"] = int(item["stored_bytes"] or 0)
+        item["saved_bytes"] = item["original_bytes"] - item["stored_bytes"]
+        item["ratio"] = round(item["original_bytes"] / item["stored_bytes"], 2) if item["stored_bytes"] else None
+        report.append(item)
+    return report
+
+def open_decoded(storage: StorageBackend, key: str, codec: Optional[str], start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+    """저장된 blob에서 원본의 [start, end] 범위(end 포함)를 청크 단위로 읽음 (codec이 없으면 저장소에서 그대로)"""
+    if codec is None:
+        return storage.open_range(key, start, end)
+    if codec != CODEC_ZSTD or zstandard is None:
+        raise RuntimeError(f"Cannot decode {codec} blob (zstandard is not installed)")
+    return _decode_zstd(storage, key, start, end)
+
+async def _decode_zstd(storage: StorageBackend, key: str, start: int, end: Optional[int]):
+    # zstd 스트림은 중간부터 풀 수 없으므로 start 앞부분은 풀면서 버림
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    chunks = storage.open_range(key)
+    position = 0
+    try:
+        async for chunk in chunks:
+            data = await run_io(decompressor.decompress, chunk)
+            data_start, position = position, position + len(data)
+            low = max(start, data_start)
+            high = position if end is None else min(position, end + 1)
+            if low < high:
+                yield data[low - data_start:high - data_start]
+            if end is not None and position > end:
+                return
+    finally:
+        await chunks.aclose()
+
+async def build_stored_file_response(
+    request: Request,
+    stored_key: str,
+    codec: Optional[str],
+    file_size: int,
+    filename: str,
+    media_type: str,
+    content_hash: Optional[str],
+    cache_control: str = IMMUTABLE_CACHE_CONTROL,
+) -> Response:
+    """저장소의 blob으로 파일 응답 생성 (build_file_response 참고)
+
+    압축 저장된 blob은 클라이언트가 그 codec을 받으면 저장된 바이트를 Content-Encoding으로 그대로 (로컬이면 sendfile),
+    아니면 풀면서 보낸다. Range 요청은 원본 기준 범위이므로 항상 풀어서 처리한다.
+    """
+    storage, key = resolve_storage(stored_key)
+    try:
+        stat_result = await storage.stat(key)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if codec is None:
+        # 로컬 파일은 sendfile로, 원격 저장소는 요청된 범위만 Range GET으로 받아서 전송
+        return build_file_response(
+            request,
+            path=storage.local_path(key),
+            stat_result=stat_result,
+            filename=filename,
+            media_type=media_type,
+            content_hash=content_hash,
+            open_range=functools.partial(storage.open_range, key),
+            cache_control=cache_control,
+        )
+
+    if "range" not in request.headers and accepts_encoding(request, codec):
+        return build_file_response(
+            request,
+            path=storage.local_path(key),
+            stat_result=stat_result,
+            filename=filename,
+            media_type=media_type,
+            # 표현이 다르므로 ETag도 구분 (원본 ETag로 이 응답을 재사용하지 않도록)
+            content_hash=f"{content_hash}-{codec}" if content_hash else None,
+            open_range=functools.partial(storage.open_range, key),
+            cache_control=cache_control,
+            extra_headers={"Content-Encoding": codec, "Vary": "Accept-Encoding"},
+        )
+
+    return build_file_response(
+        request,
+        path=None,
+        stat_result=StorageStat(file_size, stat_result.st_mtime, stat_result.st_mtime_ns),
+        filename=filename,
+        media_type=media_type,
+        content_hash=content_hash,
+        open_range=functools.partial(open_decoded, storage, key, codec),
+        cache_control=cache_control,
+        extra_headers={"Vary": "Accept-Encoding"},
+    )
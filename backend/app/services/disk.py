@@ -0,0 +1,117 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 디스크 I/O 설정 (환경변수로 조정 가능)
+DISK_IO_WORKERS = int(os.getenv("DISK_IO_WORKERS", 8))
+# 워커 프로세스당 동시에 디스크에 쓰는 작업 수
+DISK_MAX_CONCURRENT_WRITERS = int(os.getenv("DISK_MAX_CONCURRENT_WRITERS", 4))
+# 쓰기 버퍼 크기 (64KB 배수로 맞춤)
+DISK_ALIGNMENT = 64 * 1024
+DISK_WRITE_BUFFER_SIZE = max(
+    DISK_ALIGNMENT,
+    int(os.getenv("DISK_WRITE_BUFFER_SIZE", 1024 * 1024)) // DISK_ALIGNMENT * DISK_ALIGNMENT
+)
+# 업로드 스트림에서 한 번에 읽는 크기
+UPLOAD_READ_CHUNK_SIZE = int(os.getenv("UPLOAD_READ_CHUNK_SIZE", 256 * 1024))
+
+# 디스크 작업 전용 스레드풀 (기본 executor와 분리해 다른 블로킹 작업과 경쟁하지 않도록 함)
+_disk_executor = ThreadPoolExecutor(max_workers=DISK_IO_WORKERS, thread_name_prefix="disk-io")
+_writer_semaphores = {}
+
+def _get_writer_semaphore() -> asyncio.Semaphore:
+    # 세마포어는 이벤트 루프에 묶이므로 루프별로 생성
+    loop = asyncio.get_running_loop()
+    semaphore = _writer_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(DISK_MAX_CONCURRENT_WRITERS)
+        _writer_semaphores[loop] = semaphore
+    return semaphore
+
+async def run_io(func, *args, **kwargs):
+    """블로킹 파일 시스템 작업을 디스크 전용 스레드풀에서 실행"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_disk_executor, functools.partial(func, *args, **kwargs))
+
+async def path_exists(path) -> bool:
+    return await run_io(os.path.exists, path)
+
+async def unlink(path):
+    await run_io(Path(path).unlink, True)
+
+async def makedirs(path):
+    await run_io(os.makedirs, path, exist_ok=True)
+
+def _open_for_write(path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return open(path, "wb", buffering=0)
+
+def _write_all(handle, data, hasher):
+    view = memoryview(data)
+    while view:
+        written = handle.write(view)
+        view = view[written:]
+    if hasher is not None:
+        # hashlib은 큰 버퍼에서 GIL을 놓으므로 쓰기와 같은 스레드에서 계산
+        hasher.update(data)
+
+class AsyncFileWriter:
+    """업로드 데이터를 큰 버퍼로 모아서 디스크 전용 스레드풀에서 쓰는 writer
+
+    이벤트 루프에서는 open/write/mkdir/unlink를 직접 호출하지 않는다.
+    hasher를 넘기면 쓰는 데이터로 해시도 함께 계산한다.
+    """
+
+    def __init__(self, path, hasher=None, buffer_size: int = DISK_WRITE_BUFFER_SIZE):
+        self.path = Path(path)
+        self.hasher = hasher
+        self.buffer_size = buffer_size
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._handle = None
+
+    async def open(self):
+        self._handle = await run_io(_open_for_write, self.path)
+        return self
+
+    async def write(self, data: bytes):
+        self._buffer += data
+        if len(self._buffer) >= self.buffer_size:
+            # 버퍼 크기의 배수만큼만 쓰고 나머지는 다음 쓰기로 넘김
+            aligned = len(self._buffer) // self.buffer_size * self.buffer_size
+            block = bytes(self._buffer[:aligned])
+            del self._buffer[:aligned]
+            await self._flush(block)
+
+    async def _flush(self, block: bytes):
+        async with _get_writer_semaphore():
+            await run_io(_write_all, self._handle, block, self.hasher)
+        self.bytes_written += len(block)
+
+    async def close(self):
+        if self._buffer:
+            block = bytes(self._buffer)
+            self._buffer.clear()
+            await self._flush(block)
+        if self._handle is not None:
+            await run_io(self._handle.close)
+            self._handle = None
+
+    async def abort(self):
+        """쓰기를 중단하고 파일 삭제"""
+        self._buffer.clear()
+        if self._handle is not None:
+            await run_io(self._handle.close)
+            self._handle = None
+        await unlink(self.path)
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.close()
+        else:
+            await self.abort()
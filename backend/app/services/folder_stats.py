@@ -0,0 +1,136 @@
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+
+# 폴더 집계 컬럼
+# - file_count: 직속 파일 수 (휴지통 제외)
+# - folder_count: 직속 하위 폴더 수
+# - total_size: 하위 트리 전체 파일 크기 합 (휴지통 제외)
+# 휴지통에 들어간 폴더의 집계는 휴지통으로 보낼 때의 값을 유지하고, 복원할 때 부모 쪽에 그대로 더한다.
+# 파일/폴더가 바뀌는 트랜잭션 안에서 증감하고, 어긋난 값은 verify_folder_stats()가 주기적으로 바로잡는다.
+
+def add_delta(deltas: dict, folder_id: Optional[int], file_count: int = 0, folder_count: int = 0, size: int = 0):
+    """폴더별 증감을 모아 둠: deltas[folder_id] = [file_count, folder_count, size] (루트는 무시)"""
+    if folder_id is None:
+        return
+    delta = deltas.setdefault(folder_id, [0, 0, 0])
+    delta[0] += file_count
+    delta[1] += folder_count
+    delta[2] += size
+
+async def apply_deltas(db: AsyncSession, owner_id: int, deltas: dict):
+    """모아 둔 증감을 owner_id의 폴더에 한 번에 반영 (commit은 호출자가 수행)
+
+    개수는 해당 폴더에만, 크기는 해당 폴더와 모든 조상에 더한다.
+    조상 행은 id 순서로 잠가서 동시에 다른 경로를 갱신하는 트랜잭션과 교착되지 않게 한다.
+    다른 사용자의 폴더 id가 섞여 있으면 무시한다. (호출자가 부모 확인을 빠뜨려도 남의 집계가 바뀌지 않도록)
+    """
+    deltas = {folder_id: delta for folder_id, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    folder_ids = sorted(deltas)
+    await db.execute(
+        text("""
+            WITH d AS (
+                SELECT unnest(CAST(:folder_ids AS int[])) AS folder_id,
+                       unnest(CAST(:file_counts AS int[])) AS file_count,
+                       unnest(CAST(:folder_counts AS int[])) AS folder_count,
+                       unnest(CAST(:sizes AS bigint[])) AS size
+            ),
+            expanded AS (
+                SELECT a.id,
+                       sum(CASE WHEN a.id = d.folder_id THEN d.file_count ELSE 0 END) AS file_count,
+                       sum(CASE WHEN a.id = d.folder_id THEN d.folder_count ELSE 0 END) AS folder_count,
+                       sum(d.size) AS size
+                FROM d
+                JOIN folders p ON p.id = d.folder_id AND p.owner_id = :owner_id
+                CROSS JOIN LATERAL unnest(string_to_array(trim(both '/' from p.path), '/')::int[]) AS a(id)
+                GROUP BY a.id
+            ),
+            locked AS (
+                SELECT f.id FROM folders f JOIN expanded e ON e.id = f.id AND f.owner_id = :owner_id
+                ORDER BY f.id
+                FOR UPDATE OF f
+            )
+            UPDATE folders
+            SET file_count = folders.file_count + e.file_count,
+                folder_count = folders.folder_count + e.folder_count,
+                total_size = folders.total_size + e.size
+            FROM expanded e
+            JOIN locked l ON l.id = e.id
+            WHERE folders.id = e.id
+        """),
+        {
+            "owner_id": owner_id,
+            "folder_ids": folder_ids,
+            "file_counts": [deltas[i][0] for i in folder_ids],
+            "folder_counts": [deltas[i][1] for i in folder_ids],
+            "sizes": [deltas[i][2] for i in folder_ids],
+        }
+    )
+
+async def apply_file_delta(db: AsyncSession, owner_id: int, folder_id: Optional[int], count_delta: int, size_delta: int):
+    """파일 추가/삭제 반영: 부모 폴더의 file_count, 부모와 모든 조상의 total_size (commit은 호출자가 수행)"""
+    deltas = {}
+    add_delta(deltas, folder_id, file_count=count_delta, size=size_delta)
+    await apply_deltas(db, owner_id, deltas)
+
+async def apply_folder_delta(db: AsyncSession, owner_id: int, parent_id: Optional[int], count_delta: int, size_delta: int):
+    """하위 폴더 추가/삭제/이동 반영: 부모 폴더의 folder_count, 부모와 모든 조상의 total_size"""
+    deltas = {}
+    add_delta(deltas, parent_id, folder_count=count_delta, size=size_delta)
+    await apply_deltas(db, owner_id, deltas)
+
+async def verify_folder_stats(batch_size: int = 1000) -> int:
+    """휴지통에 없는 모든 폴더의 집계 값을 배치 단위로 다시 계산해 어긋난 행만 수정하고, 수정한 폴더 수를 반환
+
+    배치마다 커밋하므로 오래 걸려도 긴 트랜잭션을 만들지 않는다.
+    계산 도중 커밋된 증감은 다음 실행에서 다시 맞춰진다.
+    """
+    repaired = 0
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                text("SELECT id FROM folders WHERE id > :last_id AND is_deleted = false ORDER BY id LIMIT :batch_size"),
+                {"last_id": last_id, "batch_size": batch_size}
+            )
+            folder_ids = [row[0] for row in result.fetchall()]
+            if not folder_ids:
+                break
+
+            result = await db.execute(
+                text("""
+                    WITH actual AS (
+                        SELECT b.id,
+                            (SELECT count(*) FROM files fi
+                             WHERE fi.parent_folder_id = b.id AND fi.is_deleted = false) AS file_count,
+                            (SELECT count(*) FROM folders c
+                             WHERE c.parent_folder_id = b.id AND c.is_deleted = false) AS folder_count,
+                            (SELECT coalesce(sum(fi.file_size), 0) FROM folders d
+                             JOIN files fi ON fi.parent_folder_id = d.id AND fi.is_deleted = false
+                             WHERE d.owner_id = b.owner_id AND d.path LIKE b.path || '%'
+                               AND d.is_deleted = false) AS total_size
+                        FROM folders b
+                        WHERE b.id = ANY(:folder_ids)
+                    )
+                    UPDATE folders f
+                    SET file_count = a.file_count,
+                        folder_count = a.folder_count,
+                        total_size = a.total_size
+                    FROM actual a
+                    WHERE f.id = a.id
+                      AND (f.file_count, f.folder_count, f.total_size)
+                          IS DISTINCT FROM (a.file_count, a.folder_count, a.total_size)
+                    RETURNING f.id
+                """),
+                {"folder_ids": folder_ids}
+            )
+            repaired += len(result.fetchall())
+            await db.commit()
+
+        last_id = folder_ids[-1]
+
+    print(f"Folder stats verified. Repaired {repaired} folders")
+    return repaired
@@ -0,0 +1,137 @@
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.model.folder import Folder
+
+# 폴더 경로(materialized path): 루트부터 자기 자신까지의 id를 "/"로 이은 문자열
+# 예) 루트 1 아래 5 아래 23 -> "/1/5/23/"
+# 하위 트리는 path LIKE '/1/5/%' 한 번으로, 조상은 path를 쪼개서 PK 조회 한 번으로 구한다.
+
+def build_path(parent_path: Optional[str], folder_id: int) -> str:
+    return f"{parent_path or '/'}{folder_id}/"
+
+def get_ancestor_ids(path: str) -> list:
+    """경로에 포함된 폴더 id 목록 (루트 -> 자기 자신 순서)"""
+    return [int(part) for part in path.strip("/").split("/") if part]
+
+async def get_parent_path(db: AsyncSession, parent_id: Optional[int], owner_id: int) -> Optional[str]:
+    """부모 폴더 경로 조회 (루트면 None, 없거나 남의 폴더거나 휴지통에 있으면 404)"""
+    if parent_id is None:
+        return None
+    result = await db.execute(
+        select(Folder.path).where(Folder.id == parent_id, Folder.owner_id == owner_id, Folder.is_deleted == False)
+    )
+    parent_path = result.scalar()
+    if parent_path is None:
+        raise HTTPException(status_code=404, detail="Parent folder not found")
+    return parent_path
+
+async def lock_for_move(db: AsyncSession, owner_id: int, folder_ids: list, target_id: Optional[int]) -> Optional[str]:
+    """옮길 폴더들과 대상 폴더(와 그 조상)에 행 락을 잡고 대상 폴더 경로를 반환 (없거나 휴지통이면 404)
+
+    락을 잡은 뒤 다시 읽은 경로로 검사해야, A를 B 아래로 B를 A 아래로 동시에 옮기는 요청이 둘 다 통과해
+    순환이 생기지 않는다. 대상의 조상까지 잠그므로 A를 B의 하위 폴더 아래로 옮기는 경우도 같은 락에서 만난다.
+    락은 id 순서로 잡고, 기다리는 사이 대상이 옮겨졌으면 새 조상까지 잠근 뒤 다시 확인한다.
+    """
+    target_path = await get_parent_path(db, target_id, owner_id)
+    locked = set()
+    while True:
+        lock_ids = sorted((set(folder_ids) | set(get_ancestor_ids(target_path or ""))) - locked)
+        if lock_ids:
+            await db.execute(
+                text("SELECT id FROM folders WHERE id = ANY(:folder_ids) AND owner_id = :owner_id ORDER BY id FOR UPDATE"),
+                {"folder_ids": lock_ids, "owner_id": owner_id}
+            )
+            locked.update(lock_ids)
+        locked_path = await get_parent_path(db, target_id, owner_id)
+        if locked_path == target_path:
+            return target_path
+        target_path = locked_path
+
+async def move_subtree(db: AsyncSession, folder: Folder, new_parent_id: Optional[int]) -> Optional[int]:
+    """폴더를 새 부모 아래로 옮기고 하위 트리 전체의 경로를 한 번에 갱신, 예전 부모 id 반환 (commit은 호출자가 수행)"""
+    new_parent_path = await lock_for_move(db, folder.owner_id, [folder.id], new_parent_id)
+    # 락을 잡기 전에 읽은 경로/부모는 그 사이 다른 이동으로 바뀌었을 수 있음
+    result = await db.execute(select(Folder.path, Folder.parent_folder_id).where(Folder.id == folder.id))
+    old_path, old_parent_id = result.first()
+
+    # 자기 자신이나 자기 하위 폴더 아래로는 이동할 수 없음
+    if new_parent_path is not None and new_parent_path.startswith(old_path):
+        raise HTTPException(status_code=400, detail="Cannot move a folder into itself or its descendant")
+
+    new_path = build_path(new_parent_path, folder.id)
+    if new_path != old_path:
+        await db.execute(
+            text("""
+                UPDATE folders
+                SET path = :new_path || substr(path, :old_length + 1)
+                WHERE owner_id = :owner_id AND path LIKE :old_path || '%'
+            """),
+            {
+                "new_path": new_path,
+                "old_length": len(old_path),
+                "owner_id": folder.owner_id,
+                "old_path": old_path,
+            }
+        )
+
+    folder.parent_folder_id = new_parent_id
+    folder.path = new_path
+    return old_parent_id
+
+async def move_subtrees(db: AsyncSession, owner_id: int, moved: list, target_id: Optional[int], target_path: Optional[str]):
+    """여러 폴더를 같은 부모 아래로 옮기고 하위 트리 경로를 한 문장으로 갱신 (commit은 호출자가 수행)
+
+    moved: (폴더 id, 기존 경로) 목록 - 서로 포함 관계가 없어야 하고, 대상은 이미 검증되어 있어야 함
+    """
+    if not moved:
+        return
+    await db.execute(
+        text("""
+            WITH moved AS (
+                SELECT unnest(CAST(:folder_ids AS int[])) AS id,
+                       unnest(CAST(:old_paths AS text[])) AS old_path
+            )
+            UPDATE folders
+            SET path = :target_prefix || moved.id || '/' || substr(folders.path, length(moved.old_path) + 1),
+                parent_folder_id = CASE WHEN folders.id = moved.id THEN :target_id ELSE folders.parent_folder_id END
+            FROM moved
+            WHERE folders.owner_id = :owner_id AND folders.path LIKE moved.old_path || '%'
+        """),
+        {
+            "folder_ids": [folder_id for folder_id, _ in moved],
+            "old_paths": [path for _, path in moved],
+            "target_prefix": target_path or "/",
+            "target_id": target_id,
+            "owner_id": owner_id,
+        }
+    )
+
+async def get_breadcrumb(db: AsyncSession, folder_id: int, owner_id: int) -> list:
+    """루트부터 해당 폴더까지의 [{id, name}] (쿼리 한 번)"""
+    result = await db.execute(
+        text("""
+            SELECT b.id, b.name
+            FROM folders f
+            JOIN folders b ON b.id = ANY(string_to_array(trim(both '/' from f.path), '/')::int[])
+            WHERE f.id = :folder_id AND f.owner_id = :owner_id
+            ORDER BY length(b.path)
+        """),
+        {"folder_id": folder_id, "owner_id": owner_id}
+    )
+    return [{"id": row[0], "name": row[1]} for row in result.fetchall()]
+
+async def rebuild_folder_paths(db: AsyncSession):
+    """parent_folder_id 기준으로 전체 폴더 경로를 다시 계산 (대량 적재/마이그레이션 이후 사용)"""
+    await db.execute(text("""
+        WITH RECURSIVE tree AS (
+            SELECT id, '/' || id || '/' AS path FROM folders WHERE parent_folder_id IS NULL
+            UNION ALL
+            SELECT f.id, t.path || f.id || '/' FROM folders f
+            INNER JOIN tree t ON f.parent_folder_id = t.id
+        )
+        UPDATE folders SET path = tree.path
+        FROM tree
+        WHERE folders.id = tree.id AND folders.path IS DISTINCT FROM tree.path
+    """))
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import socket
+import traceback
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+
+# DB 기반 작업 큐
+# - 요청 트랜잭션 안에서 enqueue_job()으로 작업을 넣으면 커밋과 함께 남으므로 서버가 재시작되어도 사라지지 않는다.
+# - 워커는 SELECT ... FOR UPDATE SKIP LOCKED로 작업을 가져가므로 여러 프로세스가 동시에 돌아도 겹치지 않는다.
+# - 실패하면 지수 백오프로 다시 시도하고, max_attempts를 넘기면 dead 상태로 남긴다. 성공한 작업은 삭제한다.
+# - 작업은 같은 작업이 두 번 실행되어도 결과가 같도록(멱등) 작성해야 한다.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE_SECONDS = int(os.getenv("JOB_BACKOFF_BASE_SECONDS", "10"))
+JOB_BACKOFF_MAX_SECONDS = int(os.getenv("JOB_BACKOFF_MAX_SECONDS", "3600"))
+# 이 시간 동안 heartbeat가 없는 running 작업은 워커가 죽은 것으로 보고 다시 가져감
+JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "300"))
+
+_handlers = {}
+_worker_tasks = []
+_worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+def job_handler(kind: str):
+    """작업 종류별 처리 함수 등록: handler(payload: dict)"""
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+async def enqueue_job(
+    db: AsyncSession,
+    kind: str,
+    payload: Optional[dict] = None,
+    delay_seconds: int = 0,
+    dedupe_key: Optional[str] = None,
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+) -> Optional[int]:
+    """작업 추가 (commit은 호출자가 수행) - 작업 id 반환
+
+    dedupe_key가 같은 작업이 이미 대기/실행 중이면 추가하지 않고 None을 반환한다.
+    """
+    result = await db.execute(
+        text("""
+            INSERT INTO jobs (kind, payload, status, dedupe_key, attempts, max_attempts, run_at, created_at)
+            VALUES (:kind, CAST(:payload AS jsonb), 'pending', :dedupe_key, 0, :max_attempts,
+                    now() + make_interval(secs => :delay_seconds), now())
+            ON CONFLICT (dedupe_key) WHERE status IN ('pending', 'running') DO NOTHING
+            RETURNING id
+        """),
+        {
+            "kind": kind,
+            "payload": json.dumps(payload or {}),
+            "dedupe_key": dedupe_key,
+            "max_attempts": max_attempts,
+            "delay_seconds": delay_seconds,
+        }
+    )
+    return result.scalar()
+
+async def schedule_job(kind: str, payload: Optional[dict] = None, dedupe_key: Optional[str] = None):
+    """자체 세션으로 작업 추가 (스케줄러용, 같은 종류가 이미 대기 중이면 건너뜀)"""
+    async with AsyncSessionLocal() as db:
+        await enqueue_job(db, kind, payload, dedupe_key=dedupe_key or kind)
+        await db.commit()
+
+async def delete_job(job_id: int):
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM jobs WHERE id = :job_id"), {"job_id": job_id})
+        await db.commit()
+
+async def _claim_job():
+    """실행할 작업 하나를 가져와 running으로 표시 (없으면 None)"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            text("""
+                UPDATE jobs SET status = 'running', locked_at = now(), locked_by = :worker_id, attempts = attempts + 1
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE (status = 'pending' AND run_at <= now())
+                       OR (status = 'running' AND locked_at < now() - make_interval(secs => :lock_timeout))
+                    ORDER BY run_at
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, kind, payload, attempts, max_attempts
+            """),
+            {"worker_id": _worker_id, "lock_timeout": JOB_LOCK_TIMEOUT_SECONDS}
+        )
+        job = result.first()
+        await db.commit()
+    return job
+
+async def _finish_job(job_id: int, attempts: int, max_attempts: int, error: Optional[str]):
+    async with AsyncSessionLocal() as db:
+        if error is None:
+            await db.execute(text("DELETE FROM jobs WHERE id = :job_id"), {"job_id": job_id})
+        elif attempts >= max_attempts:
+            await db.execute(
+                text("UPDATE jobs SET status = 'dead', locked_at = NULL, last_error = :error WHERE id = :job_id"),
+                {"job_id": job_id, "error": error}
+            )
+        else:
+            backoff = min(JOB_BACKOFF_MAX_SECONDS, JOB_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+            await db.execute(
+                text("""
+                    UPDATE jobs SET status = 'pending', locked_at = NULL, last_error = :error,
+                        run_at = now() + make_interval(secs => :backoff)
+                    WHERE id = :job_id
+                """),
+                {"job_id": job_id, "error": error, "backoff": backoff}
+            )
+        await db.commit()
+
+async def _heartbeat(job_id: int):
+    """오래 걸리는 작업이 다른 워커에게 넘어가지 않도록 locked_at 갱신"""
+    while True:
+        await asyncio.sleep(JOB_LOCK_TIMEOUT_SECONDS / 3)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(text("UPDATE jobs SET locked_at = now() WHERE id = :job_id"), {"job_id": job_id})
+                await db.commit()
+        except Exception as e:
+            print(f"Job {job_id} heartbeat failed: {e}")
+
+async def run_job(job) -> Optional[str]:
+    """작업 하나 실행, 실패하면 오류 메시지 반환"""
+    job_id, kind, payload, attempts, max_attempts = job
+    handler = _handlers.get(kind)
+    if handler is None:
+        return f"Unknown job kind: {kind}"
+
+    heartbeat = asyncio.create_task(_heartbeat(job_id))
+    try:
+        await handler(payload or {})
+        return None
+    except Exception:
+        return traceback.format_exc(limit=5)
+    finally:
+        heartbeat.cancel()
+
+async def _worker_loop(index: int):
+    while True:
+        try:
+            job = await _claim_job()
+        except Exception as e:
+            print(f"Job worker {index} failed to claim: {e}")
+            job = None
+
+        if job is None:
+            await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+            continue
+
+        error = await run_job(job)
+        if error:
+            print(f"Job {job[0]} ({job[1]}) failed on attempt {job[3]}/{job[4]}: {error.splitlines()[-1]}")
+        try:
+            await _finish_job(job[0], job[3], job[4], error)
+        except Exception as e:
+            # 기록에 실패해도 lock timeout 이후 다시 실행됨
+            print(f"Job worker {index} failed to record job {job[0]}: {e}")
+
+def start_job_workers(workers: int = JOB_WORKERS):
+    """현재 이벤트 루프에서 작업 워커 시작 (앱 시작 시 호출)"""
+    for index in range(workers):
+        _worker_tasks.append(asyncio.create_task(_worker_loop(index)))
+    print(f"Started {workers} job workers ({_worker_id})")
+
+async def stop_job_workers():
+    for task in _worker_tasks:
+        task.cancel()
+    await asyncio.gather(*_worker_tasks, return_exceptions=True)
+    _worker_tasks.clear()
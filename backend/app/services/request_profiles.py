@@ -0,0 +1,52 @@
+import json
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+
+async def save_request_profile(profile: dict, keep: int):
+    """샘플링된 느린 요청 저장 후 가장 느린 keep개만 남김"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text("""
+                INSERT INTO request_profiles
+                    (method, route, status, duration_ms, db_ms, auth_ms, query_count, statements, created_at)
+                VALUES (:method, :route, :status, :duration_ms, :db_ms, :auth_ms, :query_count, CAST(:statements AS jsonb), now())
+            """),
+            {
+                "method": profile["method"],
+                "route": profile["route"],
+                "status": profile["status"],
+                "duration_ms": profile["duration_ms"],
+                "db_ms": profile["db_ms"],
+                "auth_ms": profile["auth_ms"],
+                "query_count": profile["query_count"],
+                "statements": json.dumps({"items": profile["statements"], "dropped": profile["statements_dropped"]}),
+            },
+        )
+        await db.execute(
+            text("""
+                DELETE FROM request_profiles
+                WHERE id IN (
+                    SELECT id FROM request_profiles
+                    ORDER BY duration_ms DESC
+                    OFFSET :keep
+                )
+            """),
+            {"keep": keep},
+        )
+        await db.commit()
+
+async def list_request_profiles(db: AsyncSession, route: Optional[str] = None, limit: int = 20) -> list:
+    """저장된 느린 요청 (느린 순, route로 거르기)"""
+    result = await db.execute(
+        text("""
+            SELECT id, method, route, status, duration_ms, db_ms, auth_ms, query_count, statements, created_at
+            FROM request_profiles
+            WHERE CAST(:route AS varchar) IS NULL OR route = :route
+            ORDER BY duration_ms DESC
+            LIMIT :limit
+        """),
+        {"route": route, "limit": limit},
+    )
+    return [dict(row._mapping) for row in result.fetchall()]
@@ -0,0 +1,317 @@
+import asyncio
+import functools
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from app.services.disk import AsyncFileWriter, run_io, path_exists, unlink
+from app.utilities.file_response import make_content_disposition
+
+# S3 드라이버는 boto3가 있을 때만 사용 가능
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+
+# 저장소 드라이버
+# files.path_on_disk / blobs.path_on_disk에는 "드라이버:키" 형태로 저장한다. (예: local:blobs/ab/cd/abcd...)
+# 새로 저장하는 파일은 STORAGE_BACKEND로, 읽기/삭제는 키에 적힌 드라이버로 하므로 섞여 있어도 동작한다.
+# 드라이버 접두어가 없는 예전 값("data/blobs/...")은 현재 작업 디렉토리 기준 로컬 경로로 취급한다.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+LOCAL_STORAGE_ROOT = Path(os.getenv("LOCAL_STORAGE_ROOT", "data"))
+STORAGE_READ_CHUNK_SIZE = int(os.getenv("STORAGE_READ_CHUNK_SIZE", 256 * 1024))
+
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # MinIO 등 S3 호환 서버 (없으면 AWS)
+S3_REGION = os.getenv("S3_REGION")
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID")
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY")
+# 멀티파트 파트 크기 (S3 최소 5MB)와 동시에 올리는 파트 수 - 메모리는 최대 파트 크기 x 동시 개수
+S3_MULTIPART_CHUNK_SIZE = max(5 * 1024 * 1024, int(os.getenv("S3_MULTIPART_CHUNK_SIZE", 16 * 1024 * 1024)))
+S3_MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", "4"))
+S3_MAX_CONNECTIONS = int(os.getenv("S3_MAX_CONNECTIONS", "16"))
+
+# os.stat_result와 같은 이름의 필드 (파일 응답의 ETag/Last-Modified 계산에 그대로 사용)
+StorageStat = namedtuple("StorageStat", ["st_size", "st_mtime", "st_mtime_ns"])
+
+class StorageBackend:
+    """저장소 드라이버 인터페이스 (key는 드라이버 안의 상대 경로)"""
+    name = ""
+
+    def qualify(self, key: str) -> str:
+        """DB에 저장할 "드라이버:키" 값"""
+        return f"{self.name}:{key}"
+
+    def local_path(self, key: str) -> Optional[str]:
+        """로컬 파일 경로 (sendfile 등에 사용, 원격 저장소면 None)"""
+        return None
+
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes]):
+        raise NotImplementedError
+
+    async def put_file(self, key: str, source_path: Path):
+        """로컬 임시 파일을 저장소에 올리고 임시 파일은 삭제"""
+        await self.copy_file(key, source_path)
+        await unlink(source_path)
+
+    async def copy_file(self, key: str, source_path: Path):
+        """로컬 파일을 저장소에 올림 (파일은 그대로 둠)"""
+        await self.put_stream(key, self._read_file(source_path))
+
+    def open_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """[start, end] 범위(end 포함, None이면 끝까지)를 청크 단위로 읽음"""
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        """삭제 (없어도 오류 없음)"""
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def stat(self, key: str) -> StorageStat:
+        """크기/수정시각 (없으면 FileNotFoundError)"""
+        raise NotImplementedError
+
+    def presign_url(self, key: str, expires_in: int, filename: str, media_type: str) -> Optional[str]:
+        """저장소가 직접 내려주는 만료 URL (지원하지 않으면 None)"""
+        return None
+
+    async def download_to(self, key: str, dest_path: Path):
+        async with AsyncFileWriter(dest_path) as writer:
+            async for chunk in self.open_range(key):
+                await writer.write(chunk)
+
+    @staticmethod
+    async def _read_file(path: Path):
+        handle = await run_io(open, path, "rb")
+        try:
+            while chunk := await run_io(handle.read, S3_MULTIPART_CHUNK_SIZE):
+                yield chunk
+        finally:
+            await run_io(handle.close)
+
+class LocalStorage(StorageBackend):
+    """로컬 파일 시스템 (root 아래에 key 경로로 저장)"""
+    name = "local"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def local_path(self, key: str) -> Optional[str]:
+        return str(self._path(key))
+
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes]):
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        async with AsyncFileWriter(tmp_path) as writer:
+            async for chunk in chunks:
+                await writer.write(chunk)
+        await run_io(os.replace, tmp_path, path)
+
+    async def put_file(self, key: str, source_path: Path):
+        # 같은 파일 시스템이면 복사 없이 이름만 바꿈
+        await run_io(_move_file, Path(source_path), self._path(key))
+
+    async def open_range(self, key: str, start: int = 0, end: Optional[int] = None):
+        handle = await run_io(open, self._path(key), "rb")
+        try:
+            await run_io(handle.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = STORAGE_READ_CHUNK_SIZE if remaining is None else min(STORAGE_READ_CHUNK_SIZE, remaining)
+                chunk = await run_io(handle.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_io(handle.close)
+
+    async def delete(self, key: str):
+        await unlink(self._path(key))
+
+    async def exists(self, key: str) -> bool:
+        return await path_exists(self._path(key))
+
+    async def stat(self, key: str) -> StorageStat:
+        stat_result = await run_io(os.stat, self._path(key))
+        return StorageStat(stat_result.st_size, stat_result.st_mtime, stat_result.st_mtime_ns)
+
+def _move_file(source: Path, dest: Path):
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, dest)
+
+class S3Storage(StorageBackend):
+    """S3 호환 저장소 (boto3 호출은 전용 스레드풀에서 실행)
+
+    큰 파일은 파트를 동시에 올리는 멀티파트 업로드로, 읽기는 Range GET으로 필요한 범위만 받는다.
+    """
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, region: Optional[str] = None,
+                 access_key_id: Optional[str] = None, secret_access_key: Optional[str] = None):
+        if boto3 is None:
+            raise RuntimeError("boto3 is required for the s3 storage backend")
+        if not bucket:
+            raise RuntimeError("S3_BUCKET is not set")
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=BotoConfig(max_pool_connections=S3_MAX_CONNECTIONS, retries={"max_attempts": 5, "mode": "standard"}),
+        )
+        self._executor = ThreadPoolExecutor(max_workers=S3_MAX_CONNECTIONS, thread_name_prefix="s3")
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes]):
+        buffer = bytearray()
+        upload_id = None
+        part_number = 0
+        parts = []
+        tasks = []
+        # 동시에 올리는 파트 수만큼만 메모리에 둠
+        semaphore = asyncio.Semaphore(S3_MULTIPART_CONCURRENCY)
+
+        async def upload_part(number: int, body: bytes):
+            try:
+                result = await self._call(
+                    self.client.upload_part,
+                    Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body,
+                )
+                parts.append({"PartNumber": number, "ETag": result["ETag"]})
+            finally:
+                semaphore.release()
+
+        async def start_part(body: bytes):
+            nonlocal part_number
+            await semaphore.acquire()
+            failed = next((task for task in tasks if task.done() and task.exception()), None)
+            if failed is not None:
+                semaphore.release()
+                raise failed.exception()
+            part_number += 1
+            tasks.append(asyncio.ensure_future(upload_part(part_number, body)))
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                while len(buffer) >= S3_MULTIPART_CHUNK_SIZE:
+                    if upload_id is None:
+                        result = await self._call(self.client.create_multipart_upload, Bucket=self.bucket, Key=key)
+                        upload_id = result["UploadId"]
+                    body = bytes(buffer[:S3_MULTIPART_CHUNK_SIZE])
+                    del buffer[:S3_MULTIPART_CHUNK_SIZE]
+                    await start_part(body)
+
+            if upload_id is None:
+                # 파트 하나보다 작으면 한 번에 올림
+                await self._call(self.client.put_object, Bucket=self.bucket, Key=key, Body=bytes(buffer))
+                return
+
+            if buffer:
+                await start_part(bytes(buffer))
+            await asyncio.gather(*tasks)
+            await self._call(
+                self.client.complete_multipart_upload,
+                Bucket=self.bucket, Key=key, UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])},
+            )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if upload_id is not None:
+                await self._call(self.client.abort_multipart_upload, Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    async def open_range(self, key: str, start: int = 0, end: Optional[int] = None):
+        try:
+            result = await self._call(
+                self.client.get_object,
+                Bucket=self.bucket, Key=key, Range=f"bytes={start}-{'' if end is None else end}",
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                raise FileNotFoundError(key)
+            raise
+        body = result["Body"]
+        try:
+            while chunk := await self._call(body.read, STORAGE_READ_CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+    def presign_url(self, key: str, expires_in: int, filename: str, media_type: str) -> Optional[str]:
+        # 서명은 로컬 계산이라 네트워크 호출 없음
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ResponseContentDisposition": make_content_disposition(filename),
+                "ResponseContentType": media_type,
+            },
+            ExpiresIn=expires_in,
+        )
+
+    async def delete(self, key: str):
+        await self._call(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    async def stat(self, key: str) -> StorageStat:
+        try:
+            result = await self._call(self.client.head_object, Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                raise FileNotFoundError(key)
+            raise
+        mtime = result["LastModified"].timestamp()
+        return StorageStat(result["ContentLength"], mtime, int(mtime * 1_000_000_000))
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await self.stat(key)
+            return True
+        except FileNotFoundError:
+            return False
+
+_backends = {}
+# 드라이버 접두어가 없는 예전 경로 (현재 작업 디렉토리 기준)
+_legacy_storage = LocalStorage(Path("."))
+
+def get_storage(name: str = STORAGE_BACKEND) -> StorageBackend:
+    """이름으로 드라이버 조회 (처음 사용할 때 생성)"""
+    backend = _backends.get(name)
+    if backend is None:
+        if name == LocalStorage.name:
+            backend = LocalStorage(LOCAL_STORAGE_ROOT)
+        elif name == S3Storage.name:
+            backend = S3Storage(S3_BUCKET, S3_ENDPOINT_URL, S3_REGION, S3_ACCESS_KEY_ID, S3_SECRET_ACCESS_KEY)
+        else:
+            raise RuntimeError(f"Unknown storage backend: {name}")
+        _backends[name] = backend
+    return backend
+
+def resolve_storage(stored_key: str) -> tuple:
+    """DB에 저장된 값 -> (드라이버, 드라이버 안의 키)"""
+    name, sep, key = stored_key.partition(":")
+    if sep and name in (LocalStorage.name, S3Storage.name):
+        return get_storage(name), key
+    return _legacy_storage, stored_key
+
+async def delete_stored(stored_key: str):
+    storage, key = resolve_storage(stored_key)
+    await storage.delete(key)
@@ -0,0 +1,125 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services.disk import run_io, path_exists, unlink
+from app.services.storage import resolve_storage
+from app.services.jobs import enqueue_job, job_handler
+
+# Pillow가 없으면 썸네일 기능만 비활성화
+try:
+    from app.utilities.image import render_thumbnails
+except ImportError:
+    render_thumbnails = None
+
+# 썸네일 캐시 (data/thumbnails/ab/cd/<내용 해시>/<크기>.webp)
+# 내용 해시로 찾으므로 같은 내용의 파일은 썸네일을 공유하고, 한 번 만든 썸네일은 바뀌지 않는다.
+THUMBNAIL_ROOT = Path("data/thumbnails")
+THUMBNAIL_SIZES = (128, 256, 1024)
+THUMBNAIL_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp", "bmp", "tif", "tiff"}
+THUMBNAIL_JOB = "thumbnail"
+# 리사이즈는 CPU를 쓰므로 이벤트 루프가 아닌 프로세스 풀에서, 동시에 THUMBNAIL_WORKERS개까지만 실행
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+# 이보다 큰 원본은 썸네일을 만들지 않음
+THUMBNAIL_MAX_SOURCE_SIZE = int(os.getenv("THUMBNAIL_MAX_SOURCE_SIZE", 50 * 1024 * 1024))
+
+_pool = None
+_inflight = {}
+
+def thumbnails_supported(name: str, file_size: int) -> bool:
+    ext = name.rpartition(".")[2].lower()
+    return render_thumbnails is not None and ext in THUMBNAIL_EXTENSIONS and file_size <= THUMBNAIL_MAX_SOURCE_SIZE
+
+def get_thumbnail_dir(digest: str) -> Path:
+    return THUMBNAIL_ROOT / digest[:2] / digest[2:4] / digest
+
+def get_thumbnail_path(digest: str, size: int) -> Path:
+    return get_thumbnail_dir(digest) / f"{size}.webp"
+
+def get_invalid_marker_path(digest: str) -> Path:
+    # 디코딩할 수 없는 원본 표시 (요청마다 다시 디코딩하지 않도록)
+    return get_thumbnail_dir(digest) / "invalid"
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # fork는 부모의 스레드(디스크 I/O 풀 등)와 이벤트 루프 상태를 복제하므로 spawn 사용
+        _pool = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+async def _render(digest: str, path_on_disk: str):
+    targets = [(size, str(get_thumbnail_path(digest, size))) for size in THUMBNAIL_SIZES]
+    loop = asyncio.get_running_loop()
+
+    # Pillow는 로컬 파일이 필요하므로 원격 저장소의 원본은 임시 파일로 받아서 사용
+    storage, key = resolve_storage(path_on_disk)
+    source_path = storage.local_path(key)
+    tmp_path = None
+    if source_path is None:
+        tmp_path = THUMBNAIL_ROOT / "tmp" / f"{uuid.uuid4().hex}.tmp"
+        await storage.download_to(key, tmp_path)
+        source_path = str(tmp_path)
+    try:
+        await loop.run_in_executor(
+            _get_pool(), render_thumbnails, source_path, targets, THUMBNAIL_QUALITY, str(get_invalid_marker_path(digest))
+        )
+    finally:
+        if tmp_path is not None:
+            await unlink(tmp_path)
+
+async def generate_thumbnails(digest: str, path_on_disk: str):
+    """모든 크기의 썸네일 생성 (이미 있으면 건너뜀, 같은 내용을 동시에 요청하면 한 번만 생성)
+
+    이미지가 아니거나(디코딩에 실패했던 원본 포함) 원본이 없으면 OSError
+    """
+    if await path_exists(get_thumbnail_path(digest, THUMBNAIL_SIZES[0])):
+        return
+    if await path_exists(get_invalid_marker_path(digest)):
+        raise OSError(f"{digest} is not a decodable image")
+    task = _inflight.get(digest)
+    if task is None:
+        task = asyncio.ensure_future(_render(digest, path_on_disk))
+        _inflight[digest] = task
+        task.add_done_callback(lambda _: _inflight.pop(digest, None))
+    await asyncio.shield(task)
+
+async def get_thumbnail(digest: str, path_on_disk: str, size: int) -> Path:
+    """요청한 크기의 썸네일 경로 (없으면 처음 요청할 때 생성)"""
+    thumbnail_path = get_thumbnail_path(digest, size)
+    if not await path_exists(thumbnail_path):
+        await generate_thumbnails(digest, path_on_disk)
+    return thumbnail_path
+
+async def schedule_thumbnails(db: AsyncSession, digest: str, path_on_disk: str, name: str, file_size: int):
+    """업로드와 같은 트랜잭션에서 썸네일 생성 작업 등록 (commit은 호출자가 수행)"""
+    if not thumbnails_supported(name, file_size):
+        return
+    await enqueue_job(
+        db,
+        THUMBNAIL_JOB,
+        {"digest": digest, "path_on_disk": path_on_disk},
+        dedupe_key=f"{THUMBNAIL_JOB}:{digest}",
+    )
+
+@job_handler(THUMBNAIL_JOB)
+async def _thumbnail_job(payload: dict):
+    try:
+        await generate_thumbnails(payload["digest"], payload["path_on_disk"])
+    except OSError as e:
+        # 손상된 이미지(디코딩 오류는 InvalidImageError로 바뀜)나 이미 지워진 원본은 다시 시도해도 같으므로
+        # 재시도하지 않음 (요청 시 404)
+        print(f"Skipping thumbnail for {payload['digest']}: {e}")
+
+async def remove_thumbnails(digest: str):
+    await run_io(shutil.rmtree, get_thumbnail_dir(digest), True)
+
+def shutdown_thumbnail_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
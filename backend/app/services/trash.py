@@ -0,0 +1,73 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# 폴더 휴지통
+# 폴더를 휴지통으로 보내면 하위 트리 전체(폴더 + 파일)에 is_deleted와 trash_root_id(휴지통으로 보낸 폴더 id)를 표시한다.
+# 휴지통 목록에는 trash_root_id = id인 폴더 하나만 접힌 항목으로 보이고,
+# 복원/영구 삭제는 trash_root_id 인덱스로 하위 트리를 한 번에 찾는다.
+# 먼저 따로 휴지통에 들어가 있던 항목은 자기 trash_root_id를 유지하므로 함께 복원되지 않는다.
+
+async def trash_folders(db: AsyncSession, owner_id: int, roots: list):
+    """폴더들을 하위 트리째 휴지통으로 (문장 하나, commit은 호출자가 수행)
+
+    roots: (폴더 id, 경로) 목록 - 서로 포함 관계가 없어야 함
+    부모 폴더 집계에서 빼는 것은 호출자가 수행한다.
+    """
+    if not roots:
+        return
+    await db.execute(
+        text("""
+            WITH roots AS (
+                SELECT unnest(CAST(:root_ids AS int[])) AS id,
+                       unnest(CAST(:root_paths AS text[])) AS path
+            ),
+            marked AS (
+                UPDATE folders f
+                SET is_deleted = true, deleted_at = now(), trash_root_id = r.id
+                FROM roots r
+                WHERE f.owner_id = :owner_id AND f.path LIKE r.path || '%' AND f.is_deleted = false
+                RETURNING f.id, f.trash_root_id
+            )
+            UPDATE files
+            SET is_deleted = true, deleted_at = now(), trash_root_id = m.trash_root_id
+            FROM marked m
+            WHERE files.parent_folder_id = m.id AND files.is_deleted = false
+        """),
+        {
+            "owner_id": owner_id,
+            "root_ids": [root_id for root_id, _ in roots],
+            "root_paths": [path for _, path in roots],
+        }
+    )
+
+async def restore_folders(db: AsyncSession, owner_id: int, root_ids: list):
+    """휴지통으로 보냈던 폴더들의 하위 트리를 한 번에 복원 (문장 하나, commit은 호출자가 수행)"""
+    if not root_ids:
+        return
+    await db.execute(
+        text("""
+            WITH restored AS (
+                UPDATE folders
+                SET is_deleted = false, deleted_at = NULL, trash_root_id = NULL
+                WHERE owner_id = :owner_id AND trash_root_id = ANY(:root_ids)
+            )
+            UPDATE files
+            SET is_deleted = false, deleted_at = NULL, trash_root_id = NULL
+            WHERE owner_id = :owner_id AND trash_root_id = ANY(:root_ids)
+        """),
+        {"owner_id": owner_id, "root_ids": root_ids}
+    )
+
+async def get_subtree_files(db: AsyncSession, owner_id: int, paths: list) -> list:
+    """하위 트리들에 속한 모든 파일의 (content_hash, path_on_disk) (휴지통 여부 무관)"""
+    if not paths:
+        return []
+    result = await db.execute(
+        text("""
+            SELECT fi.content_hash, fi.path_on_disk FROM files fi
+            JOIN folders f ON f.id = fi.parent_folder_id
+            WHERE f.owner_id = :owner_id AND f.path LIKE ANY(:patterns)
+        """),
+        {"owner_id": owner_id, "patterns": [path + "%" for path in paths]}
+    )
+    return [(row[0], row[1]) for row in result.fetchall()]
@@ -0,0 +1,69 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+from app.services.blob import new_hasher
+
+# 청크 업로드 설정 (환경변수로 조정 가능)
+UPLOAD_ROOT = Path("data/uploads")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024))  # 8MB
+UPLOAD_MIN_CHUNK_SIZE = 256 * 1024  # 256KB
+UPLOAD_MAX_CHUNK_SIZE = int(os.getenv("UPLOAD_MAX_CHUNK_SIZE", 64 * 1024 * 1024))  # 64MB
+UPLOAD_MAX_FILE_SIZE = int(os.getenv("UPLOAD_MAX_FILE_SIZE", 50 * 1024 * 1024 * 1024))  # 50GB
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", 24))
+
+def get_chunk_count(total_size: int, chunk_size: int) -> int:
+    # 빈 파일도 청크 하나(0바이트)로 취급
+    return max(1, -(-total_size // chunk_size))
+
+def get_expected_chunk_size(total_size: int, chunk_size: int, index: int) -> int:
+    """index번째 청크가 가져야 하는 바이트 수 (마지막 청크만 짧을 수 있음)"""
+    chunk_count = get_chunk_count(total_size, chunk_size)
+    if index < chunk_count - 1:
+        return chunk_size
+    return total_size - chunk_size * (chunk_count - 1)
+
+def get_session_dir(upload_id: str) -> Path:
+    return UPLOAD_ROOT / upload_id
+
+def get_chunk_path(upload_id: str, index: int) -> Path:
+    return get_session_dir(upload_id) / f"{index:08d}.part"
+
+def get_chunk_temp_path(upload_id: str, index: int) -> Path:
+    return get_session_dir(upload_id) / f"{index:08d}.{uuid.uuid4().hex}.tmp"
+
+def commit_chunk(tmp_path: Path, upload_id: str, index: int):
+    """다 쓴 임시 청크를 rename 해서 반쯤 쓰인 청크가 보이지 않도록 함"""
+    os.replace(tmp_path, get_chunk_path(upload_id, index))
+
+def list_received_chunks(upload_id: str) -> list:
+    """이미 저장된 청크 번호 목록"""
+    session_dir = get_session_dir(upload_id)
+    if not session_dir.exists():
+        return []
+    return sorted(
+        int(entry.name.split(".")[0])
+        for entry in os.scandir(session_dir)
+        if entry.name.endswith(".part")
+    )
+
+def assemble_chunks(upload_id: str, chunk_count: int, destination: Path) -> tuple:
+    """청크들을 순서대로 이어 붙여 최종 파일을 만들고 (전체 크기, SHA-256)을 반환"""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    hasher = new_hasher()
+    total = 0
+    try:
+        with open(destination, "wb") as output:
+            for index in range(chunk_count):
+                with open(get_chunk_path(upload_id, index), "rb") as part:
+                    while data := part.read(1024 * 1024):
+                        output.write(data)
+                        hasher.update(data)
+                        total += len(data)
+    except Exception:
+        destination.unlink(missing_ok=True)
+        raise
+    return total, hasher.hexdigest()
+
+def remove_session_dir(upload_id: str):
+    shutil.rmtree(get_session_dir(upload_id), ignore_errors=True)
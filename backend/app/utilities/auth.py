@@ -1,21 +1,90 @@
+from collections import OrderedDict
+from typing import Optional
 from fastapi import HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.model.user import User
 from app.utilities.jwt import verify_token
+from app.utilities.profiling import current_request_stats
+import os
+import time
 
-async def get_user_id(authorization: str, db: AsyncSession) -> int:    
+# 검증된 토큰 캐시 설정 (워커 프로세스별 캐시)
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", 300))
+
+class TokenCache:
+    """검증된 access token → user_id 캐시 (LRU + TTL)"""
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # token -> (user_id, expires_at)
+
+    def get(self, token: str) -> Optional[int]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return user_id
+
+    def set(self, token: str, user_id: int, token_expires_at: Optional[float] = None):
+        # 토큰 자체의 만료 시각을 넘겨서 캐시하지 않음
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+
+        self._entries.pop(token, None)
+        self._entries[token] = (user_id, expires_at)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+token_cache = TokenCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+
+async def get_user_id(authorization: str, db: AsyncSession) -> int:
+    # 인증에 걸린 시간을 현재 요청에 더함 (Server-Timing의 auth)
+    started = time.perf_counter()
+    try:
+        return await _resolve_user_id(authorization, db)
+    finally:
+        stats = current_request_stats()
+        if stats is not None:
+            stats.auth_time += time.perf_counter() - started
+
+async def _resolve_user_id(authorization: str, db: AsyncSession) -> int:
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Invalid token format")
-        
+
     token = authorization.replace("Bearer ", "")
+
+    # 캐시에 있으면 JWT 디코딩/DB 조회 없이 바로 반환
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
     payload = verify_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
-    
+
+    # 새 토큰은 user_id를 포함하므로 DB 조회가 필요 없고, 토큰이 가리키는 사용자가 바뀌지 않으므로 캐시해도 됨
+    user_id = payload.get("user_id")
+    if user_id is not None:
+        token_cache.set(token, user_id, payload.get("exp"))
+        return user_id
+
+    # user_id가 없는 예전 토큰은 매번 이메일로 조회 (캐시는 워커마다 따로라 이메일 변경을 다른 워커에 알릴 수 없으므로 캐시하지 않음)
     payload_user_email = payload.get("email")
-    query = select(User).where(User.email == payload_user_email)
+    query = select(User.id).where(User.email == payload_user_email)
     result = await db.execute(query)
-    user = result.scalars().first()
-    user_id = user.id
-    return user_id
\ No newline at end of file
+    user_id = result.scalar()
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user_id
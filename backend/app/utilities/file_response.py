@@ -0,0 +1,280 @@
+import os
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Optional
+from urllib.parse import quote
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# 디스크의 blob은 내용이 바뀌지 않으므로 오래 캐시해도 안전
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+MAX_RANGES = 16
+
+def make_etag(content_hash: Optional[str], stat_result: os.stat_result) -> str:
+    """강한 ETag (내용 해시가 있으면 해시, 없으면 크기+수정시각)"""
+    if content_hash:
+        return f'"{content_hash}"'
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+def make_content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+def accepts_encoding(request: Request, coding: str) -> bool:
+    """Accept-Encoding에 coding이 명시되어 있는지 (q=0은 거부)"""
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.partition(";")
+        if name.strip().lower() != coding:
+            continue
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+def parse_range_header(range_header: str, file_size: int):
+    """Range 헤더를 [(start, end)] 목록으로 변환 (end 포함)
+
+    문법이 잘못되었으면 None (Range 무시), 만족 가능한 범위가 없으면 빈 목록 (416).
+    """
+    unit, _, specs = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs:
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        start_str, sep, end_str = spec.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if start_str == "":
+                # bytes=-500 (마지막 500바이트)
+                suffix_length = int(end_str)
+                if suffix_length <= 0:
+                    continue
+                start, end = max(0, file_size - suffix_length), file_size - 1
+            else:
+                start = int(start_str)
+                end = int(end_str) if end_str else file_size - 1
+                if end_str and end < start:
+                    return None
+                end = min(end, file_size - 1)
+        except ValueError:
+            return None
+        if start < file_size and start <= end:
+            ranges.append((start, end))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    # 겹치거나 붙어 있는 범위 병합
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def _etag_matches(header_value: str, etag: str) -> bool:
+    if header_value.strip() == "*":
+        return True
+    candidates = [value.strip() for value in header_value.split(",")]
+    # If-None-Match는 약한 비교 (W/ 접두어 무시)
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def _if_range_matches(if_range: str, etag: str, stat_result: os.stat_result) -> bool:
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # If-Range는 강한 비교만 허용
+        return if_range == etag
+    try:
+        # 날짜는 보낸 Last-Modified와 정확히 같을 때만 일치 (RFC 9110, 더 나중 날짜라고 같은 내용이라는 보장은 없음)
+        return int(parsedate_to_datetime(if_range).timestamp()) == int(stat_result.st_mtime)
+    except (TypeError, ValueError):
+        return False
+
+class RangeFileResponse(Response):
+    """Range 요청(단일/다중)을 지원하는 파일 응답
+
+    서버가 http.response.zerocopysend 확장을 지원하면 sendfile로 전송하고,
+    아니면 스레드에서 청크 단위로 읽어 보내므로 파일 전체를 메모리에 올리지 않는다.
+    로컬 경로가 없는 원격 저장소는 open_range(start, end)로 필요한 범위만 받아서 보낸다.
+    """
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: Optional[str],
+        stat_result: os.stat_result,
+        ranges: Optional[list],
+        media_type: str,
+        headers: dict,
+        send_body: bool = True,
+        open_range: Optional[Callable] = None,
+    ):
+        self.path = path
+        self.open_range = open_range
+        self.file_size = stat_result.st_size
+        self.ranges = ranges
+        self.media_type = media_type
+        self.send_body = send_body
+        self.background = None
+        self.boundary = None
+        self.parts = []
+
+        if ranges is None:
+            self.status_code = 200
+            content_length = self.file_size
+        elif len(ranges) == 1:
+            self.status_code = 206
+            start, end = ranges[0]
+            headers["Content-Range"] = f"bytes {start}-{end}/{self.file_size}"
+            content_length = end - start + 1
+        else:
+            self.status_code = 206
+            self.boundary = uuid.uuid4().hex
+            content_length = 0
+            for start, end in ranges:
+                part_header = (
+                    f"--{self.boundary}\r\n"
+                    f"Content-Type: {media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{self.file_size}\r\n\r\n"
+                ).encode("latin-1")
+                self.parts.append((part_header, start, end))
+                content_length += len(part_header) + (end - start + 1) + 2
+            self.closing_boundary = f"--{self.boundary}--\r\n".encode("latin-1")
+            content_length += len(self.closing_boundary)
+            self.media_type = f"multipart/byteranges; boundary={self.boundary}"
+
+        headers["Content-Length"] = str(content_length)
+        self.init_headers(headers)
+
+    async def _send_range(self, file, start: int, end: int, send: Send, zerocopy: bool, more_body: bool):
+        if file is None:
+            async for chunk in self.open_range(start, end):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": more_body})
+            return
+
+        if zerocopy:
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": file.wrapped.fileno(),
+                "offset": start,
+                "count": end - start + 1,
+                "more_body": more_body,
+            })
+            return
+
+        await file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await file.read(min(self.chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({
+                "type": "http.response.body",
+                "body": chunk,
+                "more_body": more_body or remaining > 0,
+            })
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if not self.send_body or self.file_size == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if self.path is None:
+            await self._send_ranges(None, send, False)
+            return
+
+        zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await self._send_ranges(file, send, zerocopy)
+
+    async def _send_ranges(self, file, send: Send, zerocopy: bool):
+        if self.ranges is None:
+            await self._send_range(file, 0, self.file_size - 1, send, zerocopy, False)
+        elif self.boundary is None:
+            start, end = self.ranges[0]
+            await self._send_range(file, start, end, send, zerocopy, False)
+        else:
+            for part_header, start, end in self.parts:
+                await send({"type": "http.response.body", "body": part_header, "more_body": True})
+                await self._send_range(file, start, end, send, zerocopy, True)
+                await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+            await send({"type": "http.response.body", "body": self.closing_boundary, "more_body": False})
+
+def build_file_response(
+    request: Request,
+    path: Optional[str],
+    stat_result: os.stat_result,
+    filename: str,
+    media_type: str,
+    content_hash: Optional[str] = None,
+    disposition: str = "attachment",
+    open_range: Optional[Callable] = None,
+    cache_control: str = IMMUTABLE_CACHE_CONTROL,
+    extra_headers: Optional[dict] = None,
+) -> Response:
+    """조건부 요청(If-None-Match/If-Range), Range, HEAD를 처리한 파일 응답 생성
+
+    path가 없으면 (원격 저장소) open_range(start, end)로 본문을 읽는다.
+    extra_headers는 Content-Encoding/Vary 등 응답에 더할 헤더.
+    """
+    etag = make_etag(content_hash, stat_result)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": cache_control,
+        "Content-Disposition": make_content_disposition(filename, disposition),
+        "X-Filename": quote(filename),
+        **(extra_headers or {}),
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={
+            key: headers[key] for key in ("ETag", "Last-Modified", "Cache-Control", "Vary") if key in headers
+        })
+
+    ranges = None
+    range_header = request.headers.get("range")
+    if range_header:
+        if_range = request.headers.get("if-range")
+        if if_range is None or _if_range_matches(if_range, etag, stat_result):
+            ranges = parse_range_header(range_header, stat_result.st_size)
+            if ranges == []:
+                return Response(status_code=416, headers={
+                    "Content-Range": f"bytes */{stat_result.st_size}",
+                    "Accept-Ranges": "bytes",
+                    "ETag": etag,
+                })
+
+    return RangeFileResponse(
+        path=path,
+        stat_result=stat_result,
+        ranges=ranges,
+        media_type=media_type,
+        headers=headers,
+        send_body=request.method != "HEAD",
+        open_range=open_range,
+    )
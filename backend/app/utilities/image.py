@@ -0,0 +1,40 @@
+import os
+from PIL import Image, ImageOps
+
+# 썸네일 렌더링 (프로세스 풀의 자식 프로세스에서 실행되므로 Pillow 외에는 import하지 않음)
+
+class InvalidImageError(OSError):
+    """원본을 이미지로 디코딩할 수 없음 (다시 시도해도 같음)"""
+
+def render_thumbnails(source_path: str, targets: list, quality: int, invalid_marker: str) -> list:
+    """원본을 한 번만 디코딩해서 여러 크기의 WebP 썸네일을 만듦
+
+    targets: [(긴 변 최대 길이, 저장 경로)] - 큰 크기부터 줄여 가며 저장하고 저장한 경로 목록을 반환
+    디코딩할 수 없으면 invalid_marker 파일을 남기고 InvalidImageError
+    """
+    largest = max(size for size, _ in targets)
+    try:
+        with Image.open(source_path) as source:
+            # JPEG는 디코딩 단계에서 미리 축소 (큰 사진도 빠르고 메모리를 적게 씀)
+            source.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(source)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "PA", "P") else "RGB")
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        # 손상된 파일, 압축 폭탄(DecompressionBombError) 등 - OSError가 아닌 디코딩 오류도 있으므로 모두 잡음
+        message = f"{type(e).__name__}: {e}"
+        os.makedirs(os.path.dirname(invalid_marker), exist_ok=True)
+        with open(invalid_marker, "w") as marker:
+            marker.write(message)
+        raise InvalidImageError(message) from None
+
+    saved = []
+    for size, path in sorted(targets, reverse=True):
+        image.thumbnail((size, size), Image.LANCZOS)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        image.save(tmp_path, "WEBP", quality=quality)
+        os.replace(tmp_path, path)
+        saved.append(path)
+    return saved
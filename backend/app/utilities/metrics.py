@@ -0,0 +1,306 @@
+import asyncio
+import bisect
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable
+from app.utilities import profiling
+from app.utilities.profiling import _request_stats
+
+# 프로세스 내 지표 (Prometheus 텍스트 형식으로 노출)
+# - 기록은 dict 조회 + 정수 덧셈뿐이라 요청마다 기록해도 수 마이크로초 이내 (락 없음, 이벤트 루프 스레드에서만 기록)
+# - 여러 워커 프로세스로 띄울 때는 METRICS_DIR를 지정하면 워커마다 METRICS_FLUSH_INTERVAL_SECONDS마다
+#   <pid>.json으로 값을 내려 두고, /metrics 요청을 받은 워커가 모든 워커의 값을 합쳐서 응답한다.
+#   (종료된 워커의 파일은 무시하고 지움 - 그 워커의 카운터는 Prometheus에서 리셋으로 처리됨)
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL_SECONDS = float(os.getenv("METRICS_FLUSH_INTERVAL_SECONDS", "5"))
+
+# 기본 구간 상한
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+THROUGHPUT_BUCKETS = tuple(mb * 1024 * 1024 for mb in (1, 5, 10, 25, 50, 100, 250, 500, 1000))
+
+_metrics = {}
+_collectors = []
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        _metrics[name] = self
+
+    def snapshot(self) -> dict:
+        return {"type": self.kind, "help": self.help, "labels": self.labels, "values": list(self.values.items())}
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *label_values):
+        self.values[label_values] = value
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) - amount
+
+class Histogram(_Metric):
+    """구간별 개수(누적 아님) + 합계 + 개수, 노출할 때 누적으로 변환"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *label_values):
+        state = self.values.get(label_values)
+        if state is None:
+            # [구간별 개수..., +Inf 개수, 합계]
+            state = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def snapshot(self) -> dict:
+        data = super().snapshot()
+        data["buckets"] = self.buckets
+        return data
+
+def register_collector(collector: Callable[[], None]):
+    """노출 직전에 호출할 함수 등록 (풀 상태처럼 그때그때 읽는 Gauge 갱신용)"""
+    _collectors.append(collector)
+
+def snapshot() -> dict:
+    for collector in _collectors:
+        collector()
+    return {name: metric.snapshot() for name, metric in _metrics.items()}
+
+# --- 여러 워커 프로세스 ---
+
+def _snapshot_path(pid: int) -> Path:
+    return Path(METRICS_DIR) / f"{pid}.json"
+
+def _write_snapshot(data: str):
+    path = _snapshot_path(os.getpid())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(data)
+    os.replace(tmp_path, path)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _read_snapshots() -> list:
+    """다른 살아 있는 워커들의 마지막 값 (자기 자신은 제외, 종료된 워커 파일은 삭제)"""
+    snapshots = []
+    for path in Path(METRICS_DIR).glob("*.json"):
+        try:
+            pid = int(path.stem)
+        except ValueError:
+            continue
+        if pid == os.getpid():
+            continue
+        if not _pid_alive(pid):
+            path.unlink(missing_ok=True)
+            continue
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+def _merge(target: dict, other: dict):
+    for name, data in other.items():
+        current = target.get(name)
+        if current is None:
+            target[name] = {**data, "values": [(tuple(labels), value) for labels, value in data["values"]]}
+            continue
+        values = dict(current["values"])
+        for labels, value in data["values"]:
+            labels = tuple(labels)
+            existing = values.get(labels)
+            if existing is None:
+                values[labels] = value
+            elif current["type"] == "histogram":
+                values[labels] = [a + b for a, b in zip(existing, value)]
+            else:
+                # Gauge도 합계 (진행 중인 요청 수, 사용 중인 연결 수 등은 워커 합계가 의미 있음)
+                values[labels] = existing + value
+        current["values"] = list(values.items())
+
+def _merge_all(own: str) -> dict:
+    merged = {}
+    _merge(merged, json.loads(own))
+    if METRICS_DIR:
+        for other in _read_snapshots():
+            _merge(merged, other)
+    return merged
+
+# --- Prometheus 텍스트 형식 ---
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+def render_metrics(metrics: dict) -> str:
+    lines = []
+    for name, data in sorted(metrics.items()):
+        lines.append(f"# HELP {name} {data['help']}")
+        lines.append(f"# TYPE {name} {data['type']}")
+        label_names = data["labels"]
+        for label_values, value in sorted(data["values"], key=lambda item: tuple(map(str, item[0]))):
+            if data["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(label_names, label_values)} {_format_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(data["buckets"]) + ["+Inf"], value[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_number(float(bound))
+                bucket_labels = _format_labels(label_names, label_values, 'le="' + le + '"')
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(label_names, label_values)} {_format_number(value[-1])}")
+            lines.append(f"{name}_count{_format_labels(label_names, label_values)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+async def export_metrics() -> str:
+    """모든 워커의 값을 합친 Prometheus 텍스트"""
+    # 값 복사는 이벤트 루프에서 (기록과 겹치지 않게), 다른 워커 파일 읽기만 스레드에서
+    own = json.dumps(snapshot())
+    if METRICS_DIR:
+        return render_metrics(await asyncio.to_thread(_merge_all, own))
+    return render_metrics(_merge_all(own))
+
+_flush_task = None
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL_SECONDS)
+        try:
+            # 값 복사는 이벤트 루프에서 (기록과 겹치지 않게), 파일 쓰기만 스레드에서
+            data = json.dumps(snapshot())
+            await asyncio.to_thread(_write_snapshot, data)
+        except Exception as e:
+            print(f"Failed to write metrics snapshot: {e}")
+
+def start_metrics_flusher():
+    global _flush_task
+    if METRICS_DIR and _flush_task is None:
+        _flush_task = asyncio.ensure_future(_flush_loop())
+
+async def stop_metrics_flusher():
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        _flush_task = None
+    if METRICS_DIR:
+        _snapshot_path(os.getpid()).unlink(missing_ok=True)
+
+# --- HTTP 요청 지표 ---
+
+# 이 크기 이상 주고받은 요청만 전송 속도를 기록 (작은 응답은 처리 시간이 대부분이라 의미 없음)
+METRICS_THROUGHPUT_MIN_BYTES = int(os.getenv("METRICS_THROUGHPUT_MIN_BYTES", 1024 * 1024))
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency until the last response byte is sent", ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled")
+HTTP_UPLOAD_BYTES = Counter("http_upload_bytes_total", "Request body bytes received", ("route",))
+HTTP_DOWNLOAD_BYTES = Counter("http_download_bytes_total", "Response body bytes sent", ("route",))
+HTTP_TRANSFER_THROUGHPUT = Histogram(
+    "http_transfer_throughput_bytes_per_second",
+    "Per-request transfer rate for bodies of at least METRICS_THROUGHPUT_MIN_BYTES",
+    ("direction",),
+    THROUGHPUT_BUCKETS,
+)
+HTTP_REQUEST_DB_QUERIES = Histogram("http_request_db_queries", "SQL statements executed per request", ("route",), COUNT_BUCKETS)
+
+class MetricsMiddleware:
+    """요청마다 처리 시간, 주고받은 바이트, SQL 수를 기록하고 Server-Timing 헤더를 붙이는 ASGI 미들웨어
+
+    경로는 라우트 템플릿(/files/{file_id})으로 기록해 라벨 수가 늘지 않게 하고, 매칭되지 않은 요청은 "unmatched"로 묶는다.
+    BaseHTTPMiddleware와 달리 응답을 다시 감싸지 않으므로 스트리밍/sendfile 응답도 그대로 지나간다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats = profiling.new_request_stats()
+        token = _request_stats.set(stats)
+        status = 500
+        received = 0
+        sent = 0
+
+        async def receive_with_count():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def send_with_count(message):
+            nonlocal status, sent
+            message_type = message["type"]
+            if message_type == "http.response.body":
+                sent += len(message.get("body", b""))
+            elif message_type == "http.response.zerocopysend":
+                sent += message.get("count") or 0
+            elif message_type == "http.response.start":
+                status = message["status"]
+                if profiling.SERVER_TIMING:
+                    # 헤더를 보내는 시점까지의 값 (스트리밍 응답 본문을 만드는 동안의 SQL은 포함되지 않음)
+                    timing = profiling.server_timing(stats, time.perf_counter() - started)
+                    message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", timing.encode())]}
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive_with_count, send_with_count)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            _request_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            template = route.path if route is not None else "unmatched"
+            HTTP_REQUEST_DURATION.observe(elapsed, scope["method"], template, status)
+            HTTP_REQUEST_DB_QUERIES.observe(stats.queries, template)
+            if received:
+                HTTP_UPLOAD_BYTES.inc(template, amount=received)
+                if received >= METRICS_THROUGHPUT_MIN_BYTES:
+                    HTTP_TRANSFER_THROUGHPUT.observe(received / elapsed, "upload")
+            if sent:
+                HTTP_DOWNLOAD_BYTES.inc(template, amount=sent)
+                if sent >= METRICS_THROUGHPUT_MIN_BYTES:
+                    HTTP_TRANSFER_THROUGHPUT.observe(sent / elapsed, "download")
+            profiling.finish_request(scope["method"], template, status, elapsed, stats)
@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+# 목록 조회 페이지 크기
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(sort: str, order: str, value, row_id: int) -> str:
+    """정렬 키 + id를 담은 불투명 커서 생성"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, order, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, order: str, is_datetime: bool = False):
+    """커서를 (정렬 키 값, id)로 복원 (다른 정렬로 만든 커서는 거절)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, cursor_order, value, row_id = json.loads(raw)
+        if is_datetime:
+            value = datetime.fromisoformat(value)
+        row_id = int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if cursor_sort != sort or cursor_order != order:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    return value, row_id
+
+def paginate(query, sort_column, id_column, sort: str, order: str, cursor: Optional[str], limit: int, is_datetime: bool = False):
+    """(정렬 키, id) 복합 인덱스를 그대로 타는 keyset 페이지네이션 적용
+
+    OFFSET 없이 마지막으로 본 (정렬 키, id) 다음부터 읽으므로 깊이에 관계없이 일정한 속도.
+    다음 페이지 유무를 알기 위해 limit + 1개를 조회한다.
+    """
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort, order, is_datetime)
+        if order == "asc":
+            query = query.where(tuple_(sort_column, id_column) > tuple_(value, row_id))
+        else:
+            query = query.where(tuple_(sort_column, id_column) < tuple_(value, row_id))
+
+    if order == "asc":
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    else:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+
+    return query.limit(limit + 1)
+
+def split_page(rows: list, limit: int, sort: str, order: str, sort_attr: str):
+    """limit + 1개 조회 결과를 (페이지, 다음 커서)로 분리"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(sort, order, getattr(last, sort_attr), last.id)
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import random
+import re
+from contextvars import ContextVar
+from typing import Optional
+
+# 요청별 SQL 프로파일링
+# - 모든 요청: 실행한 SQL 수, DB 시간, 인증 시간을 모아 Server-Timing 헤더로 보내고,
+#   같은 모양의 SQL을 SQL_N_PLUS_ONE_THRESHOLD번 넘게 실행한 라우트는 경고를 남긴다. (N+1 조회)
+# - 샘플링: SQL_PROFILE_SAMPLE_RATE 비율의 요청은 실행한 SQL 목록(파라미터 제외)과 각각의 시간을 기록하고,
+#   SQL_PROFILE_SLOW_MS 이상 걸린 요청은 request_profiles 테이블에 남긴다. (가장 느린 SQL_PROFILE_KEEP개만 유지)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true", "yes", "on")
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))  # 0이면 검사 안 함
+SQL_PROFILE_SAMPLE_RATE = float(os.getenv("SQL_PROFILE_SAMPLE_RATE", "0"))  # 0이면 샘플링 안 함, 1이면 모든 요청
+SQL_PROFILE_SLOW_MS = float(os.getenv("SQL_PROFILE_SLOW_MS", "500"))
+SQL_PROFILE_KEEP = int(os.getenv("SQL_PROFILE_KEEP", "500"))
+# 요청 하나에서 기록하는 SQL 수 상한 (넘는 SQL은 수만 셈)
+SQL_PROFILE_MAX_STATEMENTS = int(os.getenv("SQL_PROFILE_MAX_STATEMENTS", "200"))
+# 동시에 저장 중인 프로파일이 이보다 많으면 버림 (DB가 느릴 때 프로파일 저장이 부하를 더하지 않도록)
+SQL_PROFILE_MAX_PENDING = 10
+
+# 요청별 집계 (미들웨어가 요청마다 만들고, DB 이벤트와 인증이 현재 요청에 더함)
+class RequestStats:
+    __slots__ = ("queries", "db_time", "auth_time", "statements", "trace", "trace_dropped")
+
+    def __init__(self, sampled: bool = False):
+        self.queries = 0
+        self.db_time = 0.0
+        self.auth_time = 0.0
+        self.statements = {}  # SQL 문자열 -> 실행 횟수
+        self.trace = [] if sampled else None  # 샘플링된 요청만: [(SQL, 초)]
+        self.trace_dropped = 0
+
+    def statement_started(self, statement: str):
+        self.queries += 1
+        # 바인딩된 SQL 문자열은 컴파일 캐시에서 같은 객체가 재사용되므로 dict 조회가 빠름
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def statement_finished(self, statement: str, elapsed: float):
+        self.db_time += elapsed
+        if self.trace is not None:
+            if len(self.trace) < SQL_PROFILE_MAX_STATEMENTS:
+                self.trace.append((statement, elapsed))
+            else:
+                self.trace_dropped += 1
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+def new_request_stats() -> RequestStats:
+    return RequestStats(sampled=SQL_PROFILE_SAMPLE_RATE > 0 and random.random() < SQL_PROFILE_SAMPLE_RATE)
+
+def server_timing(stats: RequestStats, elapsed: float) -> str:
+    """Server-Timing 헤더 값 (밀리초, app은 응답 헤더를 보내기까지 걸린 시간)"""
+    return (
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+        f"auth;dur={stats.auth_time * 1000:.1f}, "
+        f"app;dur={elapsed * 1000:.1f}"
+    )
+
+# --- N+1 검사 ---
+
+# asyncpg는 파라미터에 형 변환을 붙여 보냄 (예: $1::INTEGER, $2::TIMESTAMP WITHOUT TIME ZONE, $3::INTEGER[])
+_PARAM = re.compile(r"\$\d+(?:::\w+(?: WITH(?:OUT)? TIME ZONE)?(?:\(\d+(?:, \d+)?\))?(?:\[\])*)?|%\(\w+\)s")
+_PARAM_LIST = re.compile(r"\(\?(?:, \?)*\)")
+
+def statement_shape(statement: str) -> str:
+    """파라미터 번호와 IN (...) 목록 길이를 지운 SQL (목록 길이만 다른 SQL을 같은 모양으로 묶음)"""
+    return _PARAM_LIST.sub("(?, ...)", _PARAM.sub("?", " ".join(statement.split())))
+
+def repeated_statements(stats: RequestStats, threshold: int) -> list:
+    """threshold번 넘게 실행된 SQL 모양과 횟수 (많은 순)"""
+    counts = {}
+    for statement, count in stats.statements.items():
+        shape = statement_shape(statement)
+        counts[shape] = counts.get(shape, 0) + count
+    return sorted(((shape, count) for shape, count in counts.items() if count > threshold), key=lambda item: -item[1])
+
+# --- 요청 마무리 ---
+
+_pending = set()
+
+def finish_request(method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+    """요청이 끝난 뒤 N+1 경고와 느린 요청 저장 (미들웨어에서 요청 context를 되돌린 뒤 호출)"""
+    # 전체 SQL 수가 기준 이하면 어떤 모양도 기준을 넘을 수 없으므로 모양 계산을 건너뜀
+    if 0 < SQL_N_PLUS_ONE_THRESHOLD < stats.queries:
+        for shape, count in repeated_statements(stats, SQL_N_PLUS_ONE_THRESHOLD):
+            print(f"Possible N+1 query on {method} {route}: statement ran {count} times: {shape[:200]}")
+
+    if stats.trace is None or elapsed * 1000 < SQL_PROFILE_SLOW_MS:
+        return
+    if len(_pending) >= SQL_PROFILE_MAX_PENDING:
+        return
+    profile = {
+        "method": method,
+        "route": route,
+        "status": status,
+        "duration_ms": round(elapsed * 1000, 3),
+        "db_ms": round(stats.db_time * 1000, 3),
+        "auth_ms": round(stats.auth_time * 1000, 3),
+        "query_count": stats.queries,
+        "statements": [{"sql": statement, "ms": round(seconds * 1000, 3)} for statement, seconds in stats.trace],
+        "statements_dropped": stats.trace_dropped,
+    }
+    task = asyncio.ensure_future(_save_profile(profile))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+async def _save_profile(profile: dict):
+    # database 모듈이 이 모듈을 쓰므로 저장할 때 가져옴
+    from app.services.request_profiles import save_request_profile
+    try:
+        await save_request_profile(profile, SQL_PROFILE_KEEP)
+    except Exception as e:
+        print(f"Failed to save request profile for {profile['method']} {profile['route']}: {e}")
@@ -0,0 +1,62 @@
+import base64
+import hashlib
+import hmac
+import json
+import math
+import os
+import time
+from typing import Optional
+from fastapi import HTTPException
+from app.utilities.jwt import SECRET_KEY
+
+# 서명된 다운로드 URL (DB 조회와 로그인 없이 내려받을 수 있는 만료 시각이 있는 링크)
+# 토큰 = base64(내용) + "." + base64(HMAC-SHA256(내용)), 내용에는 저장소 키와 파일 이름, 만료 시각이 들어 있다.
+# 파일을 지워도 blob이 정리되기 전까지는 만료 시각까지 받을 수 있으므로 만료 시간을 짧게 유지한다.
+DOWNLOAD_URL_SECRET = os.getenv("DOWNLOAD_URL_SECRET") or SECRET_KEY
+DOWNLOAD_URL_TTL_SECONDS = int(os.getenv("DOWNLOAD_URL_TTL_SECONDS", "3600"))
+DOWNLOAD_URL_MAX_TTL_SECONDS = int(os.getenv("DOWNLOAD_URL_MAX_TTL_SECONDS", 7 * 24 * 3600))
+# 만료 시각을 이 단위로 올림 - 같은 파일에 대해 잠시 동안 같은 URL이 나오므로 브라우저/프록시 캐시를 재사용함
+DOWNLOAD_URL_EXPIRY_STEP_SECONDS = int(os.getenv("DOWNLOAD_URL_EXPIRY_STEP_SECONDS", "300"))
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+def _signature(body: str) -> str:
+    if not DOWNLOAD_URL_SECRET:
+        raise HTTPException(status_code=503, detail="Signed download URLs are not configured")
+    return _b64encode(hmac.new(DOWNLOAD_URL_SECRET.encode(), body.encode(), hashlib.sha256).digest())
+
+def sign_download(stored_key: str, content_hash: str, filename: str, expires_in: int = DOWNLOAD_URL_TTL_SECONDS,
+                  codec: Optional[str] = None, file_size: Optional[int] = None) -> tuple:
+    """다운로드 토큰 생성 -> (토큰, 만료 시각 epoch 초)
+
+    압축 저장된 파일은 풀어서 보낼 수 있도록 codec과 원본 크기도 담는다.
+    """
+    step = max(1, DOWNLOAD_URL_EXPIRY_STEP_SECONDS)
+    expires_at = math.ceil((time.time() + expires_in) / step) * step
+    payload = {"k": stored_key, "h": content_hash, "n": filename, "e": expires_at}
+    if codec:
+        payload["c"] = codec
+        payload["s"] = file_size
+    body = _b64encode(json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode())
+    return f"{body}.{_signature(body)}", expires_at
+
+def verify_download(token: str) -> dict:
+    """서명과 만료 시각 확인 후 내용 반환 (DB 조회 없음)"""
+    body, _, signature = token.partition(".")
+    # 문자열끼리 비교하면 ASCII가 아닌 서명에서 TypeError가 나므로 바이트로 비교
+    if not signature or not hmac.compare_digest(signature.encode(), _signature(body).encode()):
+        raise HTTPException(status_code=403, detail="Invalid download link")
+    try:
+        payload = json.loads(_b64decode(body))
+        expires_at = int(payload["e"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=403, detail="Invalid download link")
+    if not isinstance(payload.get("k"), str) or not isinstance(payload.get("n"), str):
+        raise HTTPException(status_code=403, detail="Invalid download link")
+    if expires_at <= time.time():
+        raise HTTPException(status_code=410, detail="Download link expired")
+    return payload
@@ -0,0 +1,148 @@
+"""저장 시 압축(zstd)이 다운로드 처리량에 주는 영향 측정
+
+형식별 샘플 파일을 로컬 저장소에 원본/압축본으로 저장한 뒤, 동시에 여러 번 내려받으면서
+원본 크기 기준 처리량(MB/s)과 실제로 보내는 바이트를 비교한다.
+
+- raw        : 원본 그대로 저장, 그대로 전송
+- decompress : zstd로 저장, 풀면서 전송 (Accept-Encoding에 zstd가 없는 클라이언트)
+- passthrough: zstd로 저장, Content-Encoding: zstd로 그대로 전송
+
+DB 없이 실행되며 zstandard가 필요하다.
+
+    python compression_benchmark.py --size-mb 32 --downloads 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 현재 디렉토리를 Python 경로에 추가
+sys.path.append(str(Path(__file__).parent))
+
+from app.services import compression
+from app.services.storage import LocalStorage
+
+def make_log(size):
+    levels = ["INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR"]
+    lines = []
+    total = 0
+    while total < size:
+        line = (
+            f"2024-05-{random.randint(1, 28):02d}T{random.randint(0, 23):02d}:{random.randint(0, 59):02d}:{random.randint(0, 59):02d}Z "
+            f"{random.choice(levels)} worker-{random.randint(1, 16)} request_id={random.getrandbits(64):016x} "
+            f"path=/files/{random.randint(1, 100000)} status={random.choice([200, 200, 206, 304, 404])} "
+            f"elapsed_ms={random.random() * 200:.2f}\n"
+        )
+        lines.append(line)
+        total += len(line)
+    return "".join(lines).encode()[:size]
+
+def make_csv(size):
+    rows = ["id,name,file_size,parent_folder_id,owner_id,created_at\n"]
+    total = len(rows[0])
+    row_id = 0
+    while total < size:
+        row_id += 1
+        row = f"{row_id},report_{random.randint(1, 5000)}.txt,{random.randint(0, 10 ** 8)},{random.randint(1, 2000)},{random.randint(1, 50)},2024-05-01 12:00:00\n"
+        rows.append(row)
+        total += len(row)
+    return "".join(rows).encode()[:size]
+
+def make_json(size):
+    items = []
+    total = 0
+    while total < size:
+        item = json.dumps({"id": random.randint(1, 10 ** 6), "name": f"file_{random.randint(1, 10 ** 4)}.txt", "tags": ["a", "b"], "size": random.randint(0, 10 ** 7)})
+        items.append(item)
+        total += len(item) + 2
+    return ("[" + ",\n".join(items) + "]").encode()[:size]
+
+SAMPLES = {
+    "log": make_log,
+    "csv": make_csv,
+    "json": make_json,
+    "random": os.urandom,
+}
+
+async def drain(chunks):
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+    return total
+
+async def measure(name, open_body, original_size, downloads):
+    started = time.perf_counter()
+    sent = await asyncio.gather(*[drain(open_body()) for _ in range(downloads)])
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": name,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_mb_s": round(original_size * downloads / elapsed / (1024 * 1024), 1),
+        "bytes_sent_per_download": sent[0],
+    }
+
+async def run_sample(kind, size, downloads, storage, workdir):
+    raw_path = Path(workdir) / f"{kind}.tmp"
+    raw_path.write_bytes(SAMPLES[kind](size))
+
+    started = time.perf_counter()
+    compressed_path, stored_size = await compression.compress_file(raw_path, compression.CODEC_ZSTD)
+    compress_elapsed = time.perf_counter() - started
+    sample_ratio = await asyncio.to_thread(compression._sample_ratio, raw_path)
+
+    await storage.put_file(f"{kind}.zst", compressed_path)
+    await storage.put_file(kind, raw_path)
+
+    results = [
+        await measure("raw", lambda: storage.open_range(kind), size, downloads),
+        await measure("decompress", lambda: compression.open_decoded(storage, f"{kind}.zst", compression.CODEC_ZSTD), size, downloads),
+        await measure("passthrough", lambda: storage.open_range(f"{kind}.zst"), size, downloads),
+    ]
+    return {
+        "sample": kind,
+        "original_bytes": size,
+        "stored_bytes": stored_size,
+        "ratio": round(size / stored_size, 2),
+        "sample_ratio": round(sample_ratio, 2),
+        "would_compress": sample_ratio >= compression.STORAGE_COMPRESSION_MIN_RATIO,
+        "compress_mb_s": round(size / compress_elapsed / (1024 * 1024), 1),
+        "downloads": results,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=32)
+    parser.add_argument("--downloads", type=int, default=8, help="동시에 내려받는 수")
+    parser.add_argument("--samples", default=",".join(SAMPLES), help="측정할 형식 (쉼표로 구분)")
+    parser.add_argument("--dir", default=None, help="임시 파일을 쓸 디렉토리 (기본: 시스템 임시 디렉토리)")
+    args = parser.parse_args()
+
+    if compression.zstandard is None:
+        sys.exit("zstandard is not installed")
+
+    random.seed(0)
+    size = int(args.size_mb * 1024 * 1024)
+    with tempfile.TemporaryDirectory(dir=args.dir) as workdir:
+        storage = LocalStorage(Path(workdir) / "storage")
+        results = [
+            await run_sample(kind, size, args.downloads, storage, workdir)
+            for kind in args.samples.split(",")
+        ]
+
+    print(json.dumps({
+        "settings": {
+            "level": compression.STORAGE_COMPRESSION_LEVEL,
+            "min_ratio": compression.STORAGE_COMPRESSION_MIN_RATIO,
+            "size_mb": args.size_mb,
+            "downloads": args.downloads,
+        },
+        "results": results,
+    }, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
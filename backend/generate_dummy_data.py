@@ -1,19 +1,42 @@
+"""더미 데이터 생성
+
+기본 모드는 ORM으로 사용자 100명, 폴더 1,000,000개(Depth 10까지), 파일 10,000개를 만든다.
+
+--bulk 모드는 COPY(asyncpg copy_records_to_table)로 여러 프로세스가 나눠서 적재한다. (1억 행 규모까지)
+- id를 미리 예약해서 클라이언트에서 정하므로 부모 폴더를 다시 조회하지 않는다.
+- 폴더 트리는 루트 폴더마다 fanout개씩 자식을 두는 너비 우선 번호로 정해서, 부모/경로/소유자를 번호만으로 계산한다.
+  (워커마다 메모리를 거의 쓰지 않고, 워커 수와 관계없이 같은 시드면 같은 데이터)
+- 깊이별로 순서대로 적재하므로(같은 깊이는 병렬) 부모 폴더가 항상 먼저 들어간다.
+- 집계 컬럼(file_count, total_size)은 적재 후 SQL로 한 번에 채운다.
+- --sparse-files를 주면 파일마다 크기만큼의 sparse 파일을 로컬 저장소에 만들어서 다운로드/I/O 벤치마크에서 읽을 수 있게 한다.
+- 적재 중에는 앱을 멈춰 둘 것 (id 범위를 테이블의 최대 id 뒤로 예약함)
+
+    python generate_dummy_data.py
+    python generate_dummy_data.py --bulk --users 1000 --folders 100000000 --files 10000000 --workers 8
+    python generate_dummy_data.py --bulk --folders 10000 --files 100000 --sparse-files --defer-indexes
+"""
+import argparse
 import asyncio
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from pathlib import Path
 
 # 현재 디렉토리를 Python 경로에 추가
 sys.path.append(str(Path(__file__).parent))
 
-from app.database import get_async_db, AsyncSessionLocal
+from app.database import ASYNC_DATABASE_URL, AsyncSessionLocal, get_async_db
 from app.model.user import User
 from app.model.folder import Folder
 from app.model.file import File
+from app.services.folder_tree import rebuild_folder_paths
+from app.services.folder_stats import verify_folder_stats
 from datetime import datetime, timedelta
 import random
+import time
 import uuid
-from sqlalchemy import select, func
+from sqlalchemy import select, func, text
 import bcrypt
 
 async def generate_dummy_data():
@@ -168,6 +191,12 @@ async def generate_dummy_data():
                 total_created = target_total
                 print(f"랜덤 배치 완료 (총 {total_created:,}개)")
             
+            # 폴더 경로(materialized path) 계산
+            print("폴더 경로 계산 중...")
+            await rebuild_folder_paths(db)
+            await db.commit()
+            print("폴더 경로 계산 완료")
+            
             # 3. 파일 데이터 생성 (10,000개)
             print("파일 데이터 생성 중...")
             
@@ -191,7 +220,7 @@ async def generate_dummy_data():
                     
                     file = File(
                         name=f"file_{i}{extension}",
-                        path_on_disk=f"data/files/{owner_id}/{datetime.now().year}/{datetime.now().month:02d}/{uuid.uuid4()}{extension}",
+                        path_on_disk=f"local:files/{owner_id}/{datetime.now().year}/{datetime.now().month:02d}/{uuid.uuid4()}{extension}",
                         file_size=file_size,
                         parent_folder_id=folder_id,
                         owner_id=owner_id,
@@ -202,6 +231,9 @@ async def generate_dummy_data():
                 await db.commit()
                 print(f"파일 배치 {batch_start//file_batch_size + 1} 완료 ({batch_end - batch_start}개)")
             
+            # 폴더 집계(파일 수, 하위 폴더 수, 전체 크기) 채우기
+            await verify_folder_stats()
+            
             # 최종 통계 출력
             user_count = await db.execute(select(func.count(User.id)))
             folder_count = await db.execute(select(func.count(Folder.id)))
@@ -246,5 +278,324 @@ async def generate_dummy_data():
             await db.rollback()
             raise
 
+# --- 대량 적재 (--bulk) ---
+
+BULK_EXTENSIONS = ['.txt', '.pdf', '.jpg', '.png', '.doc', '.xlsx', '.zip', '.mp4', '.mp3', '.pptx']
+BULK_BASE_TIME = datetime(2025, 1, 1)
+BULK_TIME_SPAN_SECONDS = 365 * 24 * 3600
+BULK_MIN_FILE_SIZE = 1024
+BULK_MAX_FILE_SIZE = 100 * 1024 * 1024
+# 집계를 채울 때 한 번에 묶는 파일 id 범위 (긴 트랜잭션을 피하기 위함)
+BULK_STATS_BATCH_SIZE = 10_000_000
+_MASK64 = (1 << 64) - 1
+
+def mix64(x: int) -> int:
+    """번호 -> 64비트 의사난수 (splitmix64, 같은 번호면 어느 워커에서 계산해도 같은 값)"""
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+class BulkPlan:
+    """적재할 데이터의 모양 (워커 프로세스에 그대로 넘김)
+
+    폴더 번호 n(0부터): n < roots면 루트, 아니면 부모는 (n - roots) // fanout
+    파일 번호 j(0부터): 부모 폴더는 mix64(j) % folders
+    """
+
+    def __init__(self, dsn, seed, users, roots, fanout, folders, files, user_start, folder_start, file_start, sparse_root):
+        self.dsn = dsn
+        self.seed = seed
+        self.users = users
+        self.roots = roots
+        self.fanout = fanout
+        self.folders = folders
+        self.files = files
+        self.user_start = user_start
+        self.folder_start = folder_start
+        self.file_start = file_start
+        self.sparse_root = sparse_root
+
+    def rand(self, kind: int, index: int) -> int:
+        return mix64((self.seed << 40) ^ (kind << 36) ^ index)
+
+    def created_at(self, kind: int, index: int) -> datetime:
+        return BULK_BASE_TIME - timedelta(seconds=self.rand(kind, index) % BULK_TIME_SPAN_SECONDS)
+
+    def levels(self) -> list:
+        """깊이별 폴더 번호 범위 [(start, end)] - 너비 우선 번호이므로 깊이마다 연속된 범위"""
+        levels = []
+        start, size = 0, self.roots
+        while start < self.folders:
+            end = min(start + size, self.folders)
+            levels.append((start, end))
+            start, size = end, size * self.fanout
+        return levels
+
+    def ancestors(self, n: int) -> list:
+        """루트 -> 자기 자신 순서의 폴더 번호"""
+        chain = [n]
+        while n >= self.roots:
+            n = (n - self.roots) // self.fanout
+            chain.append(n)
+        chain.reverse()
+        return chain
+
+    def child_count(self, n: int) -> int:
+        first = self.roots + n * self.fanout
+        return max(0, min(self.fanout, self.folders - first))
+
+    def folder_owner(self, n: int) -> int:
+        while n >= self.roots:
+            n = (n - self.roots) // self.fanout
+        return self.user_start + n % self.users
+
+    def file_key(self, file_id: int, ext: str) -> str:
+        return f"dummy/{file_id % 1000:03d}/{file_id}{ext}"
+
+def user_records(plan: BulkPlan, start: int, end: int):
+    # 로그인할 수 있도록 비밀번호는 모두 "test" (해시는 한 번만 계산)
+    hashed_password = bcrypt.hashpw("test".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    for i in range(start, end):
+        user_id = plan.user_start + i
+        yield (user_id, f"user{user_id}@example.com", f"User {user_id}", hashed_password, plan.created_at(0, i), False)
+
+def folder_records(plan: BulkPlan, start: int, end: int):
+    # 형제 폴더는 부모가 같으므로 부모 경로/소유자는 부모가 바뀔 때만 계산
+    last_parent = None
+    for n in range(start, end):
+        if n < plan.roots:
+            parent = None
+            prefix = "/"
+            owner_id = plan.folder_owner(n)
+            depth = 1
+        else:
+            parent = (n - plan.roots) // plan.fanout
+            if parent != last_parent:
+                chain = plan.ancestors(parent)
+                prefix = "/" + "".join(f"{plan.folder_start + a}/" for a in chain)
+                owner_id = plan.folder_owner(parent)
+                depth = len(chain) + 1
+                last_parent = parent
+        folder_id = plan.folder_start + n
+        yield (
+            folder_id,
+            f"D{depth}_F{n}",
+            None if parent is None else plan.folder_start + parent,
+            owner_id,
+            plan.created_at(1, n),
+            f"{prefix}{folder_id}/",
+            plan.child_count(n),
+            False,
+        )
+
+def file_records(plan: BulkPlan, start: int, end: int):
+    size_span = BULK_MAX_FILE_SIZE - BULK_MIN_FILE_SIZE
+    for j in range(start, end):
+        r = plan.rand(2, j)
+        parent = r % plan.folders
+        ext = BULK_EXTENSIONS[(r >> 32) % len(BULK_EXTENSIONS)]
+        file_id = plan.file_start + j
+        file_size = BULK_MIN_FILE_SIZE + plan.rand(3, j) % size_span
+        key = plan.file_key(file_id, ext)
+        if plan.sparse_root:
+            # 크기만 잡힌 빈 파일 (디스크 공간을 쓰지 않고 읽으면 0으로 채워진 내용)
+            path = Path(plan.sparse_root) / key
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as f:
+                f.truncate(file_size)
+        yield (
+            file_id,
+            f"file_{j}{ext}",
+            f"local:{key}",
+            file_size,
+            plan.folder_start + parent,
+            plan.folder_owner(parent),
+            plan.created_at(2, j),
+            False,
+        )
+
+BULK_TABLES = {
+    "users": (user_records, ["id", "email", "name", "password", "created_at", "is_deleted"]),
+    "folders": (folder_records, ["id", "name", "parent_folder_id", "owner_id", "created_at", "path", "folder_count", "is_deleted"]),
+    "files": (file_records, ["id", "name", "path_on_disk", "file_size", "parent_folder_id", "owner_id", "created_at", "is_deleted"]),
+}
+
+async def _copy_batch(table: str, start: int, end: int, plan: BulkPlan) -> int:
+    import asyncpg
+    make_records, columns = BULK_TABLES[table]
+    conn = await asyncpg.connect(plan.dsn)
+    try:
+        # 레코드는 생성기로 넘기므로 배치 크기와 관계없이 메모리 일정
+        await conn.copy_records_to_table(table, records=make_records(plan, start, end), columns=columns)
+    finally:
+        await conn.close()
+    return end - start
+
+def copy_batch(table: str, start: int, end: int, plan: BulkPlan) -> int:
+    """워커 프로세스에서 번호 [start, end) 범위를 COPY로 적재"""
+    return asyncio.run(_copy_batch(table, start, end, plan))
+
+async def reserve_ids(db, table: str, count: int) -> int:
+    """테이블의 최대 id 뒤로 count개를 예약하고 첫 id 반환 (시퀀스를 예약한 범위 끝으로 옮김)"""
+    result = await db.execute(
+        text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT coalesce(max(id), 0) FROM {table}) + :count)"),
+        {"count": count}
+    )
+    await db.commit()
+    return result.scalar() - count + 1
+
+async def copy_ranges(pool, table: str, ranges: list, plan: BulkPlan, batch_size: int):
+    """범위를 batch_size 단위로 나눠 워커들에 COPY를 맡기고 진행 상황 출력"""
+    loop = asyncio.get_running_loop()
+    batches = [
+        (batch_start, min(batch_start + batch_size, end))
+        for start, end in ranges
+        for batch_start in range(start, end, batch_size)
+    ]
+    total = sum(end - start for start, end in batches)
+    done = 0
+    started = time.perf_counter()
+    futures = [loop.run_in_executor(pool, copy_batch, table, start, end, plan) for start, end in batches]
+    for future in asyncio.as_completed(futures):
+        done += await future
+        elapsed = time.perf_counter() - started
+        print(f"  {table}: {done:,}/{total:,} ({done / elapsed:,.0f} rows/s)")
+
+async def fill_folder_stats(plan: BulkPlan, levels: list):
+    """적재한 폴더의 file_count/total_size 계산 (folder_count는 적재할 때 채움)
+
+    직속 파일 수/크기를 파일 id 범위별로 더한 뒤, 가장 깊은 깊이부터 부모의 total_size에 자식의 total_size를 더한다.
+    """
+    for batch_start in range(0, plan.files, BULK_STATS_BATCH_SIZE):
+        batch_end = min(batch_start + BULK_STATS_BATCH_SIZE, plan.files)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                text("""
+                    UPDATE folders f
+                    SET file_count = f.file_count + s.file_count,
+                        total_size = f.total_size + s.size
+                    FROM (
+                        SELECT parent_folder_id AS id, count(*) AS file_count, sum(file_size) AS size
+                        FROM files
+                        WHERE id BETWEEN :first_id AND :last_id
+                        GROUP BY parent_folder_id
+                    ) s
+                    WHERE f.id = s.id
+                """),
+                {"first_id": plan.file_start + batch_start, "last_id": plan.file_start + batch_end - 1}
+            )
+            await db.commit()
+        print(f"  file stats: {batch_end:,}/{plan.files:,}")
+
+    for start, end in reversed(levels[1:]):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                text("""
+                    UPDATE folders p
+                    SET total_size = p.total_size + c.size
+                    FROM (
+                        SELECT parent_folder_id AS id, sum(total_size) AS size
+                        FROM folders
+                        WHERE id BETWEEN :first_id AND :last_id
+                        GROUP BY parent_folder_id
+                    ) c
+                    WHERE p.id = c.id AND c.size > 0
+                """),
+                {"first_id": plan.folder_start + start, "last_id": plan.folder_start + end - 1}
+            )
+            await db.commit()
+    print("  folder total sizes rolled up")
+
+async def drop_secondary_indexes(db) -> list:
+    """folders/files의 기본키 외 인덱스를 지우고 다시 만들 정의 반환"""
+    result = await db.execute(text("""
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.schemaname = current_schema() AND i.tablename IN ('folders', 'files')
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname)
+    """))
+    indexes = result.fetchall()
+    for name, definition in indexes:
+        # 적재 도중 실패하면 직접 다시 만들 수 있도록 정의를 남김
+        print(f"  dropping index: {definition};")
+        await db.execute(text(f'DROP INDEX "{name}"'))
+    await db.commit()
+    return [definition for _, definition in indexes]
+
+async def generate_bulk_data(args):
+    started = time.perf_counter()
+    roots = args.users * args.roots_per_user
+    sparse_root = None
+    if args.sparse_files:
+        from app.services.storage import LOCAL_STORAGE_ROOT
+        sparse_root = str(LOCAL_STORAGE_ROOT.resolve())
+
+    async with AsyncSessionLocal() as db:
+        user_start = await reserve_ids(db, "users", args.users)
+        folder_start = await reserve_ids(db, "folders", args.folders)
+        file_start = await reserve_ids(db, "files", args.files)
+        index_definitions = await drop_secondary_indexes(db) if args.defer_indexes else []
+
+    plan = BulkPlan(
+        dsn=ASYNC_DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://"),
+        seed=args.seed,
+        users=args.users,
+        roots=roots,
+        fanout=args.fanout,
+        folders=args.folders,
+        files=args.files,
+        user_start=user_start,
+        folder_start=folder_start,
+        file_start=file_start,
+        sparse_root=sparse_root,
+    )
+    levels = plan.levels()
+    print(f"대량 적재: 사용자 {args.users:,}명, 폴더 {args.folders:,}개 (Depth {len(levels)}), 파일 {args.files:,}개, 워커 {args.workers}개")
+
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=get_context("spawn")) as pool:
+        await copy_ranges(pool, "users", [(0, args.users)], plan, args.batch_size)
+        # 부모 폴더가 먼저 들어가야 하므로 깊이별로 순서대로 (같은 깊이는 병렬)
+        for start, end in levels:
+            await copy_ranges(pool, "folders", [(start, end)], plan, args.batch_size)
+        await copy_ranges(pool, "files", [(0, args.files)], plan, args.batch_size)
+
+    print("폴더 집계 계산 중...")
+    await fill_folder_stats(plan, levels)
+
+    async with AsyncSessionLocal() as db:
+        for definition in index_definitions:
+            print(f"  creating index: {definition}")
+            await db.execute(text(definition))
+        await db.commit()
+        await db.execute(text("ANALYZE users"))
+        await db.execute(text("ANALYZE folders"))
+        await db.execute(text("ANALYZE files"))
+
+    print(f"대량 적재 완료: {time.perf_counter() - started:.1f}초")
+    print(f"사용자 id {user_start}~{user_start + args.users - 1}, 폴더 id {folder_start}~{folder_start + args.folders - 1}, 파일 id {file_start}~{file_start + args.files - 1}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bulk", action="store_true", help="COPY로 대량 적재")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--roots-per-user", type=int, default=50, help="사용자별 루트 폴더 수")
+    parser.add_argument("--fanout", type=int, default=4, help="폴더별 하위 폴더 수 (깊이는 폴더 수에 따라 정해짐)")
+    parser.add_argument("--folders", type=int, default=1_000_000)
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1), help="COPY를 나눠서 실행할 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=1_000_000, help="워커 하나가 COPY 한 번에 적재하는 행 수")
+    parser.add_argument("--sparse-files", action="store_true", help="파일마다 sparse 파일을 LOCAL_STORAGE_ROOT 아래에 생성")
+    parser.add_argument("--defer-indexes", action="store_true", help="folders/files의 보조 인덱스를 지우고 적재한 뒤 다시 생성")
+    args = parser.parse_args()
+
+    if not args.bulk:
+        asyncio.run(generate_dummy_data())
+        return
+    if args.users < 1 or args.roots_per_user < 1 or args.fanout < 1 or args.folders < 1:
+        sys.exit("--users, --roots-per-user, --fanout and --folders must be at least 1")
+    asyncio.run(generate_bulk_data(args))
+
 if __name__ == "__main__":
-    asyncio.run(generate_dummy_data())
\ No newline at end of file
+    main()
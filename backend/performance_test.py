@@ -1,171 +1,556 @@
+"""재현 가능한 성능 벤치마크
+
+고정된 시드와 크기로 벤치마크 전용 사용자의 데이터(폴더 트리, 파일)를 만든 뒤, 앱을 프로세스 안에서(ASGI) 호출해
+실제 라우터 함수(목록, 검색, 업로드, 다운로드, 휴지통, 폴더 삭제)를 시나리오별로 측정한다.
+
+- 시나리오마다 워밍업 후 같은 횟수만큼 반복해 p50/p95/p99와 요청당 SQL 수, DB 시간(Server-Timing)을 기록
+- 데이터를 바꾸는 시나리오(휴지통, 폴더 삭제)는 매번 측정 밖에서 되돌리므로 반복해도 데이터가 같음
+- 업로드하는 내용에는 실행마다 다른 앞부분을 붙여서, 이전 실행의 blob과 중복 제거되어 빨라지지 않게 함
+- 결과는 JSON으로 출력하고, 기준 결과와 비교해 느려진 시나리오(또는 늘어난 SQL 수)가 있으면 종료 코드 1
+
+로컬 Postgres(ASYNC_DATABASE_URL)와 로컬 저장소(LOCAL_STORAGE_ROOT)만 사용하며, 끝나면 벤치마크 사용자와 데이터를 지운다.
+다른 데이터와 섞이면 측정값이 달라지므로 벤치마크 전용 DB에서 실행할 것.
+
+    python performance_test.py run --scale small --output baseline.json
+    python performance_test.py run --scale small --baseline baseline.json  # 측정 후 바로 비교
+    python performance_test.py compare baseline.json current.json
+"""
+import argparse
 import asyncio
+import hashlib
+import json
+import os
+import platform
+import random
+import re
+import subprocess
 import sys
 import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from pathlib import Path
 
 # 현재 디렉토리를 Python 경로에 추가
 sys.path.append(str(Path(__file__).parent))
 
-from app.database import AsyncSessionLocal
+# 토큰은 프로세스 안에서만 쓰므로 SECRET_KEY가 없으면 임의 값으로 실행
+os.environ.setdefault("SECRET_KEY", "performance-test")
+
+import httpx
+from sqlalchemy import text
+from app.database import AsyncSessionLocal, async_engine
 from app.model.user import User
-from app.model.folder import Folder
-from app.model.file import File
-from sqlalchemy import select, func, text
-import random
+from app.services.folder_stats import add_delta, apply_deltas
+from app.services.folder_tree import rebuild_folder_paths
+from app.utilities.jwt import create_access_token
 
-async def run_performance_tests():
-    print("=== 성능 테스트 시작 ===\n")
-    
-    async with AsyncSessionLocal() as db:
+# 규모별 데이터 크기 (루트 폴더마다 fanout개씩 depth 단계까지 하위 폴더, 파일은 폴더에 고르게 분산)
+SCALES = {
+    "small": {"root_folders": 5, "fanout": 4, "depth": 3, "files": 5_000},
+    "medium": {"root_folders": 10, "fanout": 5, "depth": 4, "files": 50_000},
+    "large": {"root_folders": 20, "fanout": 6, "depth": 4, "files": 250_000},
+}
+# 파일 행이 가리키는 실제 blob (다운로드 시나리오에서 내용을 읽음)
+SEED_BLOB_SIZES = [16 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+WORDS = ["report", "invoice", "photo", "budget", "meeting", "draft", "summary", "contract", "backup", "design", "notes", "scan"]
+EXTENSIONS = ["pdf", "docx", "xlsx", "jpg", "png", "txt", "csv", "zip", "mp4", "pptx"]
+BASE_TIME = datetime(2024, 1, 1)
+INSERT_BATCH_SIZE = 5000
+
+BENCH_EMAIL = "benchmark@performance-test.local"
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+def percentile(values: list, p: float) -> float:
+    """정렬된 값의 p 백분위수 (선형 보간)"""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * p / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+def summarize(samples: list) -> dict:
+    durations = sorted(sample[0] * 1000 for sample in samples)
+    db_times = sorted(sample[1] for sample in samples)
+    queries = sorted(sample[2] for sample in samples)
+    return {
+        "samples": len(samples),
+        "p50_ms": round(percentile(durations, 50), 3),
+        "p95_ms": round(percentile(durations, 95), 3),
+        "p99_ms": round(percentile(durations, 99), 3),
+        "mean_ms": round(sum(durations) / len(durations), 3),
+        "min_ms": round(durations[0], 3),
+        "max_ms": round(durations[-1], 3),
+        "db_p50_ms": round(percentile(db_times, 50), 3),
+        "queries_p50": percentile(queries, 50),
+    }
+
+# --- 데이터 준비 ---
+
+async def drop_dataset(db):
+    """벤치마크 사용자와 그 데이터 삭제 (파일이 잡고 있던 blob 참조를 먼저 돌려줌, 남은 blob은 정리 작업이 지움)"""
+    user_id = (await db.execute(text("SELECT id FROM users WHERE email = :email"), {"email": BENCH_EMAIL})).scalar()
+    if user_id is None:
+        return
+    await db.execute(
+        text("""
+            UPDATE blobs b
+            SET ref_count = greatest(b.ref_count - c.n, 0)
+            FROM (
+                SELECT content_hash, count(*) AS n FROM files
+                WHERE owner_id = :user_id AND content_hash IS NOT NULL
+                GROUP BY content_hash
+            ) c
+            WHERE b.hash = c.content_hash
+        """),
+        {"user_id": user_id},
+    )
+    await db.execute(text("DELETE FROM users WHERE id = :user_id"), {"user_id": user_id})
+    await db.commit()
+
+async def insert_folders(db, user_id: int, names: list, parents: list, offset: int) -> dict:
+    """폴더를 한 문장으로 추가하고 이름 -> id 반환 (경로와 집계는 호출자가 채움)"""
+    result = await db.execute(
+        text("""
+            INSERT INTO folders (name, parent_folder_id, owner_id, created_at)
+            SELECT n.name, n.parent_id, :user_id, CAST(:base_time AS timestamp) + make_interval(secs => :offset + n.ordinality)
+            FROM unnest(CAST(:names AS text[]), CAST(:parents AS int[])) WITH ORDINALITY AS n(name, parent_id, ordinality)
+            RETURNING id, name
+        """),
+        {"user_id": user_id, "names": names, "parents": parents, "base_time": BASE_TIME, "offset": offset},
+    )
+    return {name: folder_id for folder_id, name in result.fetchall()}
+
+async def seed_dataset(db, scale: dict, rng: random.Random, blobs: list, user_id: int) -> dict:
+    """폴더 트리와 파일 행을 추가하고 시나리오에서 쓸 id 목록 반환
+
+    blobs: 업로드해 둔 실제 blob [(path_on_disk, content_hash, size)] - 파일 행은 이 blob들을 돌아가며 가리킨다.
+    """
+    deltas = {}
+    levels = []
+    parents = [None]
+    for depth in range(scale["depth"] + 1):
+        count = scale["root_folders"] if depth == 0 else scale["fanout"]
+        names, parent_ids = [], []
+        for parent_index, parent_id in enumerate(parents):
+            for index in range(count):
+                names.append(f"{WORDS[(parent_index + index) % len(WORDS)]}_d{depth}_{len(names)}")
+                parent_ids.append(parent_id)
+        ids_by_name = await insert_folders(db, user_id, names, parent_ids, sum(len(level) for level in levels))
+        level = [ids_by_name[name] for name in names]
+        for parent_id in parent_ids:
+            add_delta(deltas, parent_id, folder_count=1)
+        levels.append(level)
+        parents = level
+    await rebuild_folder_paths(db)
+
+    all_folders = [folder_id for level in levels for folder_id in level]
+    for batch_start in range(0, scale["files"], INSERT_BATCH_SIZE):
+        batch = range(batch_start, min(batch_start + INSERT_BATCH_SIZE, scale["files"]))
+        rows = {"names": [], "parents": [], "paths": [], "hashes": [], "sizes": []}
+        for i in batch:
+            path_on_disk, content_hash, size = blobs[i % len(blobs)]
+            parent_id = rng.choice(all_folders)
+            rows["names"].append(f"{rng.choice(WORDS)}_{rng.randrange(10 ** 6):06d}.{rng.choice(EXTENSIONS)}")
+            rows["parents"].append(parent_id)
+            rows["paths"].append(path_on_disk)
+            rows["hashes"].append(content_hash)
+            rows["sizes"].append(size)
+            add_delta(deltas, parent_id, file_count=1, size=size)
+        await db.execute(
+            text("""
+                INSERT INTO files (name, path_on_disk, content_hash, file_size, parent_folder_id, owner_id, created_at)
+                SELECT n.name, n.path, n.hash, n.size, n.parent_id, :user_id,
+                       CAST(:base_time AS timestamp) + make_interval(secs => :offset + n.ordinality)
+                FROM unnest(CAST(:names AS text[]), CAST(:paths AS text[]), CAST(:hashes AS text[]),
+                            CAST(:sizes AS bigint[]), CAST(:parents AS int[]))
+                     WITH ORDINALITY AS n(name, path, hash, size, parent_id, ordinality)
+            """),
+            {"user_id": user_id, "base_time": BASE_TIME, "offset": batch_start, **rows},
+        )
+
+    # 파일 행이 blob을 참조하므로 참조 카운트도 맞춰 둠 (지울 때 drop_dataset이 돌려줌)
+    for index, (_, content_hash, _) in enumerate(blobs):
+        references = len(range(index, scale["files"], len(blobs)))
+        await db.execute(
+            text("UPDATE blobs SET ref_count = ref_count + :n WHERE hash = :hash"),
+            {"n": references, "hash": content_hash},
+        )
+    await apply_deltas(db, user_id, deltas)
+    await db.commit()
+    # 통계를 갱신해서 실행마다 같은 실행 계획을 쓰도록
+    await db.execute(text("ANALYZE folders"))
+    await db.execute(text("ANALYZE files"))
+
+    file_ids = (await db.execute(
+        text("SELECT id FROM files WHERE owner_id = :user_id AND content_hash = :hash ORDER BY id"),
+        {"user_id": user_id, "hash": blobs[2][1]},
+    )).scalars().all()
+    return {
+        "roots": levels[0],
+        "inner_folders": [folder_id for level in levels[:-1] for folder_id in level],
+        "subtree_folders": levels[1],
+        "all_folders": all_folders,
+        "download_files": list(file_ids),
+        "folder_count": len(all_folders),
+        "file_count": scale["files"],
+    }
+
+# --- 측정 ---
+
+class Bench:
+    """요청 실행과 측정 (timer() 안의 요청만 기록, 요청이 여러 개면 합쳐서 한 번으로)"""
+
+    def __init__(self, client, token: str, nonce: bytes):
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.nonce = nonce
+        self.dataset = {}
+        self.samples = None
+        self._current = None
+
+    async def request(self, method: str, url: str, expected=(200, 206), **kwargs):
+        headers = {**self.headers, **kwargs.pop("headers", {})}
+        response = await self.client.request(method, url, headers=headers, **kwargs)
+        if response.status_code not in expected:
+            raise RuntimeError(f"{method} {url} -> {response.status_code}: {response.text[:200]}")
+        if self._current is not None:
+            match = SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+            if match:
+                self._current[0] += float(match.group(1))
+                self._current[1] += int(match.group(2))
+        return response
+
+    @asynccontextmanager
+    async def timer(self):
+        self._current = [0.0, 0]
+        started = time.perf_counter()
         try:
-            # 테스트용 사용자 ID들 가져오기
-            result = await db.execute(select(User.id).limit(10))
-            user_ids = [row[0] for row in result.fetchall()]
-            
-            if not user_ids:
-                print("테스트할 사용자가 없습니다. 먼저 더미 데이터를 생성하세요.")
-                return
-            
-            # 테스트용 폴더 ID들 가져오기
-            result = await db.execute(select(Folder.id).limit(10))
-            folder_ids = [row[0] for row in result.fetchall()]
-            
-            test_user_id = random.choice(user_ids)
-            
-            # 1. 폴더 조회 성능 테스트
-            print("1. 폴더 조회 성능 테스트")
-            
-            start_time = time.time()
-            result = await db.execute(
-                select(Folder).where(
-                    Folder.owner_id == test_user_id,
-                    Folder.parent_folder_id.is_(None)
-                )
-            )
-            folders = result.scalars().all()
-            end_time = time.time()
-            print(f"   루트 폴더 조회 (사용자 {test_user_id}): {end_time - start_time:.4f}초 ({len(folders)}개)")
-            
-            # 서브 폴더 조회
-            if folder_ids:
-                test_folder_id = random.choice(folder_ids)
-                start_time = time.time()
-                result = await db.execute(
-                    select(Folder).where(
-                        Folder.owner_id == test_user_id,
-                        Folder.parent_folder_id == test_folder_id
-                    )
-                )
-                subfolders = result.scalars().all()
-                end_time = time.time()
-                print(f"   서브 폴더 조회: {end_time - start_time:.4f}초 ({len(subfolders)}개)")
-            
-            # 2. 파일 조회 성능 테스트
-            print("\n2. 파일 조회 성능 테스트")
-            
-            start_time = time.time()
-            result = await db.execute(
-                select(File).where(
-                    File.owner_id == test_user_id,
-                    File.parent_folder_id.is_(None)
-                )
-            )
-            files = result.scalars().all()
-            end_time = time.time()
-            print(f"   루트 파일 조회: {end_time - start_time:.4f}초 ({len(files)}개)")
-            
-            # 특정 폴더의 파일 조회
-            if folder_ids:
-                test_folder_id = random.choice(folder_ids)
-                start_time = time.time()
-                result = await db.execute(
-                    select(File).where(File.parent_folder_id == test_folder_id)
-                )
-                folder_files = result.scalars().all()
-                end_time = time.time()
-                print(f"   특정 폴더 파일 조회: {end_time - start_time:.4f}초 ({len(folder_files)}개)")
-            
-            # 3. 페이지네이션 테스트
-            print("\n3. 페이지네이션 테스트")
-            
-            start_time = time.time()
-            result = await db.execute(
-                select(File).where(File.owner_id == test_user_id)
-                .order_by(File.created_at.desc())
-                .limit(50)
-                .offset(0)
-            )
-            page1_files = result.scalars().all()
-            end_time = time.time()
-            print(f"   첫 페이지 (LIMIT 50): {end_time - start_time:.4f}초 ({len(page1_files)}개)")
-            
-            start_time = time.time()
-            result = await db.execute(
-                select(File).where(File.owner_id == test_user_id)
-                .order_by(File.created_at.desc())
-                .limit(50)
-                .offset(1000)
-            )
-            page_mid_files = result.scalars().all()
-            end_time = time.time()
-            print(f"   중간 페이지 (OFFSET 1000): {end_time - start_time:.4f}초 ({len(page_mid_files)}개)")
-            
-            # 4. 검색 테스트
-            print("\n4. 검색 테스트")
-            
-            start_time = time.time()
-            result = await db.execute(
-                select(File).where(
-                    File.owner_id == test_user_id,
-                    File.name.ilike('%file_1%')
-                )
-            )
-            search_files = result.scalars().all()
-            end_time = time.time()
-            print(f"   파일명 검색 (ILIKE): {end_time - start_time:.4f}초 ({len(search_files)}개)")
-            
-            # 5. 집계 쿼리 테스트
-            print("\n5. 집계 쿼리 테스트")
-            
-            start_time = time.time()
-            result = await db.execute(
-                select(func.count(File.id)).where(File.owner_id == test_user_id)
-            )
-            file_count = result.scalar()
-            end_time = time.time()
-            print(f"   파일 개수 집계: {end_time - start_time:.4f}초 ({file_count}개)")
-            
-            start_time = time.time()
-            result = await db.execute(
-                select(func.sum(File.file_size)).where(File.owner_id == test_user_id)
-            )
-            total_size = result.scalar() or 0
-            end_time = time.time()
-            print(f"   파일 크기 합계: {end_time - start_time:.4f}초 ({total_size:,} bytes)")
-            
-            # 6. 전체 통계
-            print("\n=== 전체 데이터 통계 ===")
-            
-            user_count = await db.execute(select(func.count(User.id)))
-            folder_count = await db.execute(select(func.count(Folder.id)))
-            file_count = await db.execute(select(func.count(File.id)))
-            
-            print(f"총 사용자: {user_count.scalar():,}명")
-            print(f"총 폴더: {folder_count.scalar():,}개")
-            print(f"총 파일: {file_count.scalar():,}개")
-            
-            # 7. 성능 개선 제안
-            print("\n=== 성능 개선 제안 ===")
-            print("다음 인덱스 생성을 권장합니다:")
-            print("CREATE INDEX idx_folders_owner_parent ON folders(owner_id, parent_folder_id);")
-            print("CREATE INDEX idx_files_owner_parent ON files(owner_id, parent_folder_id);")
-            print("CREATE INDEX idx_files_name ON files(name);")
-            print("CREATE INDEX idx_files_created_at ON files(created_at);")
-            
-        except Exception as e:
-            print(f"오류 발생: {e}")
-            import traceback
-            traceback.print_exc()
+            yield
+            elapsed = time.perf_counter() - started
+            if self.samples is not None:
+                self.samples.append((elapsed, self._current[0], self._current[1]))
+        finally:
+            self._current = None
+
+    def content(self, rng: random.Random, size: int) -> bytes:
+        # 실행마다 다른 앞부분 + 시드로 정해지는 내용 (크기와 패턴은 실행마다 같음)
+        return self.nonce + rng.randbytes(size - len(self.nonce))
+
+    async def upload(self, name: str, data: bytes, parent_folder_id: int = 0) -> dict:
+        response = await self.request(
+            "POST", "/files/",
+            files={"file": (name, data, "application/octet-stream")},
+            data={"parent_folder_id": str(parent_folder_id)},
+        )
+        return response.json()["file"]
+
+# 시나리오: async def(bench, rng) - timer() 안에서 측정할 요청을 실행하고, 되돌리는 요청은 timer() 밖에서 실행
+
+async def folders_root(bench, rng):
+    async with bench.timer():
+        await bench.request("GET", "/folders/", params={"limit": 100})
+
+async def folders_child(bench, rng):
+    folder_id = rng.choice(bench.dataset["inner_folders"])
+    async with bench.timer():
+        await bench.request("GET", "/folders/", params={"current_folder_id": folder_id, "sort": "name", "order": "asc"})
+
+async def folder_contents(bench, rng):
+    folder_id = rng.choice(bench.dataset["all_folders"])
+    async with bench.timer():
+        await bench.request("GET", f"/folders/{folder_id}/contents")
+
+async def files_in_folder(bench, rng):
+    folder_id = rng.choice(bench.dataset["all_folders"])
+    async with bench.timer():
+        await bench.request("GET", "/files/", params={"parent_folder_id": folder_id, "limit": 100})
+
+async def files_by_size(bench, rng):
+    folder_id = rng.choice(bench.dataset["inner_folders"])
+    async with bench.timer():
+        await bench.request("GET", "/files/", params={"parent_folder_id": folder_id, "sort": "size", "order": "desc"})
+
+async def search_substring(bench, rng):
+    async with bench.timer():
+        await bench.request("GET", "/search", params={"q": rng.choice(WORDS)[1:5], "limit": 50})
+
+async def search_prefix(bench, rng):
+    async with bench.timer():
+        await bench.request("GET", "/search", params={"q": rng.choice(WORDS)[:3], "mode": "prefix", "limit": 50})
+
+async def search_fuzzy(bench, rng):
+    word = rng.choice(WORDS)
+    typo = word[:2] + word[3] + word[2] + word[4:]  # 가운데 두 글자를 바꾼 오타
+    async with bench.timer():
+        await bench.request("GET", "/search", params={"q": typo, "mode": "fuzzy", "limit": 50})
+
+async def search_subtree(bench, rng):
+    folder_id = rng.choice(bench.dataset["roots"])
+    async with bench.timer():
+        await bench.request("GET", "/search", params={"q": rng.choice(WORDS)[:4], "folder_id": folder_id, "limit": 50})
+
+async def upload_small(bench, rng):
+    data = bench.content(rng, 64 * 1024)
+    async with bench.timer():
+        await bench.upload(f"upload_{rng.randrange(10 ** 9)}.bin", data, bench.dataset["upload_folder"])
+
+async def upload_chunked(bench, rng):
+    chunk_size = 1024 * 1024
+    data = bench.content(rng, 8 * chunk_size)
+    async with bench.timer():
+        response = await bench.request("POST", "/uploads/", json={
+            "name": f"upload_{rng.randrange(10 ** 9)}.bin",
+            "total_size": len(data),
+            "parent_folder_id": bench.dataset["upload_folder"],
+            "chunk_size": chunk_size,
+        })
+        upload_id = response.json()["upload_id"]
+        for index in range(len(data) // chunk_size):
+            await bench.request("PUT", f"/uploads/{upload_id}/chunks/{index}", content=data[index * chunk_size:(index + 1) * chunk_size])
+        await bench.request("POST", f"/uploads/{upload_id}/complete")
+
+async def download_full(bench, rng):
+    file_id = rng.choice(bench.dataset["download_files"])
+    async with bench.timer():
+        await bench.request("GET", f"/files/download/{file_id}")
+
+async def download_range(bench, rng):
+    file_id = rng.choice(bench.dataset["download_files"])
+    start = rng.randrange(SEED_BLOB_SIZES[2] - 65536)
+    async with bench.timer():
+        await bench.request("GET", f"/files/download/{file_id}", headers={"Range": f"bytes={start}-{start + 65535}"})
+
+async def trash_list(bench, rng):
+    async with bench.timer():
+        await bench.request("GET", "/files/trash", params={"limit": 100})
+
+async def trash_file(bench, rng):
+    file_id = rng.choice(bench.dataset["download_files"])
+    async with bench.timer():
+        await bench.request("DELETE", f"/files/{file_id}")
+    await bench.request("POST", f"/files/{file_id}/restore")
+
+async def restore_file(bench, rng):
+    file_id = rng.choice(bench.dataset["download_files"])
+    await bench.request("DELETE", f"/files/{file_id}")
+    async with bench.timer():
+        await bench.request("POST", f"/files/{file_id}/restore")
+
+async def delete_folder(bench, rng):
+    folder_id = rng.choice(bench.dataset["subtree_folders"])
+    async with bench.timer():
+        await bench.request("DELETE", f"/folders/{folder_id}")
+    await bench.request("POST", f"/folders/{folder_id}/restore")
+
+async def restore_folder(bench, rng):
+    folder_id = rng.choice(bench.dataset["subtree_folders"])
+    await bench.request("DELETE", f"/folders/{folder_id}")
+    async with bench.timer():
+        await bench.request("POST", f"/folders/{folder_id}/restore")
+
+SCENARIOS = {
+    "folders_root": folders_root,
+    "folders_child": folders_child,
+    "folder_contents": folder_contents,
+    "files_in_folder": files_in_folder,
+    "files_by_size": files_by_size,
+    "search_substring": search_substring,
+    "search_prefix": search_prefix,
+    "search_fuzzy": search_fuzzy,
+    "search_subtree": search_subtree,
+    "upload_small": upload_small,
+    "upload_chunked": upload_chunked,
+    "download_full": download_full,
+    "download_range": download_range,
+    "trash_list": trash_list,
+    "trash_file": trash_file,
+    "restore_file": restore_file,
+    "delete_folder": delete_folder,
+    "restore_folder": restore_folder,
+}
+
+async def run_scenario(bench, name: str, seed: int, warmup: int, repeat: int) -> dict:
+    # 시나리오마다 따로 시드를 정해서 일부 시나리오만 실행해도 같은 요청 순서가 나오게 함
+    rng = random.Random(f"{seed}:{name}")
+    scenario = SCENARIOS[name]
+    bench.samples = None
+    for _ in range(warmup):
+        await scenario(bench, rng)
+    bench.samples = []
+    for _ in range(repeat):
+        await scenario(bench, rng)
+    result = summarize(bench.samples)
+    bench.samples = None
+    return result
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args) -> dict:
+    # app.main은 import할 때 스케줄러를 시작하므로 이벤트 루프 안에서 가져오고, 주기 작업은 측정에 섞이지 않게 멈춤
+    from app.main import app, scheduler
+    scheduler.shutdown(wait=False)
+
+    names = list(SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(unknown)} (available: {', '.join(SCENARIOS)})")
+
+    scale = SCALES[args.scale]
+    rng = random.Random(args.seed)
+    nonce = uuid.uuid4().bytes
+
+    async with AsyncSessionLocal() as db:
+        await drop_dataset(db)
+        user = User(email=BENCH_EMAIL, name="Benchmark", password="!")
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+        postgres_version = (await db.execute(text("SHOW server_version"))).scalar()
+
+    transport = httpx.ASGITransport(app=app)
+    token = create_access_token(data={"user_id": user_id, "email": BENCH_EMAIL, "name": "Benchmark"})
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            bench = Bench(client, token, nonce)
+
+            started = time.perf_counter()
+            blobs = []
+            for index, size in enumerate(SEED_BLOB_SIZES):
+                data = bench.content(rng, size)
+                uploaded = await bench.upload(f"seed_{index}.bin", data)
+                blobs.append((uploaded["path_on_disk"], hashlib.sha256(data).hexdigest(), size))
+            async with AsyncSessionLocal() as db:
+                bench.dataset = await seed_dataset(db, scale, rng, blobs, user_id)
+            await bench.request("POST", "/folders/", json={"name": "uploads", "parent_folder_id": 0})
+            async with AsyncSessionLocal() as db:
+                bench.dataset["upload_folder"] = (await db.execute(
+                    text("SELECT id FROM folders WHERE owner_id = :user_id AND name = 'uploads'"), {"user_id": user_id}
+                )).scalar()
+            seed_seconds = time.perf_counter() - started
+            print(f"Seeded {bench.dataset['folder_count']} folders and {bench.dataset['file_count']} files in {seed_seconds:.1f}s", file=sys.stderr)
+
+            for name in names:
+                results[name] = await run_scenario(bench, name, args.seed, args.warmup, args.repeat)
+                print(f"{name}: p50 {results[name]['p50_ms']}ms, p95 {results[name]['p95_ms']}ms", file=sys.stderr)
+    finally:
+        if not args.keep:
+            async with AsyncSessionLocal() as db:
+                await drop_dataset(db)
+        await async_engine.dispose()
+
+    return {
+        "meta": {
+            "seed": args.seed,
+            "scale": args.scale,
+            "dataset": {
+                "folders": bench.dataset.get("folder_count"),
+                "files": bench.dataset.get("file_count"),
+                **scale,
+            },
+            "warmup": args.warmup,
+            "repeat": args.repeat,
+            "seed_seconds": round(seed_seconds, 2),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "postgres": postgres_version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+# --- 비교 ---
+
+def compare(baseline: dict, current: dict, threshold: float, min_delta_ms: float) -> dict:
+    """시나리오별 p50/p95 비교: threshold 비율과 min_delta_ms를 모두 넘게 느려졌거나 SQL 수가 늘면 회귀"""
+    warnings = []
+    for key in ("seed", "scale", "repeat"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            warnings.append(f"{key} differs: {baseline['meta'].get(key)} -> {current['meta'].get(key)}")
+
+    scenarios = {}
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        item = {}
+        for metric in ("p50_ms", "p95_ms"):
+            change = result[metric] / base[metric] - 1 if base[metric] else 0.0
+            item[metric] = {"baseline": base[metric], "current": result[metric], "change": round(change, 3)}
+            if change > threshold and result[metric] - base[metric] > min_delta_ms:
+                regressions.append(f"{name}: {metric} {base[metric]} -> {result[metric]} (+{change:.0%})")
+        # SQL 수는 시간과 달리 흔들리지 않으므로 늘기만 해도 회귀
+        item["queries_p50"] = {"baseline": base["queries_p50"], "current": result["queries_p50"]}
+        if result["queries_p50"] > base["queries_p50"]:
+            regressions.append(f"{name}: queries {base['queries_p50']} -> {result['queries_p50']}")
+        scenarios[name] = item
+
+    return {
+        "baseline": baseline["meta"].get("git_revision"),
+        "current": current["meta"].get("git_revision"),
+        "threshold": threshold,
+        "min_delta_ms": min_delta_ms,
+        "warnings": warnings,
+        "regressions": regressions,
+        "scenarios": scenarios,
+    }
+
+def load_json(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def write_json(data: dict, path: str = None):
+    output = json.dumps(data, indent=2, ensure_ascii=False)
+    if path:
+        Path(path).write_text(output + "\n")
+    print(output)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="데이터를 만들고 시나리오 측정")
+    run_parser.add_argument("--scale", choices=SCALES, default="small")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--warmup", type=int, default=5, help="시나리오별 워밍업 횟수 (기록 안 함)")
+    run_parser.add_argument("--repeat", type=int, default=50, help="시나리오별 측정 횟수")
+    run_parser.add_argument("--scenarios", default="all", help=f"측정할 시나리오 (쉼표로 구분): {', '.join(SCENARIOS)}")
+    run_parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    run_parser.add_argument("--baseline", help="측정 후 비교할 기준 결과 JSON")
+    run_parser.add_argument("--keep", action="store_true", help="끝난 뒤 벤치마크 데이터를 지우지 않음")
+
+    compare_parser = commands.add_parser("compare", help="기준 결과와 비교")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--threshold", type=float, default=0.2, help="이 비율보다 느려지면 회귀 (기본 20%%)")
+        sub.add_argument("--min-delta-ms", type=float, default=1.0, help="차이가 이보다 작으면 비율과 관계없이 무시")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if args.repeat < 1:
+            sys.exit("--repeat must be at least 1")
+        current = asyncio.run(run(args))
+        if args.baseline:
+            current["comparison"] = compare(load_json(args.baseline), current, args.threshold, args.min_delta_ms)
+        write_json(current, args.output)
+    else:
+        current = {"comparison": compare(load_json(args.baseline), load_json(args.current), args.threshold, args.min_delta_ms)}
+        write_json(current["comparison"])
+
+    if current.get("comparison", {}).get("regressions"):
+        sys.exit(1)
 
 if __name__ == "__main__":
-    asyncio.run(run_performance_tests())
\ No newline at end of file
+    main()
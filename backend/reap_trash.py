@@ -0,0 +1,28 @@
+"""보관 기간이 지난 휴지통 파일을 즉시 정리 (스케줄러와 같은 cleanup_old_trash_files 사용)
+
+    python reap_trash.py --dry-run          # 지울 대상과 크기만 집계
+    python reap_trash.py --batch-size 5000  # 실제 정리
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# 현재 디렉토리를 Python 경로에 추가
+sys.path.append(str(Path(__file__).parent))
+
+from app.services.cleanup import cleanup_old_trash_files, TRASH_REAPER_BATCH_SIZE, TRASH_RETENTION_DAYS
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="삭제하지 않고 대상만 집계")
+    parser.add_argument("--batch-size", type=int, default=TRASH_REAPER_BATCH_SIZE)
+    parser.add_argument("--days", type=int, default=TRASH_RETENTION_DAYS, help="휴지통 보관 기간 (일)")
+    args = parser.parse_args()
+
+    stats = await cleanup_old_trash_files(dry_run=args.dry_run, batch_size=args.batch_size, retention_days=args.days)
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
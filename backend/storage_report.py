@@ -0,0 +1,36 @@
+"""저장 시 압축으로 줄어든 용량을 codec별로 집계
+
+    python storage_report.py
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# 현재 디렉토리를 Python 경로에 추가
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import AsyncSessionLocal
+from app.services.compression import compression_report
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        report = await compression_report(db)
+
+    total_original = sum(item["original_bytes"] for item in report)
+    total_stored = sum(item["stored_bytes"] for item in report)
+    print(json.dumps({
+        "codecs": report,
+        "total": {
+            "original_bytes": total_original,
+            "stored_bytes": total_stored,
+            "saved_bytes": total_original - total_stored,
+        },
+    }, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+from app.utilities import auth
+from app.utilities.auth import TokenCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(monkeypatch, max_size=3, ttl_seconds=60):
+    clock = Clock()
+    monkeypatch.setattr(auth.time, "time", clock)
+    return TokenCache(max_size, ttl_seconds), clock
+
+
+def test_get_returns_cached_user(monkeypatch):
+    cache, _ = _cache(monkeypatch)
+    cache.set("token-a", 1)
+    assert cache.get("token-a") == 1
+    assert cache.get("token-b") is None
+
+
+def test_entry_expires_after_ttl(monkeypatch):
+    cache, clock = _cache(monkeypatch, ttl_seconds=60)
+    cache.set("token-a", 1)
+    clock.now += 59
+    assert cache.get("token-a") == 1
+    clock.now += 1
+    assert cache.get("token-a") is None
+    assert "token-a" not in cache._entries
+
+
+def test_entry_does_not_outlive_token(monkeypatch):
+    cache, clock = _cache(monkeypatch, ttl_seconds=60)
+    cache.set("token-a", 1, token_expires_at=clock.now + 10)
+    clock.now += 10
+    assert cache.get("token-a") is None
+
+
+def test_set_again_refreshes_ttl(monkeypatch):
+    cache, clock = _cache(monkeypatch, ttl_seconds=60)
+    cache.set("token-a", 1)
+    clock.now += 50
+    cache.set("token-a", 1)
+    clock.now += 50
+    assert cache.get("token-a") == 1
+
+
+def test_least_recently_used_is_evicted(monkeypatch):
+    cache, _ = _cache(monkeypatch, max_size=2)
+    cache.set("token-a", 1)
+    cache.set("token-b", 2)
+    assert cache.get("token-a") == 1  # a가 가장 최근에 쓰임
+    cache.set("token-c", 3)
+    assert cache.get("token-b") is None
+    assert cache.get("token-a") == 1
+    assert cache.get("token-c") == 3
+
+
+def test_size_never_exceeds_max(monkeypatch):
+    cache, _ = _cache(monkeypatch, max_size=3)
+    for i in range(10):
+        cache.set(f"token-{i}", i)
+    assert len(cache._entries) == 3
+    assert [cache.get(f"token-{i}") for i in range(7, 10)] == [7, 8, 9]
+
+
+def test_clear(monkeypatch):
+    cache, _ = _cache(monkeypatch)
+    cache.set("token-a", 1)
+    cache.clear()
+    assert cache.get("token-a") is None
@@ -0,0 +1,87 @@
+import os
+from email.utils import formatdate
+
+import pytest
+
+from app.utilities.file_response import MAX_RANGES, _if_range_matches, parse_range_header
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", [(0, 99)]),
+    ("bytes=100-", [(100, 999)]),
+    ("bytes=900-5000", [(900, 999)]),
+    ("BYTES = 0-0", [(0, 0)]),
+])
+def test_single_range(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=-100", [(900, 999)]),
+    ("bytes=-5000", [(0, 999)]),
+    ("bytes=-1", [(999, 999)]),
+])
+def test_suffix_range(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+
+def test_zero_length_suffix_is_unsatisfiable():
+    assert parse_range_header("bytes=-0", 1000) == []
+
+
+def test_multi_range_is_sorted():
+    assert parse_range_header("bytes=500-599, 0-99", 1000) == [(0, 99), (500, 599)]
+
+
+def test_multi_range_merges_overlapping_and_adjacent():
+    assert parse_range_header("bytes=0-99,50-149,150-199,-100", 1000) == [(0, 199), (900, 999)]
+
+
+def test_multi_range_drops_unsatisfiable_parts():
+    assert parse_range_header("bytes=0-9,2000-3000", 1000) == [(0, 9)]
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-1999", "bytes=5000-,6000-"])
+def test_unsatisfiable_range(header):
+    assert parse_range_header(header, 1000) == []
+
+
+def test_any_range_on_empty_file_is_unsatisfiable():
+    assert parse_range_header("bytes=0-", 0) == []
+    assert parse_range_header("bytes=-10", 0) == []
+
+
+@pytest.mark.parametrize("header", [
+    "items=0-99",
+    "bytes=",
+    "bytes=100",
+    "bytes=abc-def",
+    "bytes=200-100",
+    "bytes=0-99,oops",
+])
+def test_malformed_range_is_ignored(header):
+    assert parse_range_header(header, 1000) is None
+
+
+def test_too_many_ranges_is_ignored():
+    header = "bytes=" + ",".join(f"{i * 10}-{i * 10 + 1}" for i in range(MAX_RANGES + 1))
+    assert parse_range_header(header, 10000) is None
+
+
+def _stat(mtime):
+    return os.stat_result((0o100644, 0, 0, 1, 0, 0, 1000, mtime, mtime, mtime))
+
+
+def test_if_range_matches_same_etag_only():
+    stat_result = _stat(1700000000)
+    assert _if_range_matches('"abc"', '"abc"', stat_result)
+    assert not _if_range_matches('"abd"', '"abc"', stat_result)
+    assert not _if_range_matches('W/"abc"', '"abc"', stat_result)
+
+
+def test_if_range_date_must_equal_last_modified():
+    stat_result = _stat(1700000000.5)
+    assert _if_range_matches(formatdate(1700000000, usegmt=True), '"abc"', stat_result)
+    assert not _if_range_matches(formatdate(1700000001, usegmt=True), '"abc"', stat_result)
+    assert not _if_range_matches(formatdate(1699999999, usegmt=True), '"abc"', stat_result)
+    assert not _if_range_matches("yesterday", '"abc"', stat_result)
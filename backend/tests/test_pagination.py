@@ -0,0 +1,73 @@
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.utilities.pagination import decode_cursor, encode_cursor, split_page
+
+
+class Row:
+    def __init__(self, row_id, name):
+        self.id = row_id
+        self.name = name
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("name", "asc", "보고서.pdf", 42)
+    assert decode_cursor(cursor, "name", "asc") == ("보고서.pdf", 42)
+
+
+def test_cursor_round_trip_datetime():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor("created_at", "desc", created_at, 7)
+    assert decode_cursor(cursor, "created_at", "desc", is_datetime=True) == (created_at, 7)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor("name", "asc", "??>>~~", 1)
+    assert "=" not in cursor
+    assert "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor!",
+    base64.urlsafe_b64encode(b"{broken json").decode(),
+    base64.urlsafe_b64encode(b'["name","asc","a"]').decode(),
+    base64.urlsafe_b64encode(b'["name","asc","a","x"]').decode(),
+    base64.urlsafe_b64encode(b"42").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, "name", "asc")
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid cursor"
+
+
+def test_invalid_datetime_cursor_is_rejected():
+    cursor = encode_cursor("created_at", "desc", "yesterday", 1)
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, "created_at", "desc", is_datetime=True)
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize("sort, order", [("created_at", "asc"), ("name", "desc")])
+def test_cursor_from_other_sort_is_rejected(sort, order):
+    cursor = encode_cursor("name", "asc", "a", 1)
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, sort, order)
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Cursor does not match sort order"
+
+
+def test_split_page_last_page_has_no_cursor():
+    rows = [Row(1, "a"), Row(2, "b")]
+    assert split_page(rows, 2, "name", "asc", "name") == (rows, None)
+
+
+def test_split_page_points_cursor_at_last_row():
+    rows = [Row(1, "a"), Row(2, "b"), Row(3, "c")]
+    page, next_cursor = split_page(rows, 2, "name", "asc", "name")
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor, "name", "asc") == ("b", 2)
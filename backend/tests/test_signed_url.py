@@ -0,0 +1,87 @@
+import pytest
+from fastapi import HTTPException
+
+from app.utilities import signed_url
+from app.utilities.signed_url import sign_download, verify_download
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setattr(signed_url, "DOWNLOAD_URL_SECRET", "test-secret")
+    monkeypatch.setattr(signed_url, "DOWNLOAD_URL_EXPIRY_STEP_SECONDS", 1)
+
+
+def _status(token):
+    with pytest.raises(HTTPException) as exc_info:
+        verify_download(token)
+    return exc_info.value.status_code
+
+
+def test_round_trip():
+    token, expires_at = sign_download("local:blobs/ab/cd/abcd", "abcd", "보고서.pdf", expires_in=60)
+    payload = verify_download(token)
+    assert payload["k"] == "local:blobs/ab/cd/abcd"
+    assert payload["h"] == "abcd"
+    assert payload["n"] == "보고서.pdf"
+    assert payload["e"] == expires_at
+    assert "c" not in payload
+
+
+def test_round_trip_with_codec():
+    token, _ = sign_download("local:blobs/ab/cd/abcd", "abcd", "a.txt", expires_in=60, codec="zstd", file_size=1234)
+    payload = verify_download(token)
+    assert payload["c"] == "zstd"
+    assert payload["s"] == 1234
+
+
+def test_expired(monkeypatch):
+    token, expires_at = sign_download("local:key", "abcd", "a.txt", expires_in=60)
+    monkeypatch.setattr(signed_url.time, "time", lambda: expires_at)
+    assert _status(token) == 410
+
+
+def test_expiry_is_rounded_up_to_step(monkeypatch):
+    monkeypatch.setattr(signed_url, "DOWNLOAD_URL_EXPIRY_STEP_SECONDS", 300)
+    monkeypatch.setattr(signed_url.time, "time", lambda: 1000.0)
+    _, expires_at = sign_download("local:key", "abcd", "a.txt", expires_in=60)
+    assert expires_at == 1200
+
+
+def test_tampered_body():
+    token, _ = sign_download("local:key", "abcd", "a.txt", expires_in=60)
+    _, _, signature = token.partition(".")
+    forged, _ = sign_download("local:other", "abcd", "a.txt", expires_in=60)
+    forged_body, _, _ = forged.partition(".")
+    assert _status(f"{forged_body}.{signature}") == 403
+
+
+def test_tampered_signature():
+    token, _ = sign_download("local:key", "abcd", "a.txt", expires_in=60)
+    body, _, signature = token.partition(".")
+    flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+    assert _status(f"{body}.{flipped}") == 403
+
+
+def test_signed_with_other_secret(monkeypatch):
+    token, _ = sign_download("local:key", "abcd", "a.txt", expires_in=60)
+    monkeypatch.setattr(signed_url, "DOWNLOAD_URL_SECRET", "other-secret")
+    assert _status(token) == 403
+
+
+@pytest.mark.parametrize("signature", ["서명", "é" * 43, "\u0000"])
+def test_non_ascii_signature(signature):
+    token, _ = sign_download("local:key", "abcd", "a.txt", expires_in=60)
+    body, _, _ = token.partition(".")
+    assert _status(f"{body}.{signature}") == 403
+
+
+@pytest.mark.parametrize("token", ["", "no-dot", "body.", ".signature"])
+def test_malformed_token(token):
+    assert _status(token) == 403
+
+
+def test_not_configured(monkeypatch):
+    monkeypatch.setattr(signed_url, "DOWNLOAD_URL_SECRET", None)
+    with pytest.raises(HTTPException) as exc_info:
+        sign_download("local:key", "abcd", "a.txt")
+    assert exc_info.value.status_code == 503
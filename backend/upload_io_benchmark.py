@@ -0,0 +1,156 @@
+"""업로드 쓰기 경로가 이벤트 루프 지연에 주는 영향 측정
+
+동시에 업로드 50개를 흘려보내면서, 같은 루프에서 목록 조회 요청을 흉내 낸 작업이
+얼마나 늦게 끝나는지(p50/p95/p99/max)를 비교한다.
+
+- before: 예전 upload_file 방식 (이벤트 루프에서 8KB 단위 open/write)
+- after : app.services.disk.AsyncFileWriter (디스크 전용 스레드풀 + 큰 버퍼)
+
+DB 없이 실행되며, 느린 디스크는 --slow-disk-ms로 write 호출마다 지연을 넣어 흉내 낸다.
+
+    python upload_io_benchmark.py --uploads 50 --size-mb 8 --slow-disk-ms 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 현재 디렉토리를 Python 경로에 추가
+sys.path.append(str(Path(__file__).parent))
+
+from app.services import disk
+from app.services.blob import new_hasher
+
+LEGACY_CHUNK_SIZE = 8192  # 예전 upload_file의 CHUNK_SIZE
+NETWORK_PIECE_SIZE = 64 * 1024
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+class SlowFile:
+    """write마다 지연을 넣어 느린 디스크를 흉내 내는 파일 래퍼"""
+
+    def __init__(self, handle, delay):
+        self.handle = handle
+        self.delay = delay
+
+    def write(self, data):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.handle.write(data)
+
+    def close(self):
+        self.handle.close()
+
+async def receive_pieces(total_size):
+    """네트워크에서 받은 업로드 본문 조각을 흉내 냄"""
+    payload = os.urandom(NETWORK_PIECE_SIZE)
+    sent = 0
+    while sent < total_size:
+        await asyncio.sleep(0)
+        size = min(NETWORK_PIECE_SIZE, total_size - sent)
+        sent += size
+        yield payload[:size]
+
+async def upload_before(path, total_size, delay):
+    hasher = new_hasher()
+    buffer = SlowFile(open(path, "wb"), delay)
+    pending = bytearray()
+    async for piece in receive_pieces(total_size):
+        pending += piece
+        while len(pending) >= LEGACY_CHUNK_SIZE:
+            chunk = bytes(pending[:LEGACY_CHUNK_SIZE])
+            del pending[:LEGACY_CHUNK_SIZE]
+            buffer.write(chunk)
+            hasher.update(chunk)
+    if pending:
+        buffer.write(bytes(pending))
+        hasher.update(pending)
+    buffer.close()
+
+async def upload_after(path, total_size, delay):
+    writer = disk.AsyncFileWriter(path, new_hasher())
+    await writer.open()
+    writer._handle = SlowFile(writer._handle, delay)
+    async for piece in receive_pieces(total_size):
+        await writer.write(piece)
+    await writer.close()
+
+async def listing_probe(stop, latencies, interval):
+    """목록 조회 요청 흉내: DB 왕복 두 번 + 응답 직렬화"""
+    rows = [{"id": i, "name": f"file_{i}.txt", "file_size": i * 1024} for i in range(100)]
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        json.dumps(rows)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+
+async def run_scenario(mode, uploads, size, delay, workdir):
+    upload = upload_before if mode == "before" else upload_after
+    latencies = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(listing_probe(stop, latencies, 0.005))
+
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        upload(Path(workdir) / f"{mode}_{i}.bin", size, delay) for i in range(uploads)
+    ])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+    for i in range(uploads):
+        (Path(workdir) / f"{mode}_{i}.bin").unlink(missing_ok=True)
+
+    return {
+        "mode": mode,
+        "uploads": uploads,
+        "upload_bytes": uploads * size,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_mb_s": round(uploads * size / elapsed / (1024 * 1024), 1),
+        "listing_requests": len(latencies),
+        "listing_latency_ms": {
+            "p50": round(statistics.median(latencies), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(max(latencies), 3),
+        },
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--size-mb", type=float, default=8)
+    parser.add_argument("--slow-disk-ms", type=float, default=0.0, help="write 호출마다 넣을 지연 (느린 디스크 흉내)")
+    parser.add_argument("--dir", default=None, help="임시 파일을 쓸 디렉토리 (기본: 시스템 임시 디렉토리)")
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    delay = args.slow_disk_ms / 1000
+    with tempfile.TemporaryDirectory(dir=args.dir) as workdir:
+        results = [
+            await run_scenario("before", args.uploads, size, delay, workdir),
+            await run_scenario("after", args.uploads, size, delay, workdir),
+        ]
+
+    print(json.dumps({
+        "settings": {
+            "slow_disk_ms": args.slow_disk_ms,
+            "disk_io_workers": disk.DISK_IO_WORKERS,
+            "disk_max_concurrent_writers": disk.DISK_MAX_CONCURRENT_WRITERS,
+            "disk_write_buffer_size": disk.DISK_WRITE_BUFFER_SIZE,
+        },
+        "results": results,
+    }, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,10 @@
 -- init.sql
 -- 파일 관리 시스템 (최소 버전)
 
+-- 이름 검색용 트라이그램 인덱스 (btree_gin: owner_id를 같은 GIN 인덱스에 넣기 위해)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
 -- 사용자 테이블
 CREATE TABLE users (
     id SERIAL PRIMARY KEY,
@@ -18,17 +22,91 @@ CREATE TABLE folders (
     name VARCHAR(255) NOT NULL,
     parent_folder_id INTEGER REFERENCES folders(id) ON DELETE CASCADE,
     owner_id INTEGER REFERENCES users(id) ON DELETE CASCADE NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    path VARCHAR(1000),  -- 루트부터 자기 자신까지의 id 경로 (예: /1/5/23/)
+    file_count INTEGER NOT NULL DEFAULT 0,  -- 직속 파일 수 (휴지통 제외)
+    folder_count INTEGER NOT NULL DEFAULT 0,  -- 직속 하위 폴더 수
+    total_size BIGINT NOT NULL DEFAULT 0,  -- 하위 트리 전체 파일 크기 (휴지통 제외)
+    is_deleted BOOLEAN DEFAULT FALSE,
+    deleted_at TIMESTAMP DEFAULT NULL,
+    trash_root_id INTEGER  -- 휴지통으로 보낸 폴더 ID (자기 자신이면 휴지통 목록에 보이는 항목)
 );
 
 -- 파일 테이블
 CREATE TABLE files (
     id SERIAL PRIMARY KEY,
     name VARCHAR(255) NOT NULL,
-    path_on_disk VARCHAR(500) NOT NULL UNIQUE,
+    path_on_disk VARCHAR(500) NOT NULL,
+    content_hash CHAR(64),
+    storage_codec VARCHAR(16),  -- 저장 시 압축 형식 (NULL이면 원본 그대로, blobs.storage_codec과 같은 값)
     file_size BIGINT NOT NULL,
     parent_folder_id INTEGER REFERENCES folders(id) ON DELETE CASCADE,
     owner_id INTEGER REFERENCES users(id) ON DELETE CASCADE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_deleted BOOLEAN DEFAULT FALSE,
+    deleted_at TIMESTAMP DEFAULT NULL,
+    trash_root_id INTEGER  -- 폴더와 함께 휴지통에 들어간 경우 그 폴더 ID
+);
+
+-- blob 테이블 (내용 주소 기반 저장소, 같은 내용은 한 번만 저장)
+CREATE TABLE blobs (
+    hash CHAR(64) PRIMARY KEY,
+    path_on_disk VARCHAR(500) NOT NULL,
+    size BIGINT NOT NULL,
+    storage_codec VARCHAR(16),  -- 저장 시 압축 형식 (NULL이면 원본 그대로)
+    stored_size BIGINT,  -- 저장소에 실제로 저장된 크기 (NULL이면 size와 같음)
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 업로드 세션 테이블 (청크 업로드용)
+CREATE TABLE upload_sessions (
+    id VARCHAR(32) PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    total_size BIGINT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    parent_folder_id INTEGER REFERENCES folders(id) ON DELETE CASCADE,
+    owner_id INTEGER REFERENCES users(id) ON DELETE CASCADE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- 정리 작업 진행 위치 (중단 후 이어서 실행하기 위함)
+CREATE TABLE maintenance_checkpoints (
+    name VARCHAR(100) PRIMARY KEY,
+    cutoff TIMESTAMP NOT NULL,
+    last_deleted_at TIMESTAMP NOT NULL,
+    last_id INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 작업 큐 (파일 정리, 휴지통 정리 등 요청 밖에서 처리할 작업, 완료되면 삭제)
+CREATE TABLE jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending / running / dead
+    dedupe_key VARCHAR(100),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_at TIMESTAMP,
+    locked_by VARCHAR(100),
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 샘플링된 느린 요청과 실행한 SQL 목록 (가장 느린 SQL_PROFILE_KEEP개만 유지)
+CREATE TABLE request_profiles (
+    id BIGSERIAL PRIMARY KEY,
+    method VARCHAR(10) NOT NULL,
+    route VARCHAR(255) NOT NULL,
+    status INTEGER NOT NULL,
+    duration_ms DOUBLE PRECISION NOT NULL,
+    db_ms DOUBLE PRECISION NOT NULL,
+    auth_ms DOUBLE PRECISION NOT NULL,
+    query_count INTEGER NOT NULL,
+    statements JSONB NOT NULL DEFAULT '{}',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -41,6 +119,7 @@ CREATE INDEX idx_files_parent ON files(parent_folder_id);
 CREATE INDEX idx_folders_owner ON folders(owner_id);
 CREATE INDEX idx_folders_owner_parent ON folders(owner_id, parent_folder_id);
 CREATE INDEX idx_folders_created_at ON folders(created_at);
+CREATE INDEX idx_folders_owner_path ON folders(owner_id, path text_pattern_ops);
 
 -- 2. 파일 관련 인덱스
 CREATE INDEX idx_files_owner ON files(owner_id);
@@ -48,14 +127,47 @@ CREATE INDEX idx_files_owner_parent ON files(owner_id, parent_folder_id);
 CREATE INDEX idx_files_name ON files(name);
 CREATE INDEX idx_files_created_at ON files(created_at);
 CREATE INDEX idx_files_size ON files(file_size);
+CREATE INDEX idx_files_content_hash ON files(content_hash);
+
+-- 3. blob / 업로드 세션 인덱스
+CREATE INDEX idx_blobs_orphan ON blobs(hash) WHERE ref_count <= 0;
+CREATE INDEX idx_upload_sessions_expires_at ON upload_sessions(expires_at);
 
--- 3. 사용자 관련 인덱스 (email은 이미 UNIQUE 제약조건으로 인덱스 생성됨)
+-- 4. 사용자 관련 인덱스 (email은 이미 UNIQUE 제약조건으로 인덱스 생성됨)
 CREATE INDEX idx_users_created_at ON users(created_at);
 
--- 4. 복합 인덱스 (자주 사용되는 쿼리 패턴용)
+-- 5. 복합 인덱스 (자주 사용되는 쿼리 패턴용)
 CREATE INDEX idx_folders_owner_parent_name ON folders(owner_id, parent_folder_id, name);
 CREATE INDEX idx_files_owner_parent_name ON files(owner_id, parent_folder_id, name);
 
+-- 6. 목록 페이지네이션 인덱스 (keyset: 정렬 키 + id)
+CREATE INDEX idx_files_list_name ON files(owner_id, parent_folder_id, name, id) WHERE is_deleted = false;
+CREATE INDEX idx_files_list_created_at ON files(owner_id, parent_folder_id, created_at, id) WHERE is_deleted = false;
+CREATE INDEX idx_files_list_size ON files(owner_id, parent_folder_id, file_size, id) WHERE is_deleted = false;
+CREATE INDEX idx_files_trash ON files(owner_id, deleted_at, id) WHERE is_deleted = true AND trash_root_id IS NULL;
+CREATE INDEX idx_folders_trash ON folders(owner_id, deleted_at, id) WHERE is_deleted = true AND trash_root_id = id;
+CREATE INDEX idx_files_trash_expiry ON files(deleted_at, id) WHERE is_deleted = true;
+CREATE INDEX idx_folders_trash_expiry ON folders(deleted_at, id) WHERE is_deleted = true AND trash_root_id = id;
+
+-- 7. 폴더 휴지통 (휴지통으로 보낸 폴더 기준으로 하위 트리를 한 번에 복원)
+CREATE INDEX idx_files_trash_root ON files(trash_root_id) WHERE trash_root_id IS NOT NULL;
+CREATE INDEX idx_folders_trash_root ON folders(trash_root_id) WHERE trash_root_id IS NOT NULL;
+CREATE INDEX idx_folders_list_name ON folders(owner_id, parent_folder_id, name, id) WHERE is_deleted = false;
+CREATE INDEX idx_folders_list_created_at ON folders(owner_id, parent_folder_id, created_at, id) WHERE is_deleted = false;
+CREATE INDEX idx_folders_list_size ON folders(owner_id, parent_folder_id, total_size, id) WHERE is_deleted = false;
+
+-- 8. 작업 큐 (가져갈 작업 조회, 같은 작업 중복 등록 방지)
+CREATE INDEX idx_jobs_pending ON jobs(run_at) WHERE status = 'pending';
+CREATE INDEX idx_jobs_running ON jobs(locked_at) WHERE status = 'running';
+CREATE UNIQUE INDEX idx_jobs_dedupe ON jobs(dedupe_key) WHERE status IN ('pending', 'running');
+CREATE INDEX idx_request_profiles_duration ON request_profiles(duration_ms DESC);
+
+-- 9. 이름 검색 (부분/유사 검색은 트라이그램 GIN, 앞부분 검색은 이름순 btree)
+CREATE INDEX idx_files_search_trgm ON files USING gin (owner_id, name gin_trgm_ops) WHERE is_deleted = false;
+CREATE INDEX idx_folders_search_trgm ON folders USING gin (owner_id, name gin_trgm_ops) WHERE is_deleted = false;
+CREATE INDEX idx_files_search_prefix ON files(owner_id, (lower(name) COLLATE "C"), id) WHERE is_deleted = false;
+CREATE INDEX idx_folders_search_prefix ON folders(owner_id, (lower(name) COLLATE "C"), id) WHERE is_deleted = false;
+
 -- -- 샘플 데이터
 -- INSERT INTO users (email, name) VALUES 
 -- ('admin@example.com', 'Admin');
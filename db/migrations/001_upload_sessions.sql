@@ -0,0 +1,15 @@
+-- 001_upload_sessions.sql
+-- 청크 업로드 세션 테이블 추가 (기존 볼륨에 적용)
+
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    id VARCHAR(32) PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    total_size BIGINT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    parent_folder_id INTEGER REFERENCES folders(id) ON DELETE CASCADE,
+    owner_id INTEGER REFERENCES users(id) ON DELETE CASCADE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_expires_at ON upload_sessions(expires_at);
@@ -0,0 +1,20 @@
+-- 002_blob_store.sql
+-- 내용 주소 기반 blob 저장소 (중복 제거 + 참조 카운트)
+
+ALTER TABLE files ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
+ALTER TABLE files ADD COLUMN IF NOT EXISTS is_deleted BOOLEAN DEFAULT FALSE;
+ALTER TABLE files ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP DEFAULT NULL;
+
+-- 같은 blob을 여러 파일이 가리키므로 path_on_disk는 더 이상 유니크하지 않음
+ALTER TABLE files DROP CONSTRAINT IF EXISTS files_path_on_disk_key;
+
+CREATE TABLE IF NOT EXISTS blobs (
+    hash CHAR(64) PRIMARY KEY,
+    path_on_disk VARCHAR(500) NOT NULL,
+    size BIGINT NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_files_content_hash ON files(content_hash);
+CREATE INDEX IF NOT EXISTS idx_blobs_orphan ON blobs(hash) WHERE ref_count <= 0;
@@ -0,0 +1,10 @@
+-- 003_listing_indexes.sql
+-- keyset 페이지네이션용 복합 인덱스 (정렬 키 + id)
+-- 운영 DB에서는 잠금을 피하기 위해 CONCURRENTLY로 생성 (트랜잭션 밖에서 실행)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_files_list_name ON files(owner_id, parent_folder_id, name, id) WHERE is_deleted = false;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_files_list_created_at ON files(owner_id, parent_folder_id, created_at, id) WHERE is_deleted = false;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_files_list_size ON files(owner_id, parent_folder_id, file_size, id) WHERE is_deleted = false;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_files_trash ON files(owner_id, deleted_at, id) WHERE is_deleted = true;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_folders_list_name ON folders(owner_id, parent_folder_id, name, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_folders_list_created_at ON folders(owner_id, parent_folder_id, created_at, id);
@@ -0,0 +1,17 @@
+-- 004_folder_paths.sql
+-- 폴더 경로(materialized path) 인덱스: 하위 트리 조회, 빵부스러기, 순환 이동 검사용
+
+ALTER TABLE folders ADD COLUMN IF NOT EXISTS path VARCHAR(1000);
+
+-- 기존 폴더 경로 채우기
+WITH RECURSIVE tree AS (
+    SELECT id, '/' || id || '/' AS path FROM folders WHERE parent_folder_id IS NULL
+    UNION ALL
+    SELECT f.id, t.path || f.id || '/' FROM folders f
+    INNER JOIN tree t ON f.parent_folder_id = t.id
+)
+UPDATE folders SET path = tree.path
+FROM tree
+WHERE folders.id = tree.id AND folders.path IS DISTINCT FROM tree.path;
+
+CREATE INDEX IF NOT EXISTS idx_folders_owner_path ON folders(owner_id, path text_pattern_ops);
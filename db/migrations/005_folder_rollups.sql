@@ -0,0 +1,18 @@
+-- 005_folder_rollups.sql
+-- 폴더 집계 컬럼: 직속 파일 수, 직속 하위 폴더 수, 하위 트리 전체 크기
+-- 이후로는 API가 같은 트랜잭션에서 증감하고, 스케줄러(verify_folder_stats)가 어긋난 값을 바로잡는다.
+
+ALTER TABLE folders ADD COLUMN IF NOT EXISTS file_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE folders ADD COLUMN IF NOT EXISTS folder_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE folders ADD COLUMN IF NOT EXISTS total_size BIGINT NOT NULL DEFAULT 0;
+
+-- 기존 폴더 집계 채우기 (004의 path 필요)
+UPDATE folders f SET
+    file_count = (SELECT count(*) FROM files fi
+                  WHERE fi.parent_folder_id = f.id AND fi.is_deleted = false),
+    folder_count = (SELECT count(*) FROM folders c WHERE c.parent_folder_id = f.id),
+    total_size = (SELECT coalesce(sum(fi.file_size), 0) FROM folders d
+                  JOIN files fi ON fi.parent_folder_id = d.id AND fi.is_deleted = false
+                  WHERE d.owner_id = f.owner_id AND d.path LIKE f.path || '%');
+
+CREATE INDEX IF NOT EXISTS idx_folders_list_size ON folders(owner_id, parent_folder_id, total_size, id);
@@ -0,0 +1,12 @@
+-- 006_trash_reaper.sql
+-- 휴지통 정리 작업: 진행 위치 기록 테이블과 (deleted_at, id) 순서 조회용 인덱스
+
+CREATE TABLE IF NOT EXISTS maintenance_checkpoints (
+    name VARCHAR(100) PRIMARY KEY,
+    cutoff TIMESTAMP NOT NULL,
+    last_deleted_at TIMESTAMP NOT NULL,
+    last_id INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_files_trash_expiry ON files(deleted_at, id) WHERE is_deleted = true;
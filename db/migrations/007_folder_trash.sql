@@ -0,0 +1,25 @@
+-- 007_folder_trash.sql
+-- 폴더 휴지통: 하위 트리 전체에 is_deleted와 trash_root_id(휴지통으로 보낸 폴더)를 표시
+
+ALTER TABLE folders ADD COLUMN IF NOT EXISTS is_deleted BOOLEAN DEFAULT FALSE;
+ALTER TABLE folders ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP DEFAULT NULL;
+ALTER TABLE folders ADD COLUMN IF NOT EXISTS trash_root_id INTEGER;
+ALTER TABLE files ADD COLUMN IF NOT EXISTS trash_root_id INTEGER;
+
+-- 하위 트리 복원/영구 삭제
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_files_trash_root ON files(trash_root_id) WHERE trash_root_id IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_folders_trash_root ON folders(trash_root_id) WHERE trash_root_id IS NOT NULL;
+
+-- 휴지통 목록 (따로 버린 파일 + 휴지통으로 보낸 폴더) 및 만료 정리
+DROP INDEX CONCURRENTLY IF EXISTS idx_files_trash;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_files_trash ON files(owner_id, deleted_at, id) WHERE is_deleted = true AND trash_root_id IS NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_folders_trash ON folders(owner_id, deleted_at, id) WHERE is_deleted = true AND trash_root_id = id;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_folders_trash_expiry ON folders(deleted_at, id) WHERE is_deleted = true AND trash_root_id = id;
+
+-- 폴더 목록 인덱스는 휴지통에 없는 폴더만
+DROP INDEX CONCURRENTLY IF EXISTS idx_folders_list_name;
+DROP INDEX CONCURRENTLY IF EXISTS idx_folders_list_created_at;
+DROP INDEX CONCURRENTLY IF EXISTS idx_folders_list_size;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_folders_list_name ON folders(owner_id, parent_folder_id, name, id) WHERE is_deleted = false;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_folders_list_created_at ON folders(owner_id, parent_folder_id, created_at, id) WHERE is_deleted = false;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_folders_list_size ON folders(owner_id, parent_folder_id, total_size, id) WHERE is_deleted = false;
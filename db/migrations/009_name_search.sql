@@ -0,0 +1,13 @@
+-- 009_name_search.sql
+-- 이름 검색: 앞에 %가 붙은 ILIKE는 btree idx_files_name을 못 타므로 소유자별 트라이그램 GIN 인덱스 추가
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- 부분 검색(ILIKE '%q%')과 유사 검색(q <% name)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_files_search_trgm ON files USING gin (owner_id, name gin_trgm_ops) WHERE is_deleted = false;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_folders_search_trgm ON folders USING gin (owner_id, name gin_trgm_ops) WHERE is_deleted = false;
+
+-- 앞부분 검색 (이름순 keyset)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_files_search_prefix ON files(owner_id, (lower(name) COLLATE "C"), id) WHERE is_deleted = false;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_folders_search_prefix ON folders(owner_id, (lower(name) COLLATE "C"), id) WHERE is_deleted = false;
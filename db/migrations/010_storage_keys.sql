@@ -0,0 +1,9 @@
+-- 010_storage_keys.sql
+-- path_on_disk를 저장소 드라이버가 붙은 키로 변환 ("data/blobs/..." -> "local:blobs/...")
+-- 변환하지 않은 값도 현재 작업 디렉토리 기준 로컬 경로로 읽히므로 배치로 나눠 실행해도 됨
+
+UPDATE blobs SET path_on_disk = 'local:' || substr(path_on_disk, 6)
+WHERE path_on_disk LIKE 'data/%';
+
+UPDATE files SET path_on_disk = 'local:' || substr(path_on_disk, 6)
+WHERE path_on_disk LIKE 'data/%';
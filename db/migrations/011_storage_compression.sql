@@ -0,0 +1,7 @@
+-- 011_storage_compression.sql
+-- 저장 시 압축: blob/파일에 저장 형식(codec)과 실제 저장 크기를 기록
+-- 기존 행은 NULL (원본 그대로 저장된 것으로 취급)
+
+ALTER TABLE blobs ADD COLUMN IF NOT EXISTS storage_codec VARCHAR(16);
+ALTER TABLE blobs ADD COLUMN IF NOT EXISTS stored_size BIGINT;
+ALTER TABLE files ADD COLUMN IF NOT EXISTS storage_codec VARCHAR(16);
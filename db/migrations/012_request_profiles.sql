@@ -0,0 +1,17 @@
+-- 012_request_profiles.sql
+-- 요청별 SQL 프로파일링: SQL_PROFILE_SAMPLE_RATE로 샘플링한 요청 중 느린 요청과 실행한 SQL 목록
+
+CREATE TABLE IF NOT EXISTS request_profiles (
+    id BIGSERIAL PRIMARY KEY,
+    method VARCHAR(10) NOT NULL,
+    route VARCHAR(255) NOT NULL,
+    status INTEGER NOT NULL,
+    duration_ms DOUBLE PRECISION NOT NULL,
+    db_ms DOUBLE PRECISION NOT NULL,
+    auth_ms DOUBLE PRECISION NOT NULL,
+    query_count INTEGER NOT NULL,
+    statements JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_request_profiles_duration ON request_profiles(duration_ms DESC);
@@ -5,6 +5,7 @@ import { useRestoreFile } from '../../queries/trash/restorefile'
 
 interface ITrashItem {
     id: number
+    type: 'file' | 'folder'
     name: string
     file_size: number
     deleted_at: string
@@ -25,8 +26,12 @@ function TrashList() {
             </div>
             <div className={styles.trash_list_content}>
                 {data?.map((item: ITrashItem) => (
-                    <div className={styles.trash_list_item} key={item.id}>
+                    <div
+                        className={styles.trash_list_item}
+                        key={`${item.type}-${item.id}`}
+                    >
                         <div className={styles.trash_list_item_name}>
+                            {item.type === 'folder' ? '📁 ' : ''}
                             {item.name}
                         </div>
                         <div className={styles.trash_list_item_size}>
@@ -38,14 +43,14 @@ function TrashList() {
                         <div className={styles.trash_list_item_button}>
                             <button
                                 onClick={() => {
-                                    restoreFileMutation.mutate(item.id)
+                                    restoreFileMutation.mutate(item)
                                 }}
                             >
                                 🔄 Restore
                             </button>
                             <button
                                 onClick={() => {
-                                    deletePermanentMutation.mutate(item.id)
+                                    deletePermanentMutation.mutate(item)
                                 }}
                             >
                                 ❌ Delete Permanent
@@ -22,10 +22,14 @@ export const downloadFile = async (fileId: number) => {
     link.href = url
 
     // 파일명 추출 (Content-Disposition 헤더에서)
+    // 한글 등 비ASCII 파일명은 filename*=utf-8''... 형식으로 전달됨
     const contentDisposition = response.headers['content-disposition']
-    const filename = contentDisposition
-        ? contentDisposition.split('filename=')[1]?.replace(/"/g, '')
-        : `download_${fileId}`
+    const encodedFilename = contentDisposition?.split("filename*=utf-8''")[1]
+    const filename = encodedFilename
+        ? decodeURIComponent(encodedFilename)
+        : contentDisposition
+          ? contentDisposition.split('filename=')[1]?.replace(/"/g, '')
+          : `download_${fileId}`
 
     link.download = filename
     link.click()
@@ -1,13 +1,13 @@
 import { useQuery } from '@tanstack/react-query'
 import { useSearchParams } from 'react-router-dom'
 
-import apiClient from '../../utils/apiClient'
+import { getAllPages } from '../../utils/pagination'
 
 const getFile = async (parentFolderId: number) => {
-    const response = await apiClient.get(
+    const pages = await getAllPages(
         `http://localhost:8000/files/?parent_folder_id=${parentFolderId}`,
     )
-    return response.data
+    return pages.flat()
 }
 
 export const useGetFile = () => {
@@ -1,13 +1,13 @@
 import { useQuery } from '@tanstack/react-query'
 import { useSearchParams } from 'react-router-dom'
 
-import apiClient from '../../utils/apiClient'
+import { getAllPages } from '../../utils/pagination'
 
 const getFolder = async (currentFolderId: number) => {
-    const response = await apiClient.get(
+    const pages = await getAllPages(
         `http://localhost:8000/folders/?current_folder_id=${currentFolderId}`,
     )
-    return response.data
+    return { ...pages[0], folders: pages.flatMap((page) => page.folders) }
 }
 
 export const useGetFolder = () => {
@@ -1,10 +1,13 @@
 import { useMutation, useQueryClient } from '@tanstack/react-query'
 
 import apiClient from '../../utils/apiClient'
+import type { ITrashTarget } from './restoreFile'
 
-const deletePermanent = async (fileId: number) => {
+const deletePermanent = async (item: ITrashTarget) => {
+    // 휴지통 항목은 파일 또는 (하위 항목이 접힌) 폴더
+    const resource = item.type === 'folder' ? 'folders' : 'files'
     const response = await apiClient.delete(
-        `http://localhost:8000/files/${fileId}/permanent`,
+        `http://localhost:8000/${resource}/${item.id}/permanent`,
     )
     return response.data
 }
@@ -12,7 +15,7 @@ const deletePermanent = async (fileId: number) => {
 export const useDeletePermanent = () => {
     const queryClient = useQueryClient()
     return useMutation({
-        mutationFn: (fileId: number) => deletePermanent(fileId),
+        mutationFn: (item: ITrashTarget) => deletePermanent(item),
         onSuccess: () => {
             queryClient.invalidateQueries({ queryKey: ['trash'] })
         },
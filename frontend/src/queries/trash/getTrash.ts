@@ -1,10 +1,10 @@
 import { useQuery } from '@tanstack/react-query'
 
-import apiClient from '../../utils/apiClient'
+import { getAllPages } from '../../utils/pagination'
 
 const getTrash = async () => {
-    const response = await apiClient.get(`http://localhost:8000/files/trash`)
-    return response.data
+    const pages = await getAllPages(`http://localhost:8000/files/trash`)
+    return pages.flat()
 }
 
 export const useGetTrash = () => {
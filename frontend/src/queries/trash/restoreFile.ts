@@ -2,9 +2,15 @@ import { useMutation, useQueryClient } from '@tanstack/react-query'
 
 import apiClient from '../../utils/apiClient'
 
-const restoreFile = async (fileId: number) => {
+export interface ITrashTarget {
+    id: number
+    type: 'file' | 'folder'
+}
+
+const restoreFile = async (item: ITrashTarget) => {
+    const resource = item.type === 'folder' ? 'folders' : 'files'
     const response = await apiClient.post(
-        `http://localhost:8000/files/${fileId}/restore`,
+        `http://localhost:8000/${resource}/${item.id}/restore`,
     )
     return response.data
 }
@@ -12,7 +18,7 @@ const restoreFile = async (fileId: number) => {
 export const useRestoreFile = () => {
     const queryClient = useQueryClient()
     return useMutation({
-        mutationFn: (fileId: number) => restoreFile(fileId),
+        mutationFn: (item: ITrashTarget) => restoreFile(item),
         onSuccess: () => {
             queryClient.invalidateQueries({ queryKey: ['trash'] })
         },
@@ -0,0 +1,24 @@
+import apiClient from './apiClient'
+
+// 서버가 한 번에 돌려주는 최대 개수 (backend MAX_PAGE_SIZE)
+const PAGE_LIMIT = 1000
+
+// 응답 본문 (apiClient.get과 같은 타입)
+type Page = Awaited<ReturnType<typeof apiClient.get>>['data']
+
+// X-Next-Cursor 헤더를 따라가며 목록의 모든 페이지를 순서대로 가져옴
+export const getAllPages = async (
+    url: string,
+    params: Record<string, string | number> = {},
+): Promise<Page[]> => {
+    const pages: Page[] = []
+    let cursor: string | undefined
+    do {
+        const response = await apiClient.get(url, {
+            params: { ...params, limit: PAGE_LIMIT, ...(cursor ? { cursor } : {}) },
+        })
+        pages.push(response.data)
+        cursor = response.headers['x-next-cursor']
+    } while (cursor)
+    return pages
+}